@@ -1,166 +1,891 @@
-from flask import Flask, request, jsonify, send_from_directory
-from flask_sqlalchemy import SQLAlchemy
+from flask import Flask, Blueprint, current_app, request, jsonify, send_from_directory, g, stream_with_context, has_app_context
+from flask.cli import with_appcontext
+from flask.json.provider import DefaultJSONProvider
+from functools import wraps
+from contextlib import contextmanager
+from collections import Counter, defaultdict
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-from datetime import datetime, timedelta
+from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity, verify_jwt_in_request, current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import get_input_stream
+from datetime import datetime, timedelta, time, timezone
 import os
+import io
+import csv
+import json
 import uuid
 import base64
-from PIL import Image
-import io
+import hmac
+import hashlib
+import tempfile
+import time as time_module
+import click
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-app = Flask(__name__)
-
-# Configurações
-app.config['SECRET_KEY'] = 'precrastine-se-secret-key-2024'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///precrastine.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = 'jwt-secret-string'
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
-app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-
-# Inicialização
-db = SQLAlchemy(app)
-jwt = JWTManager(app)
-CORS(app)
-
-# Criar pasta de uploads
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs(os.path.join(app.config['UPLOAD_FOLDER'], 'profiles'), exist_ok=True)
-
-# Modelos do Banco de Dados
-class User(db.Model):
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    name = db.Column(db.String(100), nullable=False)
-    password_hash = db.Column(db.String(255), nullable=False)
-    photo = db.Column(db.Text, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Relacionamentos
-    tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
-    life_areas = db.relationship('LifeArea', backref='user', lazy=True, cascade='all, delete-orphan')
-
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'email': self.email,
-            'name': self.name,
-            'photo': self.photo,
-            'createdAt': self.created_at.isoformat()
-        }
+from cache import LRUCache
+from config import config
+from events import EventBus
+from groupcommit import GroupCommitWriter
+from metrics import Metrics
+from passwords import PasswordHasher, PasswordHasherBusy
+from serializers import (
+    FastJSONProvider, TASK_LIST_COLUMNS, LIFE_AREA_LIST_COLUMNS, task_serializer,
+    serialize_life_area_rows, timed_json_provider
+)
+from models import (
+    db, User, UserIdentity, Task, TaskOccurrence, TaskTombstone, TaskOccurrenceTombstone, UserVersion, UserStats, PhotoJob, UserShard,
+    LifeAreaTemplate, LifeAreaOverride, LifeAreaScoreEvent, LifeAreaScoreRollup, SHARDED_TABLE_NAMES, shard_metadata
+)
+from migrations import migrate_schema, schema_is_current
+from recurrence import RecurrenceRule, is_occurrence, iter_occurrences, recurrence_from_data
+from search import (
+    rebuild_task_search_index, search_terms, supports_task_search, task_search,
+    task_search_clause, task_search_join
+)
+from utils import (
+    allowed_file, iter_stream_lines, process_image, process_image_file, read_image_header, timed_call,
+    validate_task_data
+)
 
-class Task(db.Model):
-    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    title = db.Column(db.String(200), nullable=False)
-    description = db.Column(db.Text, nullable=True)
-    completed = db.Column(db.Boolean, default=False)
-    priority = db.Column(db.String(10), default='medium')  # low, medium, high
-    category = db.Column(db.String(50), default='pessoal')
-    due_date = db.Column(db.DateTime, nullable=True)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'completed': self.completed,
-            'priority': self.priority,
-            'category': self.category,
-            'dueDate': self.due_date.isoformat() if self.due_date else None,
-            'createdAt': self.created_at.isoformat(),
-            'updatedAt': self.updated_at.isoformat(),
-            'userId': self.user_id
-        }
+# Extensões, ligadas à aplicação em create_app
+jwt = JWTManager()
+api = Blueprint('api', __name__, url_prefix='/api')
 
-class LifeArea(db.Model):
-    id = db.Column(db.String(36), primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    score = db.Column(db.Integer, default=5)
-    color = db.Column(db.String(7), nullable=False)
-    icon = db.Column(db.String(50), nullable=False)
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.String(36), db.ForeignKey('user.id'), nullable=False)
-
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'score': self.score,
-            'color': self.color,
-            'icon': self.icon,
-            'lastUpdated': self.last_updated.isoformat(),
-            'userId': self.user_id
-        }
+# Instrumentação: comandos SQL e tempos de cada requisição, enviados no
+# Server-Timing e acumulados nas métricas de GET /api/metrics
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_sql_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_started = time_module.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def record_sql_statement(conn, cursor, statement, parameters, context, executemany):
+    if context is None or not has_app_context() or 'metrics' not in current_app.extensions:
+        return
+    elapsed = time_module.perf_counter() - context.query_started
+    g.sql_statements = g.get('sql_statements', 0) + 1
+    g.sql_time = g.get('sql_time', 0.0) + elapsed
+    
+    metrics = current_app.extensions['metrics']
+    metrics.query_duration.observe((), elapsed)
+    if elapsed * 1000 >= current_app.config['SLOW_QUERY_MS']:
+        metrics.slow_queries.inc()
+        current_app.logger.warning(
+            'Consulta lenta (%.1f ms): %s', elapsed * 1000, ' '.join(statement.split())[:1000]
+        )
+
+@api.before_app_request
+def start_request_timer():
+    # Registrado antes das demais funções, para medir também o roteamento de shard
+    g.request_started = time_module.perf_counter()
+
+@api.after_app_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    total = time_module.perf_counter() - started
+    statements = g.get('sql_statements', 0)
+    route = request.url_rule.rule if request.url_rule else 'desconhecida'
+    
+    metrics = current_app.extensions['metrics']
+    metrics.requests.inc((request.method, route, str(response.status_code)))
+    metrics.request_duration.observe((request.method, route), total)
+    metrics.request_queries.observe((request.method, route), statements)
+    
+    if current_app.config['SERVER_TIMING_HEADER']:
+        response.headers['Server-Timing'] = (
+            f'db;dur={g.get("sql_time", 0.0) * 1000:.1f};desc="{statements} consultas", '
+            f'serialization;dur={g.get("serialization_time", 0.0) * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+    if current_app.config['SQL_STATEMENT_COUNT_HEADER']:
+        response.headers['X-SQL-Statements'] = str(statements)
+    return response
+
+# Fragmentação (sharding) por usuário
+class UserShardLocked(Exception):
+    """Os dados do usuário estão sendo movidos entre shards"""
+
+def shard_count():
+    return 1 + len(current_app.config['SHARD_DATABASE_URIS'])
+
+def shard_engine(index):
+    return db.engine if index == 0 else db.engines[f'shard{index}']
+
+def lookup_user_shard(user_id):
+    """Consulta o diretório; usuários sem registro ficam no shard 0"""
+    entry = db.session.get(UserShard, user_id)
+    if entry and entry.locked:
+        raise UserShardLocked(user_id)
+    return entry.shard if entry else 0
+
+def use_user_shard(user_id):
+    """Direciona as consultas seguintes do contexto atual para o shard do usuário"""
+    if shard_count() > 1:
+        g.user_shard = lookup_user_shard(user_id)
+
+def user_shard_index(user_id):
+    """Shard de um novo usuário: hash estável do id"""
+    return int(hashlib.sha1(user_id.encode()).hexdigest(), 16) % shard_count()
+
+def assign_user_shard(user_id):
+    """Escolhe o shard de um novo usuário e o registra"""
+    index = user_shard_index(user_id)
+    if shard_count() > 1:
+        db.session.add(UserShard(user_id=user_id, shard=index))
+        g.user_shard = index
+    return index
+
+def move_user_to_shard(user_id, target):
+    """
+    Copia os dados do usuário para outro shard, atualiza o diretório e remove
+    as linhas do shard de origem. Durante a cópia o usuário fica bloqueado e
+    suas requisições recebem 503.
+    """
+    entry = db.session.get(UserShard, user_id) or UserShard(user_id=user_id, shard=0)
+    source = entry.shard
+    if source == target:
+        return False
+    
+    entry.locked = True
+    db.session.add(entry)
+    db.session.commit()
+    # Aguarda requisições que já haviam resolvido o shard antigo
+    time_module.sleep(current_app.config['SHARD_MOVE_GRACE_SECONDS'])
+    
+    tables = [shard_metadata.tables[table.name] for table in db.metadata.sorted_tables
+              if table.name in SHARDED_TABLE_NAMES]
+    try:
+        with shard_engine(source).connect() as source_conn, shard_engine(target).begin() as target_conn:
+            for table in tables:
+                rows = [dict(row._mapping) for row in source_conn.execute(
+                    table.select().where(table.c.user_id == user_id)
+                )]
+                # Remove restos de uma migração interrompida antes de copiar
+                target_conn.execute(table.delete().where(table.c.user_id == user_id))
+                if rows:
+                    target_conn.execute(table.insert(), rows)
+        
+        entry.shard = target
+        entry.locked = False
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        entry.locked = False
+        db.session.commit()
+        raise
+    
+    with shard_engine(source).begin() as source_conn:
+        for table in reversed(tables):
+            source_conn.execute(table.delete().where(table.c.user_id == user_id))
+    return True
+
+@api.before_app_request
+def route_user_shard():
+    """Resolve o shard do usuário autenticado antes de executar a rota"""
+    if shard_count() == 1:
+        return None
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        # Token inválido: a própria rota responde com o erro adequado
+        return None
+    user_id = get_jwt_identity()
+    if user_id:
+        try:
+            use_user_shard(user_id)
+        except UserShardLocked:
+            return jsonify({'error': 'Conta em manutenção, tente novamente em instantes'}), 503
+    return None
 
 # Funções auxiliares
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif'}
+def store_profile_photo(image_bytes, filename=None):
+    """
+    Grava a foto na pasta de perfis com o hash SHA-256 do conteúdo como nome.
+    Conteúdos iguais reaproveitam o mesmo arquivo.
+    
+    Args:
+        image_bytes (bytes): Imagem JPEG
+        filename (str): Nome a usar no lugar do hash
+    
+    Returns:
+        str: Nome do arquivo, salvo em User.photo
+    """
+    filename = filename or f"{hashlib.sha256(image_bytes).hexdigest()}.jpg"
+    path = os.path.join(current_app.config['PROFILE_PHOTOS_FOLDER'], filename)
+    if not os.path.exists(path):
+        # A pasta é criada na primeira foto, e não ao iniciar a aplicação
+        os.makedirs(current_app.config['PROFILE_PHOTOS_FOLDER'], exist_ok=True)
+        # Escreve em arquivo temporário e renomeia, para nunca servir arquivo parcial
+        fd, tmp_path = tempfile.mkstemp(dir=current_app.config['PROFILE_PHOTOS_FOLDER'], suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(image_bytes)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    return filename
+
+def store_photo_variants(variants):
+    """
+    Grava as variantes como <hash>-<tamanho>.jpg, com o hash da variante
+    padrão (200px), e retorna o nome dela para User.photo
+    """
+    key = hashlib.sha256(variants[200]).hexdigest()
+    for size, image_bytes in variants.items():
+        store_profile_photo(image_bytes, f"{key}-{size}.jpg")
+    return f"{key}-200.jpg"
+
+# Pool de processos para fotos: decodificação e redimensionamento não ocupam
+# as threads que atendem as demais rotas
+_photo_executor = None
+_photo_executor_lock = threading.Lock()
+# Jobs enviados ao pool por este processo e ainda sem resultado gravado
+_pending_photo_jobs = set()
+
+def get_photo_executor():
+    """Cria o pool de processos de imagem na primeira utilização"""
+    global _photo_executor
+    with _photo_executor_lock:
+        if _photo_executor is None:
+            _photo_executor = ProcessPoolExecutor(
+                max_workers=current_app.config['PHOTO_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _photo_executor
+
+def reset_photo_executor():
+    """Descarta um pool quebrado (ex.: processo encerrado pelo sistema)"""
+    global _photo_executor
+    with _photo_executor_lock:
+        if _photo_executor is not None:
+            _photo_executor.shutdown(wait=False, cancel_futures=True)
+        _photo_executor = None
+
+def shutdown_photo_executor(timeout):
+    """
+    Espera, por até `timeout` segundos, os jobs deste processo gravarem o
+    resultado e encerra o pool. Os que não terminarem a tempo são marcados
+    como falhos, para não ficarem pendentes para sempre. Usado ao encerrar um
+    worker do modo pre-fork.
+    
+    Returns:
+        bool: True se todos os jobs terminaram
+    """
+    global _photo_executor
+    with _photo_executor_lock:
+        executor, _photo_executor = _photo_executor, None
+    if executor is not None:
+        # shutdown(wait=True) só retorna depois dos callbacks (finish_photo_job)
+        waiter = threading.Thread(target=executor.shutdown, kwargs={'wait': True}, daemon=True)
+        waiter.start()
+        waiter.join(max(0, timeout))
+    with _photo_executor_lock:
+        unfinished = list(_pending_photo_jobs)
+    if unfinished:
+        fail_pending_photo_jobs(unfinished, 'Servidor encerrado durante o processamento')
+    return not unfinished
+
+def fail_pending_photo_jobs(job_ids=None, error='Servidor reiniciado durante o processamento'):
+    """Marca como falhos os jobs pendentes (todos, ou só os de `job_ids`)"""
+    query = PhotoJob.query.filter_by(status='pending')
+    if job_ids is not None:
+        query = query.filter(PhotoJob.id.in_(job_ids))
+    query.update({
+        'status': 'failed',
+        'error': error,
+        'finished_at': datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
 
-def process_image(image_data):
-    """Processa e redimensiona imagem para foto de perfil"""
+def submit_photo_job(user_id, func, *args, cleanup_path=None):
+    """
+    Enfileira o processamento da foto no pool de processos.
+    
+    Args:
+        user_id (str): Dono da foto
+        func (callable): process_image ou process_image_file
+        cleanup_path (str): Arquivo temporário a remover ao final
+    
+    Returns:
+        PhotoJob: Job criado, ou None se a fila estiver cheia
+    """
+    # Vagas na fila de fotos, criadas por create_app
+    slots = current_app.extensions['photo_slots']
+    if not slots.acquire(blocking=False):
+        return None
+    
     try:
-        # Decodifica base64
-        if image_data.startswith('data:image'):
-            image_data = image_data.split(',')[1]
-        
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Redimensiona para 200x200
-        image = image.resize((200, 200), Image.Resampling.LANCZOS)
-        
-        # Converte para RGB se necessário
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Salva como base64
-        buffer = io.BytesIO()
-        image.save(buffer, format='JPEG', quality=85)
-        processed_image = base64.b64encode(buffer.getvalue()).decode()
-        
-        return f"data:image/jpeg;base64,{processed_image}"
+        # O commit também grava as demais alterações pendentes da requisição
+        job = PhotoJob(user_id=user_id)
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+        
+        try:
+            future = get_photo_executor().submit(timed_call, func, *args)
+        except BrokenProcessPool:
+            reset_photo_executor()
+            future = get_photo_executor().submit(timed_call, func, *args)
+    except Exception:
+        slots.release()
+        raise
+    
+    app = current_app._get_current_object()
+    submitted = time_module.perf_counter()
+    with _photo_executor_lock:
+        _pending_photo_jobs.add(job_id)
+    future.add_done_callback(
+        lambda done: finish_photo_job(app, job_id, user_id, done, cleanup_path, func.__name__, submitted)
+    )
+    return job
+
+def finish_photo_job(app, job_id, user_id, future, cleanup_path=None, operation=None, submitted=None):
+    """Grava o resultado do processamento (executado na thread do pool)"""
+    try:
+        with app.app_context():
+            job = db.session.get(PhotoJob, job_id)
+            try:
+                elapsed, processed_photo = future.result()
+                app.extensions['metrics'].image_duration.observe((operation,), elapsed)
+                if not processed_photo:
+                    raise ValueError('Imagem inválida')
+                
+                user = db.session.get(User, user_id)
+                use_user_shard(user_id)
+                if isinstance(processed_photo, dict):
+                    user.photo = store_photo_variants(processed_photo)
+                else:
+                    user.photo = store_profile_photo(processed_photo)
+                bump_user_version(user_id)
+                job.status = 'done'
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(PhotoJob, job_id)
+                job.status = 'failed'
+                job.error = str(e)[:255]
+            
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            if submitted is not None:
+                app.extensions['metrics'].photo_jobs.observe(
+                    (job.status,), time_module.perf_counter() - submitted
+                )
+            invalidate_user_identity(user_id)
+            publish_event(user_id, 'photo_job.updated', job.to_dict())
     except Exception as e:
-        print(f"Erro ao processar imagem: {e}")
-        return None
+        print(f"Erro ao finalizar processamento de foto {job_id}: {e}")
+    finally:
+        if cleanup_path and os.path.exists(cleanup_path):
+            os.unlink(cleanup_path)
+        with _photo_executor_lock:
+            _pending_photo_jobs.discard(job_id)
+        app.extensions['photo_slots'].release()
 
-def create_default_life_areas(user_id):
-    """Cria áreas da vida padrão para um novo usuário"""
-    default_areas = [
-        {'id': 'health', 'name': 'Saúde', 'color': '#10B981', 'icon': 'Heart'},
-        {'id': 'career', 'name': 'Carreira', 'color': '#3B82F6', 'icon': 'Briefcase'},
-        {'id': 'relationships', 'name': 'Relacionamentos', 'color': '#EC4899', 'icon': 'Users'},
-        {'id': 'finances', 'name': 'Finanças', 'color': '#F59E0B', 'icon': 'DollarSign'},
-        {'id': 'personal', 'name': 'Desenvolvimento Pessoal', 'color': '#8B5CF6', 'icon': 'BookOpen'},
-        {'id': 'leisure', 'name': 'Lazer', 'color': '#06B6D4', 'icon': 'Gamepad2'},
-        {'id': 'family', 'name': 'Família', 'color': '#EF4444', 'icon': 'Home'},
-        {'id': 'spirituality', 'name': 'Espiritualidade', 'color': '#84CC16', 'icon': 'Sun'},
-    ]
+# Group commit (GROUP_COMMIT_ENABLED): uma thread de escrita por shard, criada
+# na primeira escrita (no modo pre-fork, já dentro de cada worker)
+_group_commit_lock = threading.Lock()
+
+def get_group_commit_writer(shard):
+    """Thread de escrita do shard, com sessão própria no contexto da aplicação"""
+    writers = current_app.extensions['group_commit_writers']
+    with _group_commit_lock:
+        writer = writers.get(shard)
+        if writer is None:
+            app = current_app._get_current_object()
+            metrics = app.extensions['metrics']
+            labels = (str(shard),)
+            
+            @contextmanager
+            def shard_context():
+                with app.app_context():
+                    g.user_shard = shard
+                    yield
+            
+            def observe(size, elapsed):
+                metrics.group_commit_batch.observe(labels, size)
+                metrics.group_commit_duration.observe(labels, elapsed)
+            
+            writer = writers[shard] = GroupCommitWriter(
+                commit=db.session.commit,
+                rollback=db.session.rollback,
+                window=app.config['GROUP_COMMIT_WINDOW_MS'] / 1000,
+                max_batch=app.config['GROUP_COMMIT_MAX_BATCH'],
+                context=shard_context,
+                on_batch=observe,
+                name=f'group-commit-{shard}'
+            )
+        return writer
+
+def run_task_write(mutation):
+    """
+    Executa `mutation` (alterações de tarefas em db.session) e grava.
     
-    for area_data in default_areas:
-        area = LifeArea(
-            id=area_data['id'],
-            name=area_data['name'],
-            color=area_data['color'],
-            icon=area_data['icon'],
-            user_id=user_id
+    Com GROUP_COMMIT_ENABLED, a alteração roda na thread de escrita do shard do
+    usuário, no mesmo commit das alterações de outras requisições, e o retorno
+    só acontece depois desse commit. A função não deve usar objetos da sessão
+    da requisição.
+    
+    Args:
+        mutation (callable): Função sem argumentos que altera db.session
+    
+    Returns:
+        O retorno de `mutation`
+    """
+    if not current_app.config['GROUP_COMMIT_ENABLED']:
+        result = mutation()
+        db.session.commit()
+        return result
+    return get_group_commit_writer(g.get('user_shard', 0)).execute(mutation)
+
+def get_user_identity(user_id, version=None):
+    """
+    Projeção leve do usuário, lida do cache ou do banco (None se não existir).
+    
+    Args:
+        user_id (str): Id do usuário
+        version (int): Versão dos dados já lida nesta requisição (ex.: pelo
+            ETag). A entrada em cache só é usada se foi carregada nessa mesma
+            versão; com vários processos, a de outra versão pode estar velha.
+    """
+    cache = current_app.extensions['user_cache']
+    identity = cache.get(user_id)
+    if identity is None or (version is not None and identity.version != version):
+        generation = cache.generation()
+        row = db.session.query(*UserIdentity.columns()).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        identity = UserIdentity(*row, version=version)
+        # Não guarda a linha se o usuário foi alterado durante a leitura
+        cache.set(user_id, identity, generation)
+    return identity
+
+def invalidate_user_identity(user_id):
+    """Descarta a identidade em cache após alterações no usuário"""
+    current_app.extensions['user_cache'].invalidate(user_id)
+
+def publish_event(user_id, event_type, data):
+    """Envia um evento às conexões de GET /api/events do usuário (após o commit)"""
+    current_app.extensions['event_bus'].publish(user_id, event_type, current_app.json.dumps(data))
+
+def password_hasher_busy_response():
+    """Resposta para quando todas as vagas de hash de senha estão ocupadas"""
+    response = jsonify({'error': 'Muitos acessos simultâneos, tente novamente em instantes'})
+    response.headers['Retry-After'] = str(int(current_app.config['PASSWORD_HASH_QUEUE_TIMEOUT']) or 1)
+    return response, 503
+
+def parse_datetime(value):
+    """
+    Converte uma data ISO 8601 (aceitando sufixo Z) em datetime UTC sem fuso,
+    como as datas gravadas no banco: com fuso, a resposta de uma escrita sairia
+    diferente da mesma tarefa lida depois por GET, sync ou exportação
+    """
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def parse_bool(value):
+    """Converte parâmetros de query como 'true'/'false' em booleano"""
+    value = value.strip().lower()
+    if value in ('true', '1', 'yes'):
+        return True
+    if value in ('false', '0', 'no'):
+        return False
+    raise ValueError(f"Valor booleano inválido: {value}")
+
+def encode_cursor(created_at, task_id):
+    """Gera um cursor opaco a partir da chave (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Decodifica um cursor gerado por encode_cursor"""
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    created_at, task_id = raw.split('|', 1)
+    return datetime.fromisoformat(created_at), task_id
+
+def task_changes_from_data(data):
+    """Converte os campos enviados pelo cliente em colunas de Task a atualizar"""
+    changes = {}
+    for field in ('title', 'description', 'completed', 'priority', 'category'):
+        if data.get(field) is not None:
+            changes[field] = data[field]
+    if data.get('dueDate') is not None:
+        changes['due_date'] = parse_datetime(data['dueDate']) if data['dueDate'] else None
+    if data.get('recurrence') is not None:
+        changes['recurrence'] = recurrence_from_data(data['recurrence'])
+    return changes
+
+def new_task_row(data, user_id, now, keep_created_at=False):
+    """
+    Valida os dados enviados pelo cliente e monta a linha de uma nova tarefa,
+    para inserção em lote (executemany).
+    
+    Args:
+        data (dict): Campos da tarefa no formato da API
+        user_id (str): Dono da tarefa
+        now (datetime): Momento da gravação
+        keep_created_at (bool): Usa createdAt dos dados, quando houver (importação)
+    
+    Returns:
+        dict: Colunas da tarefa
+    
+    Raises:
+        ValueError: Dados inválidos
+    """
+    is_valid, error = validate_task_data(data)
+    if not is_valid:
+        raise ValueError(error)
+    created_at = now
+    if keep_created_at and data.get('createdAt'):
+        created_at = parse_datetime(data['createdAt'])
+    return {
+        'id': str(uuid.uuid4()),
+        'title': data['title'],
+        'description': data.get('description') or '',
+        'completed': bool(data.get('completed', False)),
+        'priority': data.get('priority') or 'medium',
+        'category': data.get('category') or 'pessoal',
+        'due_date': parse_datetime(data['dueDate']) if data.get('dueDate') else None,
+        'recurrence': recurrence_from_data(data.get('recurrence')),
+        'created_at': created_at,
+        'updated_at': now,
+        'user_id': user_id
+    }
+
+def delete_task_occurrences(user_id, task_ids):
+    """
+    Remove as ocorrências gravadas das tarefas (excluídas ou com nova regra/data)
+    e registra a exclusão de cada uma para a sincronização incremental
+    """
+    condition = (
+        TaskOccurrence.user_id == user_id,
+        TaskOccurrence.task_id.in_(task_ids)
+    )
+    db.session.execute(db.insert(TaskOccurrenceTombstone).from_select(
+        ['task_id', 'occurrence_date', 'user_id', 'deleted_at'],
+        db.select(
+            TaskOccurrence.task_id,
+            TaskOccurrence.occurrence_date,
+            TaskOccurrence.user_id,
+            db.literal(datetime.utcnow(), db.DateTime)
+        ).where(*condition)
+    ))
+    db.session.execute(db.delete(TaskOccurrence).where(*condition))
+
+def expand_task_occurrences(row, window_from, window_to, overrides):
+    """
+    Gera as ocorrências de uma tarefa recorrente no intervalo, já com as
+    alterações gravadas em task_occurrences.
+    
+    Args:
+        row: Linha de TASK_LIST_COLUMNS
+        window_from (datetime): Início do intervalo
+        window_to (datetime): Fim do intervalo
+        overrides (dict): Data prevista -> TaskOccurrence, desta tarefa
+    
+    Yields:
+        tuple: (data efetiva, item da agenda)
+    """
+    rule = RecurrenceRule.parse(row.recurrence)
+    start = row.due_date or row.created_at
+    base = task_serializer(row)
+    overrides = dict(overrides)
+    
+    def entry(occurrence, override):
+        due = override.due_date if override and override.due_date else occurrence
+        item = dict(base, occurrenceDate=occurrence.isoformat(), dueDate=due.isoformat(),
+                    completed=bool(override and override.completed))
+        return due, item
+    
+    for occurrence in iter_occurrences(rule, start, window_from, window_to):
+        override = overrides.pop(occurrence, None)
+        if override is None:
+            yield entry(occurrence, None)
+        elif not override.skipped and window_from <= (override.due_date or occurrence) <= window_to:
+            yield entry(occurrence, override)
+    
+    # Ocorrências de fora do intervalo remarcadas para dentro dele
+    for occurrence, override in overrides.items():
+        if (not override.skipped and override.due_date is not None
+                and window_from <= override.due_date <= window_to
+                and is_occurrence(rule, start, occurrence)):
+            yield entry(occurrence, override)
+
+def encode_sync_token(moment):
+    """Gera o token de sincronização a partir do instante da leitura"""
+    return base64.urlsafe_b64encode(moment.isoformat().encode()).decode()
+
+def decode_sync_token(token):
+    """Decodifica um token gerado por encode_sync_token"""
+    return datetime.fromisoformat(base64.urlsafe_b64decode(token.encode()).decode())
+
+def purge_task_tombstones():
+    """Remove registros de exclusão (tarefas e ocorrências) mais antigos que o período de retenção"""
+    horizon = datetime.utcnow() - current_app.config['SYNC_TOMBSTONE_RETENTION']
+    tables = [
+        shard_metadata.tables[model.__tablename__]
+        for model in (TaskTombstone, TaskOccurrenceTombstone)
+    ]
+    for index in range(shard_count()):
+        with shard_engine(index).begin() as conn:
+            for table in tables:
+                conn.execute(table.delete().where(table.c.deleted_at < horizon))
+
+def lock_user_writes(user_id):
+    """
+    Abre a transação de escrita do usuário antes de ler os valores que definem
+    os incrementos de UserStats. O pysqlite só inicia a transação no primeiro
+    comando de escrita; sem isso, a leitura acontece fora dela e duas
+    requisições simultâneas calculam o incremento sobre o mesmo valor antigo.
+    O UPDATE sem efeito toma a trava de escrita do banco do usuário sem alterar
+    a versão (uma tarefa inexistente não deve mudar o ETag).
+    """
+    db.session.execute(
+        db.update(UserVersion)
+        .where(UserVersion.user_id == user_id)
+        .values(version=UserVersion.version)
+    )
+
+def bump_user_version(user_id):
+    """Incrementa a versão dos dados do usuário dentro da transação atual"""
+    updated = db.session.execute(
+        db.update(UserVersion)
+        .where(UserVersion.user_id == user_id)
+        .values(version=UserVersion.version + 1)
+    ).rowcount
+    if updated:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(UserVersion(user_id=user_id, version=1))
+    except IntegrityError:
+        # Outra requisição criou a linha ao mesmo tempo
+        bump_user_version(user_id)
+
+def task_stats_contribution(completed, priority):
+    """Quanto uma tarefa soma em cada contador de UserStats"""
+    completed = bool(completed)
+    return {
+        'total_tasks': 1,
+        'completed_tasks': 1 if completed else 0,
+        'high_priority_open': 1 if priority == 'high' and not completed else 0
+    }
+
+def stats_delta(before=None, after=None):
+    """Diferença entre duas contribuições (None representa tarefa inexistente)"""
+    before = before or {}
+    after = after or {}
+    return {key: after.get(key, 0) - before.get(key, 0) for key in set(before) | set(after)}
+
+def adjust_user_stats(user_id, **deltas):
+    """
+    Aplica incrementos aos contadores do usuário na transação atual. A linha é
+    criada no cadastro (e pela migração, para usuários antigos); se ainda
+    assim faltar, nada é feito e ela é calculada por get_user_stats.
+    """
+    values = {
+        column: getattr(UserStats, column) + delta
+        for column, delta in deltas.items() if delta
+    }
+    if values:
+        db.session.execute(
+            db.update(UserStats).where(UserStats.user_id == user_id).values(**values)
         )
-        db.session.add(area)
+
+# Granularidades do histórico da Roda da Vida
+HISTORY_BUCKETS = ('day', 'week', 'month')
+
+def bucket_start(moment, bucket):
+    """Início do dia, da semana (segunda-feira) ou do mês que contém `moment`"""
+    start = datetime.combine(moment.date(), time.min)
+    if bucket == 'week':
+        return start - timedelta(days=start.weekday())
+    if bucket == 'month':
+        return start.replace(day=1)
+    return start
+
+def add_score_to_rollup(user_id, area_id, bucket, start, score):
+    """Soma uma pontuação ao agregado do período, criando-o se necessário"""
+    updated = db.session.execute(
+        db.update(LifeAreaScoreRollup)
+        .where(
+            LifeAreaScoreRollup.user_id == user_id,
+            LifeAreaScoreRollup.bucket == bucket,
+            LifeAreaScoreRollup.bucket_start == start,
+            LifeAreaScoreRollup.area_id == area_id
+        )
+        .values(
+            min_score=db.case(
+                (LifeAreaScoreRollup.min_score > score, score),
+                else_=LifeAreaScoreRollup.min_score
+            ),
+            max_score=db.case(
+                (LifeAreaScoreRollup.max_score < score, score),
+                else_=LifeAreaScoreRollup.max_score
+            ),
+            score_sum=LifeAreaScoreRollup.score_sum + score,
+            sample_count=LifeAreaScoreRollup.sample_count + 1
+        )
+    ).rowcount
+    if updated:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(LifeAreaScoreRollup(
+                user_id=user_id, area_id=area_id, bucket=bucket, bucket_start=start,
+                min_score=score, max_score=score, score_sum=score, sample_count=1
+            ))
+    except IntegrityError:
+        # Outra requisição criou o agregado ao mesmo tempo
+        add_score_to_rollup(user_id, area_id, bucket, start, score)
+
+def record_life_area_score(user_id, area_id, score, moment):
+    """
+    Registra a pontuação no histórico e nos agregados de cada granularidade,
+    na transação atual. O gráfico lê apenas os agregados.
+    """
+    db.session.add(LifeAreaScoreEvent(
+        user_id=user_id, area_id=area_id, score=score, recorded_at=moment
+    ))
+    for bucket in HISTORY_BUCKETS:
+        add_score_to_rollup(user_id, area_id, bucket, bucket_start(moment, bucket), score)
+
+def insert_user_stats(user_id):
+    """
+    Comando que calcula os contadores do usuário a partir das tarefas e das
+    áreas da vida e cria a linha de user_stats, se ela ainda não existir.
+    
+    Contagem e inserção são um único comando: no SQLite o bloqueio de escrita
+    é obtido antes da leitura, então nenhuma tarefa gravada ao mesmo tempo
+    fica de fora dos contadores e do incremento de adjust_user_stats.
+    """
+    task_count = db.select(db.func.count(Task.id)).where(Task.user_id == user_id)
+    life_score_sum = db.select(db.func.coalesce(db.func.sum(
+        db.func.coalesce(LifeAreaOverride.score, LifeAreaTemplate.default_score)
+    ), 0)).select_from(LifeAreaTemplate).outerjoin(
+        LifeAreaOverride,
+        db.and_(LifeAreaOverride.area_id == LifeAreaTemplate.id, LifeAreaOverride.user_id == user_id)
+    )
+    values = db.select(
+        db.literal(user_id),
+        task_count.scalar_subquery(),
+        task_count.where(Task.completed.is_(True)).scalar_subquery(),
+        task_count.where(Task.priority == 'high', Task.completed.is_(False)).scalar_subquery(),
+        life_score_sum.scalar_subquery(),
+        db.select(db.func.count(LifeAreaTemplate.id)).scalar_subquery()
+    ).where(~db.exists().where(UserStats.user_id == user_id))
+    return db.insert(UserStats).from_select(
+        ['user_id', 'total_tasks', 'completed_tasks', 'high_priority_open',
+         'life_score_sum', 'life_area_count'],
+        values
+    )
+
+def get_user_stats(user_id):
+    """Retorna os contadores do usuário, calculando-os se ainda não existirem"""
+    stats = db.session.get(UserStats, user_id)
+    if stats:
+        return stats
+    
+    try:
+        db.session.execute(insert_user_stats(user_id))
+        db.session.commit()
+    except IntegrityError:
+        # Outra requisição criou a linha ao mesmo tempo
+        db.session.rollback()
+    return db.session.get(UserStats, user_id)
+
+def user_ids_by_shard():
+    """Ids dos usuários de cada shard, em ordem de cadastro"""
+    placement = dict(db.session.query(UserShard.user_id, UserShard.shard).all())
+    users_by_shard = {index: [] for index in range(shard_count())}
+    for (user_id,) in db.session.query(User.id).order_by(User.created_at):
+        users_by_shard[placement.get(user_id, 0)].append(user_id)
+    return users_by_shard
+
+def rebuild_user_stats(recompute=False, user_ids=None, batch_size=500):
+    """
+    Cria a linha de user_stats dos usuários que não a têm ou, com `recompute`,
+    descarta os contadores e os recalcula do zero a partir das tarefas.
+    
+    Args:
+        recompute (bool): Recalcula também as linhas existentes
+        user_ids (list): Restringe a estes usuários
+        batch_size (int): Usuários por transação
+    
+    Returns:
+        int: Linhas criadas ou recalculadas
+    """
+    table = shard_metadata.tables[UserStats.__tablename__]
+    rebuilt = 0
+    for index, shard_user_ids in user_ids_by_shard().items():
+        if user_ids is not None:
+            shard_user_ids = [user_id for user_id in shard_user_ids if user_id in user_ids]
+        for start in range(0, len(shard_user_ids), batch_size):
+            batch = shard_user_ids[start:start + batch_size]
+            with shard_engine(index).begin() as conn:
+                if recompute:
+                    # A exclusão obtém o bloqueio de escrita antes das contagens
+                    conn.execute(table.delete().where(table.c.user_id.in_(batch)))
+                for user_id in batch:
+                    rebuilt += conn.execute(insert_user_stats(user_id)).rowcount
+    return rebuilt
+
+def user_life_areas_query(user_id):
+    """
+    Áreas da vida do usuário em uma única consulta: cada modelo com a pontuação
+    e a data da alteração do usuário, ou None onde ele manteve o padrão
+    (colunas de serializers.LIFE_AREA_LIST_COLUMNS)
+    """
+    return db.select(*LIFE_AREA_LIST_COLUMNS).outerjoin(
+        LifeAreaOverride,
+        db.and_(LifeAreaOverride.area_id == LifeAreaTemplate.id, LifeAreaOverride.user_id == user_id)
+    ).order_by(LifeAreaTemplate.position)
+
+def etag_by_user_version(suffix=None):
+    """
+    Decorator para rotas GET autenticadas: gera o ETag a partir da versão dos
+    dados do usuário e responde 304 sem executar a rota quando o cliente já
+    possui essa versão (If-None-Match).
+    
+    Args:
+        suffix (callable): Complemento do ETag para dados que mudam sem
+            escritas do usuário (ex.: a data atual nas estatísticas)
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            user_version = db.session.get(UserVersion, user_id)
+            g.user_version = user_version.version if user_version else 0
+            etag = f"{user_id}.{g.user_version}"
+            if suffix:
+                etag = f"{etag}.{suffix()}"
+            
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
 
 # Rotas de Autenticação
-@app.route('/api/auth/register', methods=['POST'])
+@api.route('/auth/register', methods=['POST'])
 def register():
     try:
         data = request.get_json()
@@ -177,13 +902,18 @@ def register():
             email=data['email'],
             name=data['name']
         )
-        user.set_password(data['password'])
+        try:
+            user.set_password(data['password'])
+        except PasswordHasherBusy:
+            return password_hasher_busy_response()
         
         db.session.add(user)
         db.session.commit()
         
-        # Cria áreas da vida padrão
-        create_default_life_areas(user.id)
+        # As áreas da vida seguem os modelos até o usuário alterar alguma
+        assign_user_shard(user.id)
+        # Contadores criados já no cadastro, para as escritas só os incrementarem
+        db.session.execute(insert_user_stats(user.id))
         db.session.commit()
         
         # Cria token JWT
@@ -199,7 +929,7 @@ def register():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/auth/login', methods=['POST'])
+@api.route('/auth/login', methods=['POST'])
 def login():
     try:
         data = request.get_json()
@@ -209,8 +939,17 @@ def login():
         
         user = User.query.filter_by(email=data['email']).first()
         
-        if not user or not user.check_password(data['password']):
-            return jsonify({'error': 'Email ou senha incorretos'}), 401
+        try:
+            if not user or not user.check_password(data['password']):
+                return jsonify({'error': 'Email ou senha incorretos'}), 401
+            
+            # Atualiza hashes gerados com parâmetros antigos enquanto a senha está disponível
+            if user.password_needs_rehash():
+                user.set_password(data['password'])
+                db.session.commit()
+        except PasswordHasherBusy:
+            db.session.rollback()
+            return password_hasher_busy_response()
         
         access_token = create_access_token(identity=user.id)
         
@@ -223,15 +962,19 @@ def login():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/auth/me', methods=['GET'])
+@api.route('/auth/me', methods=['GET'])
 @jwt_required()
+@etag_by_user_version()
 def get_current_user():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
+        # O cache só serve se foi carregado na versão que gerou o ETag: o deste
+        # processo pode ainda não ter visto uma alteração feita por outro worker
+        user = get_user_identity(get_jwt_identity(), version=g.user_version)
+        if user is None:
             return jsonify({'error': 'Usuário não encontrado'}), 404
+        if user.has_inline_photo:
+            # Foto ainda em base64 (ver migrate-photos): lê a linha completa
+            user = db.session.get(User, user.id)
         
         return jsonify({'user': user.to_dict()}), 200
         
@@ -239,12 +982,12 @@ def get_current_user():
         return jsonify({'error': str(e)}), 500
 
 # Rotas de Usuário
-@app.route('/api/users/profile', methods=['PUT'])
+@api.route('/users/profile', methods=['PUT'])
 @jwt_required()
 def update_profile():
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = db.session.get(User, user_id)
         
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
@@ -261,38 +1004,244 @@ def update_profile():
                 return jsonify({'error': 'Email já está em uso'}), 400
             user.email = data['email']
         
+        bump_user_version(user_id)
+        
+        # A foto é processada em segundo plano; o cliente acompanha pelo job
+        job = None
         if data.get('photo'):
-            processed_photo = process_image(data['photo'])
-            if processed_photo:
-                user.photo = processed_photo
+            job = submit_photo_job(user_id, process_image, data['photo'])
+            if not job:
+                db.session.rollback()
+                return jsonify({
+                    'error': 'Muitas fotos em processamento, tente novamente em instantes'
+                }), 503
         
         db.session.commit()
+        # Removida só após o commit, para outra requisição não recarregar os dados antigos
+        invalidate_user_identity(user_id)
         
-        return jsonify({
+        response = {
             'success': True,
             'user': user.to_dict()
-        }), 200
+        }
+        publish_event(user_id, 'profile.updated', response['user'])
+        if job:
+            response['photoJob'] = job.to_dict()
+            return jsonify(response), 202
+        
+        return jsonify(response), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@api.route('/users/profile/photo', methods=['POST'])
+@jwt_required()
+def upload_profile_photo():
+    """
+    Recebe a foto como multipart/form-data (campo `photo`). O corpo é gravado
+    em disco em blocos e as dimensões são conferidas pelo cabeçalho da imagem
+    antes de qualquer decodificação; as variantes são geradas em segundo plano.
+    """
+    tmp_path = None
+    try:
+        user_id = get_jwt_identity()
+        file = request.files.get('photo')
+        
+        if not file or not file.filename:
+            return jsonify({'error': 'Arquivo de foto é obrigatório'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Formato de imagem não suportado'}), 400
+        
+        fd, tmp_path = tempfile.mkstemp(suffix='.upload')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            file.save(tmp_file)
+        
+        # Apenas o cabeçalho; nada é decodificado aqui
+        header = read_image_header(tmp_path)
+        if header is None:
+            return jsonify({'error': 'Imagem inválida'}), 400
+        width, height, image_format = header
+        
+        if image_format not in ('JPEG', 'PNG', 'GIF'):
+            return jsonify({'error': 'Formato de imagem não suportado'}), 400
+        if width * height > current_app.config['PHOTO_MAX_PIXELS']:
+            return jsonify({
+                'error': f"Imagem muito grande (máximo de {current_app.config['PHOTO_MAX_PIXELS'] // 1_000_000} megapixels)"
+            }), 400
+        
+        job = submit_photo_job(
+            user_id,
+            process_image_file,
+            tmp_path,
+            current_app.config['PHOTO_VARIANT_SIZES'],
+            cleanup_path=tmp_path
+        )
+        if not job:
+            return jsonify({
+                'error': 'Muitas fotos em processamento, tente novamente em instantes'
+            }), 503
+        
+        # O arquivo temporário agora pertence ao job
+        tmp_path = None
+        return jsonify({
+            'success': True,
+            'photoJob': job.to_dict()
+        }), 202
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+@api.route('/users/profile/photo-jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_photo_job(job_id):
+    try:
+        user_id = get_jwt_identity()
+        job = PhotoJob.query.filter_by(id=job_id, user_id=user_id).first()
+        
+        if not job:
+            return jsonify({'error': 'Processamento não encontrado'}), 404
+        
+        response = {'photoJob': job.to_dict()}
+        if job.status == 'done':
+            response['user'] = db.session.get(User, user_id).to_dict()
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/photos/<filename>', methods=['GET'])
+def get_profile_photo(filename):
+    """Serve fotos de perfil; o nome é o hash do conteúdo, então nunca muda"""
+    response = send_from_directory(
+        current_app.config['PROFILE_PHOTOS_FOLDER'],
+        filename,
+        max_age=current_app.config['PHOTO_CACHE_MAX_AGE']
+    )
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['PHOTO_CACHE_MAX_AGE']}, immutable"
+    return response
+
 # Rotas de Tarefas
-@app.route('/api/tasks', methods=['GET'])
+@api.route('/tasks', methods=['GET'])
 @jwt_required()
+@etag_by_user_version()
 def get_tasks():
+    """
+    Lista tarefas paginadas por cursor sobre (created_at, id), da mais recente
+    para a mais antiga. Parâmetros opcionais: limit, cursor, completed,
+    priority, category, dueFrom e dueTo.
+    """
     try:
         user_id = get_jwt_identity()
-        tasks = Task.query.filter_by(user_id=user_id).order_by(Task.created_at.desc()).all()
+        args = request.args
+        
+        try:
+            limit = int(args.get('limit', current_app.config['TASKS_PAGE_SIZE']))
+        except ValueError:
+            return jsonify({'error': 'Parâmetro limit inválido'}), 400
+        limit = max(1, min(limit, current_app.config['TASKS_MAX_PAGE_SIZE']))
+        
+        # Apenas as colunas da resposta, lidas como tuplas (ver serializers.py)
+        query = db.select(*TASK_LIST_COLUMNS).filter(Task.user_id == user_id)
+        
+        try:
+            if args.get('completed') is not None:
+                query = query.filter(Task.completed == parse_bool(args['completed']))
+            if args.get('dueFrom'):
+                query = query.filter(Task.due_date >= parse_datetime(args['dueFrom']))
+            if args.get('dueTo'):
+                query = query.filter(Task.due_date <= parse_datetime(args['dueTo']))
+        except ValueError as e:
+            return jsonify({'error': f'Filtro inválido: {e}'}), 400
+        
+        if args.get('priority'):
+            query = query.filter(Task.priority == args['priority'])
+        if args.get('category'):
+            query = query.filter(Task.category == args['category'])
+        
+        if args.get('cursor'):
+            try:
+                cursor_created_at, cursor_id = decode_cursor(args['cursor'])
+            except (ValueError, UnicodeDecodeError):
+                return jsonify({'error': 'Cursor inválido'}), 400
+            query = query.filter(
+                db.tuple_(Task.created_at, Task.id) < (cursor_created_at, cursor_id)
+            )
+        
+        # Busca um item extra para saber se existe próxima página
+        rows = db.session.execute(
+            query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1)
+        ).all()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
         
         return jsonify({
-            'tasks': [task.to_dict() for task in tasks]
+            'tasks': task_serializer.many(rows),
+            'nextCursor': next_cursor
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/tasks', methods=['POST'])
+@api.route('/tasks/search', methods=['GET'])
+@jwt_required()
+@etag_by_user_version()
+def search_tasks():
+    """
+    Busca tarefas pelo título e pela descrição (parâmetro q). Cada palavra vale
+    como prefixo e todas precisam aparecer; os resultados vêm ordenados por
+    relevância (BM25) e paginados por limit e offset.
+    """
+    try:
+        user_id = get_jwt_identity()
+        args = request.args
+        terms = search_terms(args.get('q', ''))
+        if not terms:
+            return jsonify({'error': 'Parâmetro q é obrigatório'}), 400
+        
+        try:
+            limit = int(args.get('limit', current_app.config['TASKS_SEARCH_PAGE_SIZE']))
+            offset = max(0, int(args.get('offset', 0)))
+        except ValueError:
+            return jsonify({'error': 'Parâmetros limit e offset devem ser inteiros'}), 400
+        limit = max(1, min(limit, current_app.config['TASKS_SEARCH_MAX_PAGE_SIZE']))
+        
+        query = db.select(*TASK_LIST_COLUMNS).filter(Task.user_id == user_id)
+        if supports_task_search(db.session.get_bind(mapper=Task).dialect):
+            query = query.join(task_search, task_search_join).filter(
+                task_search_clause(terms, user_id)
+            ).order_by(task_search.c.rank, Task.created_at.desc())
+        else:
+            # Sem FTS5: cada palavra no título ou na descrição, mais recentes primeiro
+            for term in terms:
+                pattern = f'%{term}%'
+                query = query.filter(db.or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+            query = query.order_by(Task.created_at.desc(), Task.id.desc())
+        
+        rows = db.session.execute(query.limit(limit + 1).offset(offset)).all()
+        
+        next_offset = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_offset = offset + limit
+        
+        return jsonify({
+            'tasks': task_serializer.many(rows),
+            'nextOffset': next_offset
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/tasks', methods=['POST'])
 @jwt_required()
 def create_task():
     try:
@@ -311,151 +1260,746 @@ def create_task():
         )
         
         if data.get('dueDate'):
-            task.due_date = datetime.fromisoformat(data['dueDate'].replace('Z', '+00:00'))
+            task.due_date = parse_datetime(data['dueDate'])
+        try:
+            task.recurrence = recurrence_from_data(data.get('recurrence'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        db.session.add(task)
-        db.session.commit()
+        def create():
+            db.session.add(task)
+            adjust_user_stats(user_id, **task_stats_contribution(False, task.priority))
+            bump_user_version(user_id)
+            db.session.flush()
+            return task.to_dict()
+        
+        task_data = run_task_write(create)
+        publish_event(user_id, 'task.created', task_data)
         
         return jsonify({
             'success': True,
-            'task': task.to_dict()
+            'task': task_data
         }), 201
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/tasks/<task_id>', methods=['PUT'])
+@api.route('/tasks/<task_id>', methods=['PUT'])
 @jwt_required()
 def update_task(task_id):
     try:
         user_id = get_jwt_identity()
-        task = Task.query.filter_by(id=task_id, user_id=user_id).first()
-        
-        if not task:
-            return jsonify({'error': 'Tarefa não encontrada'}), 404
-        
         data = request.get_json()
         
-        if data.get('title') is not None:
-            task.title = data['title']
-        if data.get('description') is not None:
-            task.description = data['description']
-        if data.get('completed') is not None:
-            task.completed = data['completed']
-        if data.get('priority') is not None:
-            task.priority = data['priority']
-        if data.get('category') is not None:
-            task.category = data['category']
-        if data.get('dueDate') is not None:
-            if data['dueDate']:
-                task.due_date = datetime.fromisoformat(data['dueDate'].replace('Z', '+00:00'))
-            else:
-                task.due_date = None
-        
-        task.updated_at = datetime.utcnow()
-        db.session.commit()
+        try:
+            changes = task_changes_from_data(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        def update():
+            lock_user_writes(user_id)
+            task = Task.query.filter_by(id=task_id, user_id=user_id).first()
+            if not task:
+                return None
+            before = task_stats_contribution(task.completed, task.priority)
+            if 'recurrence' in changes or 'due_date' in changes:
+                # As ocorrências gravadas pertencem à regra anterior
+                delete_task_occurrences(user_id, [task.id])
+            for column, value in changes.items():
+                setattr(task, column, value)
+            
+            task.updated_at = datetime.utcnow()
+            adjust_user_stats(user_id, **stats_delta(
+                before, task_stats_contribution(task.completed, task.priority)
+            ))
+            bump_user_version(user_id)
+            return task.to_dict()
+        
+        task_data = run_task_write(update)
+        if task_data is None:
+            return jsonify({'error': 'Tarefa não encontrada'}), 404
+        publish_event(user_id, 'task.updated', task_data)
         
         return jsonify({
             'success': True,
-            'task': task.to_dict()
+            'task': task_data
         }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/tasks/<task_id>', methods=['DELETE'])
+@api.route('/tasks/<task_id>', methods=['DELETE'])
 @jwt_required()
 def delete_task(task_id):
+    try:
+        user_id = get_jwt_identity()
+        
+        def delete():
+            lock_user_writes(user_id)
+            task = Task.query.filter_by(id=task_id, user_id=user_id).first()
+            if not task:
+                return False
+            delete_task_occurrences(user_id, [task.id])
+            db.session.delete(task)
+            db.session.add(TaskTombstone(task_id=task.id, user_id=user_id))
+            adjust_user_stats(user_id, **stats_delta(
+                task_stats_contribution(task.completed, task.priority), None
+            ))
+            bump_user_version(user_id)
+            return True
+        
+        if not run_task_write(delete):
+            return jsonify({'error': 'Tarefa não encontrada'}), 404
+        publish_event(user_id, 'task.deleted', {'id': task_id})
+        
+        return jsonify({'success': True}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/tasks/<task_id>/occurrences/<occurrence>', methods=['PUT'])
+@jwt_required()
+def update_task_occurrence(task_id, occurrence):
+    """
+    Altera uma ocorrência de tarefa recorrente, identificada pela data prevista
+    pela regra (ISO 8601): completed, skipped e dueDate (remarcação; vazio
+    desfaz). Uma ocorrência sem alterações deixa de ser gravada.
+    """
     try:
         user_id = get_jwt_identity()
         task = Task.query.filter_by(id=task_id, user_id=user_id).first()
         
         if not task:
             return jsonify({'error': 'Tarefa não encontrada'}), 404
+        if not task.recurrence:
+            return jsonify({'error': 'Tarefa não é recorrente'}), 400
+        
+        try:
+            occurrence_date = parse_datetime(occurrence)
+        except ValueError:
+            return jsonify({'error': 'Data da ocorrência inválida'}), 400
+        rule = RecurrenceRule.parse(task.recurrence)
+        if not is_occurrence(rule, task.due_date or task.created_at, occurrence_date):
+            return jsonify({'error': 'Ocorrência não encontrada'}), 404
+        
+        data = request.get_json() or {}
+        entry = db.session.get(TaskOccurrence, (task_id, occurrence_date))
+        if entry is None:
+            entry = TaskOccurrence(
+                task_id=task_id, occurrence_date=occurrence_date, user_id=user_id,
+                completed=False, skipped=False
+            )
         
-        db.session.delete(task)
+        try:
+            if data.get('completed') is not None:
+                entry.completed = bool(data['completed'])
+            if data.get('skipped') is not None:
+                entry.skipped = bool(data['skipped'])
+            if 'dueDate' in data:
+                entry.due_date = parse_datetime(data['dueDate']) if data['dueDate'] else None
+        except ValueError as e:
+            return jsonify({'error': f'Data inválida: {e}'}), 400
+        
+        # Só as ocorrências alteradas ficam gravadas; as desfeitas viram
+        # registro de exclusão para a sincronização
+        if entry.completed or entry.skipped or entry.due_date:
+            db.session.add(entry)
+            db.session.execute(db.delete(TaskOccurrenceTombstone).where(
+                TaskOccurrenceTombstone.task_id == task_id,
+                TaskOccurrenceTombstone.occurrence_date == occurrence_date
+            ))
+        elif entry in db.session:
+            db.session.delete(entry)
+            db.session.add(TaskOccurrenceTombstone(
+                task_id=task_id, occurrence_date=occurrence_date, user_id=user_id
+            ))
+        bump_user_version(user_id)
         db.session.commit()
         
-        return jsonify({'success': True}), 200
+        occurrence_data = entry.to_dict()
+        publish_event(user_id, 'task_occurrence.updated', occurrence_data)
+        
+        return jsonify({
+            'success': True,
+            'occurrence': occurrence_data
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/agenda', methods=['GET'])
+@jwt_required()
+@etag_by_user_version(suffix=lambda: datetime.utcnow().date().isoformat())
+def get_agenda():
+    """
+    Tarefas com data no intervalo [from, to] (padrão: os próximos
+    AGENDA_DEFAULT_DAYS dias), em ordem de data. Tarefas recorrentes aparecem
+    uma vez por ocorrência, com occurrenceDate; as ocorrências são calculadas
+    apenas dentro do intervalo.
+    """
+    try:
+        user_id = get_jwt_identity()
+        args = request.args
+        
+        try:
+            start = parse_datetime(args['from']) if args.get('from') else (
+                datetime.combine(datetime.utcnow().date(), time.min)
+            )
+            end = parse_datetime(args['to']) if args.get('to') else (
+                start + timedelta(days=current_app.config['AGENDA_DEFAULT_DAYS'])
+            )
+        except ValueError as e:
+            return jsonify({'error': f'Intervalo inválido: {e}'}), 400
+        if start > end:
+            return jsonify({'error': 'Parâmetro from deve ser anterior a to'}), 400
+        if end - start > timedelta(days=current_app.config['AGENDA_MAX_DAYS']):
+            return jsonify({
+                'error': f"Intervalo máximo de {current_app.config['AGENDA_MAX_DAYS']} dias"
+            }), 400
+        
+        # Tarefas sem recorrência: uma entrada pela data de vencimento
+        single = db.session.execute(db.select(*TASK_LIST_COLUMNS).filter(
+            Task.user_id == user_id,
+            Task.recurrence.is_(None),
+            Task.due_date.between(start, end)
+        )).all()
+        entries = [
+            (row.due_date, dict(item, occurrenceDate=None))
+            for row, item in zip(single, task_serializer.many(single))
+        ]
+        
+        # Tarefas recorrentes já iniciadas e não encerradas (completed encerra a série)
+        recurring = db.session.execute(db.select(*TASK_LIST_COLUMNS).filter(
+            Task.user_id == user_id,
+            Task.recurrence.isnot(None),
+            Task.completed.isnot(True),
+            db.func.coalesce(Task.due_date, Task.created_at) <= end
+        )).all()
+        if recurring:
+            overrides = defaultdict(dict)
+            for override in TaskOccurrence.query.filter(
+                TaskOccurrence.user_id == user_id,
+                TaskOccurrence.task_id.in_([row.id for row in recurring]),
+                db.or_(
+                    TaskOccurrence.occurrence_date.between(start, end),
+                    TaskOccurrence.due_date.between(start, end)
+                )
+            ):
+                overrides[override.task_id][override.occurrence_date] = override
+            for row in recurring:
+                entries.extend(expand_task_occurrences(row, start, end, overrides.get(row.id, {})))
+        
+        entries.sort(key=lambda entry: entry[0])
+        
+        return jsonify({
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'items': [item for _, item in entries]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Formatos de exportação e importação: tipo de conteúdo de cada um
+TASK_EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+@api.route('/tasks/export', methods=['GET'])
+@jwt_required()
+def export_tasks():
+    """
+    Exporta todas as tarefas do usuário (format=ndjson, padrão, ou csv) em
+    fluxo: as linhas são lidas do banco em lotes de TASKS_EXPORT_BATCH_SIZE e
+    enviadas conforme ficam prontas, sem montar a resposta inteira em memória.
+    """
+    try:
+        user_id = get_jwt_identity()
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in TASK_EXPORT_FORMATS:
+            return jsonify({
+                'error': f"Formato deve ser um de: {', '.join(TASK_EXPORT_FORMATS)}"
+            }), 400
+        
+        query = db.select(*TASK_LIST_COLUMNS).filter(
+            Task.user_id == user_id
+        ).order_by(Task.created_at, Task.id).execution_options(
+            yield_per=current_app.config['TASKS_EXPORT_BATCH_SIZE']
+        )
+        
+        def generate():
+            result = db.session.execute(query)
+            if export_format == 'csv':
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(task_serializer.keys)
+            for rows in result.partitions():
+                items = task_serializer.many(rows)
+                if export_format == 'ndjson':
+                    yield ''.join(current_app.json.dumps(item) + '\n' for item in items)
+                else:
+                    # A regra de recorrência vai em uma célula, no formato RRULE
+                    writer.writerows(
+                        [row.recurrence if key == 'recurrence' else item[key] for key in task_serializer.keys]
+                        for item, row in zip(items, rows)
+                    )
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            if export_format == 'csv' and buffer.tell():
+                # Só o cabeçalho, quando não há tarefas
+                yield buffer.getvalue()
+        
+        response = current_app.response_class(
+            stream_with_context(generate()),
+            mimetype=TASK_EXPORT_FORMATS[export_format]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename=tasks.{export_format}'
+        return response
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def parse_import_records(lines, import_format):
+    """
+    Converte as linhas recebidas em dicionários no formato da API.
+    
+    Yields:
+        tuple: (número da linha, dados da tarefa ou None, erro ou None)
+    """
+    if import_format == 'ndjson':
+        for number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+                if not isinstance(data, dict):
+                    raise ValueError('Cada linha deve ser um objeto JSON')
+            except ValueError as e:
+                yield number, None, str(e)
+                continue
+            yield number, data, None
+        return
+    
+    reader = csv.DictReader(lines)
+    for data in reader:
+        # Células vazias equivalem a campos ausentes
+        data = {key: value for key, value in data.items() if key and value not in (None, '')}
+        try:
+            if 'completed' in data:
+                data['completed'] = parse_bool(data['completed'])
+        except ValueError as e:
+            yield reader.line_num, None, str(e)
+            continue
+        yield reader.line_num, data, None
+
+@api.route('/tasks/import', methods=['POST'])
+@jwt_required()
+def import_tasks():
+    """
+    Importa tarefas enviadas no corpo como NDJSON (padrão) ou CSV (format=csv ou
+    Content-Type text/csv), no formato de /api/tasks/export. O corpo é lido em
+    fluxo e as tarefas são gravadas em blocos de TASKS_IMPORT_CHUNK_SIZE, cada
+    um com seu commit; linhas inválidas são ignoradas e relatadas.
+    """
+    try:
+        user_id = get_jwt_identity()
+        import_format = request.args.get('format') or (
+            'csv' if request.mimetype == 'text/csv' else 'ndjson'
+        )
+        if import_format not in TASK_EXPORT_FORMATS:
+            return jsonify({
+                'error': f"Formato deve ser um de: {', '.join(TASK_EXPORT_FORMATS)}"
+            }), 400
+        
+        # Limite próprio: request.stream aplicaria o MAX_CONTENT_LENGTH geral
+        stream = get_input_stream(
+            request.environ,
+            max_content_length=current_app.config['TASKS_IMPORT_MAX_CONTENT_LENGTH']
+        )
+        chunk_size = current_app.config['TASKS_IMPORT_CHUNK_SIZE']
+        max_errors = 100
+        imported, skipped, errors = 0, 0, []
+        rows, stats_totals = [], Counter()
+        
+        def flush():
+            db.session.execute(db.insert(Task), rows)
+            adjust_user_stats(user_id, **stats_totals)
+            bump_user_version(user_id)
+            db.session.commit()
+            rows.clear()
+            stats_totals.clear()
+        
+        for number, data, error in parse_import_records(iter_stream_lines(stream), import_format):
+            if error is None:
+                try:
+                    row = new_task_row(data, user_id, datetime.utcnow(), keep_created_at=True)
+                except (ValueError, TypeError, AttributeError) as e:
+                    error = str(e)
+            if error is not None:
+                skipped += 1
+                if len(errors) < max_errors:
+                    errors.append({'line': number, 'error': error})
+                continue
+            
+            rows.append(row)
+            stats_totals.update(task_stats_contribution(row['completed'], row['priority']))
+            if len(rows) >= chunk_size:
+                imported += len(rows)
+                flush()
+        
+        if rows:
+            imported += len(rows)
+            flush()
+        if imported:
+            # Muitas tarefas: o cliente busca as alterações em /api/sync
+            publish_event(user_id, 'tasks.changed', {'imported': imported})
+        
+        return jsonify({
+            'success': skipped == 0,
+            'imported': imported,
+            'skipped': skipped,
+            'errors': errors
+        }), 200
+    
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@api.route('/tasks/batch', methods=['POST'])
+@jwt_required()
+def batch_tasks():
+    """
+    Executa várias operações de tarefas (create, update, delete) em uma única
+    transação. Cada operação recebe um resultado próprio; operações inválidas
+    são ignoradas sem impedir as demais.
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        operations = data.get('operations') if isinstance(data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            return jsonify({'error': 'Lista de operações é obrigatória'}), 400
+        if len(operations) > current_app.config['TASKS_BATCH_MAX_SIZE']:
+            return jsonify({
+                'error': f"Máximo de {current_app.config['TASKS_BATCH_MAX_SIZE']} operações por lote"
+            }), 400
+        
+        # Carrega apenas as colunas necessárias das tarefas referenciadas
+        referenced_ids = {
+            op['id'] for op in operations
+            if isinstance(op, dict) and op.get('op') in ('update', 'delete')
+            and isinstance(op.get('id'), str)
+        }
+        existing = {}
+        if referenced_ids:
+            lock_user_writes(user_id)
+            existing = {row.id: row for row in db.session.query(
+                Task.id, Task.title, Task.completed, Task.priority
+            ).filter(
+                Task.user_id == user_id,
+                Task.id.in_(referenced_ids)
+            )}
+        
+        now = datetime.utcnow()
+        results = []
+        inserts, updates, deletes = [], [], []
+        touched_ids = set()
+        stats_totals = Counter()
+        
+        for index, operation in enumerate(operations):
+            op = operation.get('op') if isinstance(operation, dict) else None
+            result = {'index': index, 'op': op}
+            results.append(result)
+            
+            try:
+                if op not in ('create', 'update', 'delete'):
+                    raise ValueError('Operação inválida')
+                payload = operation.get('data') or {}
+                
+                if op == 'create':
+                    row = new_task_row(payload, user_id, now)
+                    inserts.append(row)
+                    result['id'] = row['id']
+                    stats_totals.update(task_stats_contribution(row['completed'], row['priority']))
+                    continue
+                
+                task_id = operation.get('id')
+                if task_id not in existing:
+                    raise LookupError('Tarefa não encontrada')
+                if task_id in touched_ids:
+                    raise ValueError('Tarefa repetida no lote')
+                result['id'] = task_id
+                
+                if op == 'update':
+                    changes = task_changes_from_data(payload)
+                    is_valid, error = validate_task_data({
+                        'title': changes.get('title', existing[task_id].title),
+                        'priority': changes.get('priority')
+                    })
+                    if not is_valid:
+                        raise ValueError(error)
+                    current = existing[task_id]
+                    stats_totals.update(stats_delta(
+                        task_stats_contribution(current.completed, current.priority),
+                        task_stats_contribution(
+                            changes.get('completed', current.completed),
+                            changes.get('priority', current.priority)
+                        )
+                    ))
+                    changes['id'] = task_id
+                    changes['updated_at'] = now
+                    updates.append(changes)
+                else:
+                    current = existing[task_id]
+                    stats_totals.update(stats_delta(
+                        task_stats_contribution(current.completed, current.priority), None
+                    ))
+                    deletes.append(task_id)
+                touched_ids.add(task_id)
+                
+            except (ValueError, TypeError, AttributeError, LookupError) as e:
+                result['success'] = False
+                result['error'] = str(e)
+        
+        # Uma instrução por tipo de operação (executemany) e um único commit
+        if inserts:
+            db.session.execute(db.insert(Task), inserts)
+        rescheduled = [
+            row['id'] for row in updates if 'recurrence' in row or 'due_date' in row
+        ]
+        if rescheduled or deletes:
+            delete_task_occurrences(user_id, rescheduled + deletes)
+        if updates:
+            db.session.execute(db.update(Task), updates)
+        if deletes:
+            db.session.execute(
+                db.delete(Task).where(Task.user_id == user_id, Task.id.in_(deletes))
+            )
+            db.session.execute(db.insert(TaskTombstone), [
+                {'task_id': task_id, 'user_id': user_id, 'deleted_at': now}
+                for task_id in deletes
+            ])
+        adjust_user_stats(user_id, **stats_totals)
+        bump_user_version(user_id)
+        db.session.commit()
+        
+        written_ids = [row['id'] for row in inserts] + [row['id'] for row in updates]
+        tasks = {}
+        if written_ids:
+            tasks = {
+                task.id: task.to_dict()
+                for task in Task.query.filter(Task.id.in_(written_ids)).all()
+            }
+        
+        for result in results:
+            if 'error' in result:
+                continue
+            result['success'] = True
+            if result['op'] != 'delete':
+                result['task'] = tasks.get(result['id'])
+        
+        if written_ids or deletes:
+            publish_event(user_id, 'tasks.changed', {
+                'created': [row['id'] for row in inserts],
+                'updated': [row['id'] for row in updates],
+                'deleted': deletes
+            })
+        
+        return jsonify({
+            'success': all(result['success'] for result in results),
+            'results': results
+        }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # Rotas da Roda da Vida
-@app.route('/api/life-areas', methods=['GET'])
+@api.route('/life-areas', methods=['GET'])
 @jwt_required()
+@etag_by_user_version()
 def get_life_areas():
     try:
         user_id = get_jwt_identity()
-        areas = LifeArea.query.filter_by(user_id=user_id).all()
+        # Áreas nunca alteradas contam como atualizadas no cadastro
+        rows = db.session.execute(user_life_areas_query(user_id)).all()
         
         return jsonify({
-            'lifeAreas': [area.to_dict() for area in areas]
+            'lifeAreas': serialize_life_area_rows(rows, user_id, current_user.created_at)
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/life-areas/<area_id>', methods=['PUT'])
+@api.route('/life-areas/<area_id>', methods=['PUT'])
 @jwt_required()
 def update_life_area(area_id):
     try:
         user_id = get_jwt_identity()
-        area = LifeArea.query.filter_by(id=area_id, user_id=user_id).first()
+        template = db.session.get(LifeAreaTemplate, area_id)
         
-        if not area:
+        if not template:
             return jsonify({'error': 'Área da vida não encontrada'}), 404
         
+        lock_user_writes(user_id)
+        override = db.session.get(LifeAreaOverride, (user_id, area_id))
         data = request.get_json()
         
         if data.get('score') is not None:
             score = int(data['score'])
             if 1 <= score <= 10:
-                area.score = score
-                area.last_updated = datetime.utcnow()
+                current = override.score if override else template.default_score
+                adjust_user_stats(user_id, life_score_sum=score - current)
+                # Só as áreas alteradas ganham linha própria
+                if not override:
+                    override = LifeAreaOverride(user_id=user_id, area_id=area_id)
+                    db.session.add(override)
+                override.score = score
+                override.last_updated = datetime.utcnow()
+                record_life_area_score(user_id, area_id, score, override.last_updated)
             else:
                 return jsonify({'error': 'Pontuação deve estar entre 1 e 10'}), 400
         
+        bump_user_version(user_id)
         db.session.commit()
         
+        if override:
+            area = template.to_dict(user_id, override.score, override.last_updated)
+        else:
+            area = template.to_dict(user_id, last_updated=current_user.created_at)
+        publish_event(user_id, 'life_area.updated', area)
+        
         return jsonify({
             'success': True,
-            'lifeArea': area.to_dict()
+            'lifeArea': area
         }), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@api.route('/life-areas/history', methods=['GET'])
+@jwt_required()
+@etag_by_user_version(suffix=lambda: datetime.utcnow().date().isoformat())
+def get_life_area_history():
+    """
+    Evolução das pontuações por período, lida dos agregados (mínimo, máximo e
+    média por área). Parâmetros opcionais: from, to e bucket (day, week ou
+    month; padrão day).
+    """
+    try:
+        user_id = get_jwt_identity()
+        args = request.args
+        
+        bucket = args.get('bucket', 'day')
+        if bucket not in HISTORY_BUCKETS:
+            return jsonify({
+                'error': f"Parâmetro bucket deve ser um de: {', '.join(HISTORY_BUCKETS)}"
+            }), 400
+        
+        try:
+            end = parse_datetime(args['to']) if args.get('to') else datetime.utcnow()
+            start = parse_datetime(args['from']) if args.get('from') else (
+                end - timedelta(days=current_app.config['LIFE_AREA_HISTORY_DEFAULT_DAYS'])
+            )
+        except ValueError as e:
+            return jsonify({'error': f'Intervalo inválido: {e}'}), 400
+        if start > end:
+            return jsonify({'error': 'Parâmetro from deve ser anterior a to'}), 400
+        
+        rollups = LifeAreaScoreRollup.query.filter(
+            LifeAreaScoreRollup.user_id == user_id,
+            LifeAreaScoreRollup.bucket == bucket,
+            LifeAreaScoreRollup.bucket_start >= bucket_start(start, bucket),
+            LifeAreaScoreRollup.bucket_start <= end
+        ).order_by(LifeAreaScoreRollup.bucket_start).all()
+        
+        series = {}
+        for rollup in rollups:
+            series.setdefault(rollup.area_id, []).append(rollup.to_dict())
+        
+        return jsonify({
+            'bucket': bucket,
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'series': series
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Rotas de Eventos
+@api.route('/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    """
+    Fluxo SSE (text/event-stream) com as alterações dos dados do usuário feitas
+    em outras requisições. O token também pode ir em ?jwt=, pois o EventSource
+    do navegador não envia cabeçalhos. Uma reconexão com Last-Event-ID (ou
+    ?lastEventId=) recebe os eventos perdidos; se não for possível, o evento
+    `reset` pede uma nova sincronização.
+    """
+    user_id = get_jwt_identity()
+    bus = current_app.extensions['event_bus']
+    heartbeat = current_app.config['EVENTS_HEARTBEAT_SECONDS']
+    retry = current_app.config['EVENTS_RETRY_MS']
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    subscription = bus.subscribe(user_id, last_event_id)
+    
+    # Sem stream_with_context: o contexto da requisição (e a conexão com o
+    # banco) é liberado ao retornar, e não fica preso enquanto o fluxo durar
+    def generate():
+        try:
+            yield f"retry: {retry}\n\n"
+            while not subscription.closed:
+                events = subscription.wait(heartbeat)
+                chunks = []
+                if subscription.take_reset():
+                    chunks.append('event: reset\ndata: {}\n\n')
+                for event in events:
+                    chunks.append(f'id: {event.id}\nevent: {event.type}\ndata: {event.data}\n\n')
+                # Comentário a cada intervalo sem eventos: mantém a conexão
+                # aberta nos proxies e revela clientes desconectados
+                yield ''.join(chunks) or ': heartbeat\n\n'
+        finally:
+            bus.unsubscribe(subscription)
+    
+    response = current_app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 # Rotas de Estatísticas
-@app.route('/api/stats', methods=['GET'])
+@api.route('/stats', methods=['GET'])
 @jwt_required()
+@etag_by_user_version(suffix=lambda: datetime.now().date().isoformat())
 def get_stats():
     try:
         user_id = get_jwt_identity()
         
-        # Estatísticas de tarefas
-        total_tasks = Task.query.filter_by(user_id=user_id).count()
-        completed_tasks = Task.query.filter_by(user_id=user_id, completed=True).count()
+        # Contadores agregados (uma leitura por chave primária)
+        stats = get_user_stats(user_id)
         
-        today = datetime.now().date()
+        # Intervalo do dia atual, para usar o índice (user_id, due_date)
+        start_of_today = datetime.combine(datetime.now().date(), time.min)
         today_tasks = Task.query.filter(
             Task.user_id == user_id,
-            db.func.date(Task.due_date) == today
-        ).count()
-        
-        high_priority_tasks = Task.query.filter_by(
-            user_id=user_id, 
-            priority='high', 
-            completed=False
+            Task.due_date >= start_of_today,
+            Task.due_date < start_of_today + timedelta(days=1)
         ).count()
         
-        # Estatísticas da roda da vida
-        life_areas = LifeArea.query.filter_by(user_id=user_id).all()
-        avg_life_score = sum(area.score for area in life_areas) / len(life_areas) if life_areas else 0
+        total_tasks = stats.total_tasks
+        completed_tasks = stats.completed_tasks
+        avg_life_score = stats.life_score_sum / stats.life_area_count if stats.life_area_count else 0
         
         return jsonify({
             'stats': {
@@ -463,7 +2007,7 @@ def get_stats():
                 'completedTasks': completed_tasks,
                 'completionRate': round((completed_tasks / total_tasks * 100) if total_tasks > 0 else 0),
                 'todayTasks': today_tasks,
-                'highPriorityTasks': high_priority_tasks,
+                'highPriorityTasks': stats.high_priority_open,
                 'averageLifeScore': round(avg_life_score, 1)
             }
         }), 200
@@ -471,8 +2015,77 @@ def get_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Rota de Sincronização
+@api.route('/sync', methods=['GET'])
+@jwt_required()
+def sync():
+    """
+    Retorna apenas o que mudou desde o token informado em `since`: tarefas
+    criadas ou alteradas, ids de tarefas excluídas, ocorrências de tarefas
+    recorrentes gravadas ou desfeitas e áreas da vida atualizadas.
+    Sem token, ou com token anterior ao período de retenção, responde com
+    `full: true` e o cliente deve recarregar os dados completos.
+    """
+    try:
+        user_id = get_jwt_identity()
+        now = datetime.utcnow()
+        token = encode_sync_token(now)
+        
+        since = None
+        if request.args.get('since'):
+            try:
+                since = decode_sync_token(request.args['since'])
+            except (ValueError, UnicodeDecodeError):
+                return jsonify({'error': 'Token de sincronização inválido'}), 400
+        
+        if since is None or since < now - current_app.config['SYNC_TOMBSTONE_RETENTION']:
+            return jsonify({'full': True, 'token': token}), 200
+        
+        # Margem para escritas com timestamp anterior que ainda não tinham sido
+        # confirmadas na sincronização anterior; o cliente deduplica por id
+        since = since - current_app.config['SYNC_CLOCK_SKEW']
+        
+        tasks = Task.query.filter(
+            Task.user_id == user_id,
+            Task.updated_at >= since
+        ).all()
+        deleted_ids = [row.task_id for row in db.session.query(TaskTombstone.task_id).filter(
+            TaskTombstone.user_id == user_id,
+            TaskTombstone.deleted_at >= since
+        )]
+        occurrences = TaskOccurrence.query.filter(
+            TaskOccurrence.user_id == user_id,
+            TaskOccurrence.updated_at >= since
+        ).all()
+        deleted_occurrences = TaskOccurrenceTombstone.query.filter(
+            TaskOccurrenceTombstone.user_id == user_id,
+            TaskOccurrenceTombstone.deleted_at >= since
+        ).all()
+        areas = db.session.query(
+            LifeAreaTemplate, LifeAreaOverride.score, LifeAreaOverride.last_updated
+        ).join(LifeAreaOverride, LifeAreaOverride.area_id == LifeAreaTemplate.id).filter(
+            LifeAreaOverride.user_id == user_id,
+            LifeAreaOverride.last_updated >= since
+        ).all()
+        
+        return jsonify({
+            'full': False,
+            'token': token,
+            'tasks': [task.to_dict() for task in tasks],
+            'deletedTaskIds': deleted_ids,
+            'occurrences': [occurrence.to_dict() for occurrence in occurrences],
+            'deletedOccurrences': [occurrence.to_dict() for occurrence in deleted_occurrences],
+            'lifeAreas': [
+                template.to_dict(user_id, score, last_updated)
+                for template, score, last_updated in areas
+            ]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Rota de saúde da API
-@app.route('/api/health', methods=['GET'])
+@api.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'healthy',
@@ -480,16 +2093,39 @@ def health_check():
         'version': '1.0.0'
     }), 200
 
+@api.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Métricas do processo para o Prometheus. Com METRICS_TOKEN definido, exige
+    o cabeçalho Authorization: Bearer <token>.
+    """
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return jsonify({'error': 'Não autorizado'}), 401
+    
+    return current_app.response_class(
+        current_app.extensions['metrics'].render(),
+        mimetype='text/plain; version=0.0.4'
+    )
+
 # Tratamento de erros
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint não encontrado'}), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Erro interno do servidor'}), 500
 
+@jwt.user_lookup_loader
+def user_lookup_callback(jwt_header, jwt_payload):
+    return get_user_identity(jwt_payload[current_app.config['JWT_IDENTITY_CLAIM']])
+
+@jwt.user_lookup_error_loader
+def user_lookup_error_callback(jwt_header, jwt_payload):
+    return jsonify({'error': 'Usuário não encontrado'}), 401
+
 @jwt.expired_token_loader
 def expired_token_callback(jwt_header, jwt_payload):
     return jsonify({'error': 'Token expirado'}), 401
@@ -502,11 +2138,160 @@ def invalid_token_callback(error):
 def missing_token_callback(error):
     return jsonify({'error': 'Token de acesso necessário'}), 401
 
+# Migração das fotos em base64 para arquivos
+def migrate_inline_photos(batch_size=100):
+    """
+    Extrai fotos salvas como data URL na tabela de usuários para a pasta de
+    perfis, substituindo o valor da coluna pelo nome do arquivo.
+    
+    Returns:
+        int: Quantidade de fotos migradas
+    """
+    migrated = 0
+    while True:
+        users = User.query.filter(User.photo.like('data:%')).limit(batch_size).all()
+        if not users:
+            return migrated
+        
+        for user in users:
+            try:
+                image_bytes = base64.b64decode(user.photo.split(',', 1)[1])
+            except (IndexError, ValueError):
+                print(f"Foto inválida ignorada para o usuário {user.id}")
+                user.photo = None
+            else:
+                # As fotos já foram processadas no upload; só mudam de lugar
+                user.photo = store_profile_photo(image_bytes)
+                migrated += 1
+            use_user_shard(user.id)
+            bump_user_version(user.id)
+        
+        db.session.commit()
+        for user in users:
+            invalidate_user_identity(user.id)
+
+def migrate_all_databases(force=False):
+    """
+    Leva o banco principal e os shards ao esquema de models.py, sem perder
+    dados (ver migrations.migrate_schema). Bancos que já registram a
+    SCHEMA_VERSION atual são pulados sem inspecionar o esquema.
+    
+    Args:
+        force (bool): Verifica todas as tabelas, colunas e índices mesmo assim
+    
+    Returns:
+        list: Alterações aplicadas, prefixadas pelo shard
+    """
+    changes = []
+    migrated = False
+    for index in range(shard_count()):
+        engine = shard_engine(index)
+        if not force and schema_is_current(engine):
+            continue
+        migrated = True
+        changes.extend(
+            f"shard {index}: {change}"
+            for change in migrate_schema(engine, db.metadata if index == 0 else shard_metadata)
+        )
+    if migrated:
+        # Usuários de antes das estatísticas agregadas ganham seus contadores
+        created = rebuild_user_stats()
+        if created:
+            changes.append(f"user_stats: {created} usuário(s) com contadores criados")
+    return changes
+
+@click.command('migrate-db')
+@with_appcontext
+def migrate_db_command():
+    """Cria tabelas, colunas e índices que faltam em um banco existente"""
+    changes = migrate_all_databases(force=True)
+    for change in changes:
+        print(f"  {change}")
+    print(f"✅ {len(changes)} alteração(ões) aplicada(s)")
+
+@click.command('recompute-stats')
+@with_appcontext
+@click.option('--user', 'user_ids', multiple=True, help='Recalcula apenas este usuário (pode repetir)')
+def recompute_stats_command(user_ids):
+    """Recalcula do zero os contadores de user_stats a partir das tarefas"""
+    rebuilt = rebuild_user_stats(recompute=True, user_ids=set(user_ids) or None)
+    print(f"✅ Contadores de {rebuilt} usuário(s) recalculados")
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Reconstrói o índice de busca das tarefas em todos os shards"""
+    for index in range(shard_count()):
+        engine = shard_engine(index)
+        if not supports_task_search(engine.dialect):
+            continue
+        with engine.begin() as conn:
+            rebuild_task_search_index(conn)
+        print(f"✅ Índice de busca do shard {index} reconstruído")
+
+@click.command('migrate-photos')
+@with_appcontext
+def migrate_photos_command():
+    """Move fotos de perfil em base64 do banco para arquivos"""
+    migrated = migrate_inline_photos()
+    print(f"✅ {migrated} foto(s) migrada(s) para {current_app.config['PROFILE_PHOTOS_FOLDER']}")
+
+@click.command('rebalance-shards')
+@with_appcontext
+@click.option('--user', 'user_id', help='Move apenas este usuário')
+@click.option('--to', 'target', type=int, help='Shard de destino (com --user)')
+@click.option('--dry-run', is_flag=True, help='Apenas mostra o que seria movido')
+def rebalance_shards_command(user_id, target, dry_run):
+    """Move usuários entre shards até equilibrar a quantidade em cada um"""
+    if user_id is not None:
+        if target is None or not 0 <= target < shard_count():
+            raise click.BadParameter(f'Informe --to entre 0 e {shard_count() - 1}')
+        moves = [(user_id, target)]
+    else:
+        users_by_shard = user_ids_by_shard()
+        
+        # Move do shard mais cheio para o mais vazio até a diferença ser <= 1
+        moves = []
+        while True:
+            fullest = max(users_by_shard, key=lambda index: len(users_by_shard[index]))
+            emptiest = min(users_by_shard, key=lambda index: len(users_by_shard[index]))
+            if len(users_by_shard[fullest]) - len(users_by_shard[emptiest]) <= 1:
+                break
+            uid = users_by_shard[fullest].pop()
+            users_by_shard[emptiest].append(uid)
+            moves.append((uid, emptiest))
+    
+    for uid, destination in moves:
+        if dry_run:
+            print(f"{uid} -> shard {destination}")
+        elif move_user_to_shard(uid, destination):
+            print(f"✅ {uid} movido para o shard {destination}")
+    print(f"{len(moves)} usuário(s) {'a mover' if dry_run else 'movido(s)'}")
+
 # Inicialização do banco de dados
-def init_db():
-    """Inicializa o banco de dados com dados de demonstração"""
-    db.create_all()
+def init_db(cold_start=True):
+    """
+    Prepara o banco ao iniciar o servidor: migra o esquema se a versão
+    registrada for antiga e, com SEED_DEMO_DATA, cria o usuário demo
+    
+    Args:
+        cold_start (bool): Nenhum processo do servidor está em execução. Na
+            recarga do modo pre-fork (False), os workers da geração anterior
+            ainda atendem e seus jobs de foto continuam válidos
+    """
+    # Bancos criados por versões anteriores ganham as tabelas e índices novos
+    migrate_all_databases()
+    purge_task_tombstones()
+    
+    # Jobs de foto pendentes não sobrevivem a um reinício do servidor
+    if cold_start:
+        fail_pending_photo_jobs()
     
+    if current_app.config['SEED_DEMO_DATA']:
+        seed_demo_data()
+
+def seed_demo_data():
+    """Cria o usuário demo e tarefas de exemplo, se ainda não existirem"""
     # Verifica se já existe usuário demo
     demo_user = User.query.filter_by(email='demo@precrastine.com').first()
     if not demo_user:
@@ -520,8 +2305,8 @@ def init_db():
         db.session.add(demo_user)
         db.session.commit()
         
-        # Cria áreas da vida para o usuário demo
-        create_default_life_areas(demo_user.id)
+        assign_user_shard(demo_user.id)
+        db.session.execute(insert_user_stats(demo_user.id))
         
         # Cria algumas tarefas de exemplo
         sample_tasks = [
@@ -558,10 +2343,83 @@ def init_db():
                 task.due_date = task_data['due_date']
             
             db.session.add(task)
+            adjust_user_stats(demo_user.id, **task_stats_contribution(False, task.priority))
         
         db.session.commit()
         print("✅ Banco de dados inicializado com dados de demonstração")
 
+def create_app(config_name=None, overrides=None):
+    """
+    Cria a aplicação com o perfil de config.py indicado (por padrão, o de
+    FLASK_ENV; production ativa WAL e o pool ajustado)
+    
+    Args:
+        config_name (str): development, production ou default
+        overrides (dict): Valores que substituem os do perfil (ex.: os bancos
+            temporários dos testes)
+    
+    Returns:
+        Flask: Aplicação configurada
+    """
+    config_name = config_name or os.environ.get('FLASK_ENV') or 'default'
+    config_class = config.get(config_name, config['default'])
+    
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    app.config.update(overrides or {})
+    config_class.init_app(app)
+    
+    # Shards adicionais para os dados dos usuários; o banco principal é o shard 0
+    app.config['SQLALCHEMY_BINDS'] = {
+        f'shard{index}': uri
+        for index, uri in enumerate(app.config['SHARD_DATABASE_URIS'], start=1)
+    }
+    
+    # Pasta das fotos (caminhos relativos partem da pasta da aplicação), criada
+    # por store_profile_photo na primeira gravação
+    app.config['PROFILE_PHOTOS_FOLDER'] = os.path.join(
+        app.root_path, app.config['UPLOAD_FOLDER'], 'profiles'
+    )
+    app.extensions['photo_slots'] = threading.BoundedSemaphore(
+        app.config['PHOTO_MAX_PENDING_JOBS']
+    )
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+    )
+    app.extensions['user_cache'] = LRUCache(
+        max_entries=app.config['USER_CACHE_MAX_ENTRIES'],
+        ttl=app.config['USER_CACHE_TTL'],
+        max_bytes=app.config['USER_CACHE_MAX_BYTES']
+    )
+    app.extensions['metrics'] = Metrics()
+    app.extensions['group_commit_writers'] = {}
+    app.extensions['event_bus'] = EventBus(
+        buffer_size=app.config['EVENTS_SUBSCRIBER_BUFFER'],
+        replay_size=app.config['EVENTS_REPLAY_SIZE'],
+        replay_users=app.config['EVENTS_REPLAY_USERS']
+    )
+    
+    db.init_app(app)
+    jwt.init_app(app)
+    CORS(app)
+    app.register_blueprint(api)
+    # O tempo de serialização de cada requisição vai para o Server-Timing
+    app.json = timed_json_provider(
+        FastJSONProvider if app.config['JSON_FAST_ENCODER'] else DefaultJSONProvider
+    )(app)
+    
+    app.cli.add_command(migrate_db_command)
+    app.cli.add_command(migrate_photos_command)
+    app.cli.add_command(rebalance_shards_command)
+    app.cli.add_command(recompute_stats_command)
+    app.cli.add_command(rebuild_search_index_command)
+    return app
+
+app = create_app()
+
 if __name__ == '__main__':
     with app.app_context():
         init_db()
@@ -569,6 +2427,7 @@ if __name__ == '__main__':
     print("🚀 Servidor Precrastine-se iniciado!")
     print("📊 API disponível em: http://localhost:5000/api")
     print("🔍 Health check: http://localhost:5000/api/health")
-    print("👤 Usuário demo: demo@precrastine.com / demo123")
+    if app.config['SEED_DEMO_DATA']:
+        print("👤 Usuário demo: demo@precrastine.com / demo123")
     
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1 @@
+"""Benchmarks do backend; cada módulo é executado com `python -m benchmarks.<nome>`"""
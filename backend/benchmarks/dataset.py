@@ -0,0 +1,206 @@
+"""
+Gera usuários, tarefas e áreas da vida sintéticos direto no banco (sem passar
+pela API), para os testes de carga de benchmarks/load.py. Usa o mesmo
+DATABASE_URL e SHARD_DATABASE_URLS do servidor; cada usuário vai para o shard
+que o cadastro escolheria.
+
+Os usuários recebem os emails <prefixo><n>@bench.precrastine.com e a mesma
+senha. Uma nova execução acrescenta usuários depois dos já existentes.
+
+Uso (na pasta backend):
+    python -m benchmarks.dataset --users 100 --tasks-per-user 1000
+    DATABASE_URL=sqlite:////tmp/bench.db python -m benchmarks.dataset --users 1000 --tasks-per-user 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+EMAIL_DOMAIN = 'bench.precrastine.com'
+
+WORDS = (
+    'relatório', 'reunião', 'estudar', 'python', 'academia', 'mercado', 'orçamento',
+    'projeto', 'revisar', 'ligar', 'médico', 'viagem', 'leitura', 'planejar', 'enviar',
+    'contas', 'família', 'curso', 'apresentação', 'limpeza', 'corrida', 'investimentos'
+)
+CATEGORIES = ('pessoal', 'trabalho', 'estudos', 'saude', 'financas', 'casa')
+PRIORITIES = ('low', 'medium', 'high')
+RECURRENCES = ('FREQ=DAILY;INTERVAL=1', 'FREQ=WEEKLY;INTERVAL=1', 'FREQ=MONTHLY;INTERVAL=1;COUNT=12')
+
+def bench_email(prefix, index):
+    return f'{prefix}{index}@{EMAIL_DOMAIN}'
+
+def task_rows(user_id, count, now, rng, recurring_ratio):
+    """
+    Tarefas sintéticas de um usuário, espalhadas pelo último ano em ordem de
+    criação: inserir na ordem dos índices (user_id, created_at) é bem mais
+    rápido que em ordem aleatória.
+    """
+    step = timedelta(days=365) / max(1, count)
+    for index in range(count):
+        title = ' '.join(rng.sample(WORDS, 3)).capitalize()
+        created_at = now - step * (count - index)
+        due_date = created_at + timedelta(days=rng.randrange(60)) if rng.random() < 0.5 else None
+        recurrence = None
+        if rng.random() < recurring_ratio:
+            recurrence = rng.choice(RECURRENCES)
+            due_date = due_date or created_at
+        yield {
+            'id': str(uuid.uuid4()),
+            'title': title,
+            'description': ' '.join(rng.choices(WORDS, k=rng.randrange(4, 16))),
+            'completed': rng.random() < 0.4,
+            'priority': rng.choice(PRIORITIES),
+            'category': rng.choice(CATEGORIES),
+            'due_date': due_date,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'user_id': user_id,
+            'recurrence': recurrence
+        }
+
+def generate(app, users, tasks_per_user, areas_per_user, password, prefix,
+             recurring_ratio=0.05, batch_size=10000, seed=None, log=print):
+    """
+    Insere os usuários e seus dados, com commits a cada `batch_size` linhas.
+    O gatilho de inserção do índice de busca fica desligado durante a carga e
+    o índice é reconstruído no fim, o que é várias vezes mais rápido; por isso
+    o servidor não deve estar gravando nos mesmos bancos.
+
+    Returns:
+        dict: Quantidade de usuários, tarefas e áreas alteradas inseridas
+    """
+    from app import db, shard_count, shard_engine, user_shard_index
+    from models import LifeAreaOverride, LifeAreaTemplate, Task, User, UserShard, UserStats, UserVersion
+    from search import TASK_SEARCH_DDL, rebuild_task_search_index, supports_task_search
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    totals = defaultdict(int)
+
+    # Um único hash para todos: gerar um por usuário levaria horas
+    password_hash = app.extensions['password_hasher'].hash(password)
+    first = db.session.query(User).filter(User.email.like(f'{prefix}%@{EMAIL_DOMAIN}')).count()
+    # Modelos copiados em todos os shards: lidos do banco principal
+    with db.engine.connect() as conn:
+        areas = conn.execute(db.select(LifeAreaTemplate.id, LifeAreaTemplate.default_score)).all()
+    shards = shard_count()
+
+    engines = [shard_engine(index) for index in range(shards)]
+    searchable = [engine for engine in engines if supports_task_search(engine.dialect)]
+    for engine in searchable:
+        with engine.begin() as conn:
+            conn.exec_driver_sql('DROP TRIGGER IF EXISTS tasks_fts_insert')
+    try:
+        # Usuários por lote, para cada lote ter cerca de batch_size tarefas
+        users_per_batch = max(1, batch_size // max(1, tasks_per_user))
+        started = time.perf_counter()
+        for offset in range(first, first + users, users_per_batch):
+            indexes = range(offset, min(offset + users_per_batch, first + users))
+            user_rows = [{
+                'id': str(uuid.uuid4()),
+                'email': bench_email(prefix, index),
+                'name': f'Benchmark {index}',
+                'password_hash': password_hash,
+                'created_at': now,
+                'updated_at': now
+            } for index in indexes]
+            by_shard = defaultdict(list)
+            for row in user_rows:
+                by_shard[user_shard_index(row['id'])].append(row['id'])
+
+            with db.engine.begin() as conn:
+                conn.execute(User.__table__.insert(), user_rows)
+                if shards > 1:
+                    conn.execute(UserShard.__table__.insert(), [
+                        {'user_id': user_id, 'shard': shard, 'locked': False}
+                        for shard, user_ids in by_shard.items() for user_id in user_ids
+                    ])
+
+            for shard, user_ids in by_shard.items():
+                with engines[shard].begin() as conn:
+                    for user_id in user_ids:
+                        stats = defaultdict(int)
+                        rows = []
+                        for row in task_rows(user_id, tasks_per_user, now, rng, recurring_ratio):
+                            rows.append(row)
+                            stats['total_tasks'] += 1
+                            stats['completed_tasks'] += row['completed']
+                            stats['high_priority_open'] += row['priority'] == 'high' and not row['completed']
+                            if len(rows) >= batch_size:
+                                conn.execute(Task.__table__.insert(), rows)
+                                rows.clear()
+                        if rows:
+                            conn.execute(Task.__table__.insert(), rows)
+
+                        overrides = {
+                            area_id: rng.randrange(1, 11)
+                            for area_id, _ in rng.sample(areas, min(areas_per_user, len(areas)))
+                        }
+                        if overrides:
+                            conn.execute(LifeAreaOverride.__table__.insert(), [
+                                {'user_id': user_id, 'area_id': area_id, 'score': score, 'last_updated': now}
+                                for area_id, score in overrides.items()
+                            ])
+                        # Contadores prontos: sem eles a primeira consulta de
+                        # /api/stats recontaria todas as tarefas do usuário
+                        conn.execute(UserStats.__table__.insert(), {
+                            'user_id': user_id,
+                            'life_score_sum': sum(overrides.get(area_id, score) for area_id, score in areas),
+                            'life_area_count': len(areas),
+                            **stats
+                        })
+                        conn.execute(UserVersion.__table__.insert(), {'user_id': user_id, 'version': 1})
+                        totals['tasks'] += stats['total_tasks']
+                        totals['life_areas'] += len(overrides)
+
+            totals['users'] += len(user_rows)
+            elapsed = time.perf_counter() - started
+            log(f"  {totals['users']:>8} usuários  {totals['tasks']:>10} tarefas  "
+                f"({totals['tasks'] / elapsed if elapsed else 0:,.0f} tarefas/s)")
+    finally:
+        for engine in searchable:
+            with engine.begin() as conn:
+                for statement in TASK_SEARCH_DDL:
+                    conn.exec_driver_sql(statement)
+                log(f'  reconstruindo o índice de busca ({engine.url.database})')
+                rebuild_task_search_index(conn)
+    return dict(totals)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--tasks-per-user', type=int, default=1000)
+    parser.add_argument('--areas-per-user', type=int, default=3,
+                        help='áreas da vida com pontuação alterada por usuário')
+    parser.add_argument('--recurring-ratio', type=float, default=0.05,
+                        help='fração das tarefas com recorrência')
+    parser.add_argument('--password', default='bench123')
+    parser.add_argument('--prefix', default='bench')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app import create_app, migrate_all_databases
+
+    app = create_app('production')
+    print(f"Banco: {app.config['SQLALCHEMY_DATABASE_URI']} "
+          f"(+{len(app.config['SHARD_DATABASE_URIS'])} shards)")
+    with app.app_context():
+        migrate_all_databases()
+        started = time.perf_counter()
+        totals = generate(
+            app, args.users, args.tasks_per_user, args.areas_per_user, args.password, args.prefix,
+            recurring_ratio=args.recurring_ratio, batch_size=args.batch_size, seed=args.seed
+        )
+    print(f"✅ {totals.get('users', 0)} usuários, {totals.get('tasks', 0)} tarefas e "
+          f"{totals.get('life_areas', 0)} áreas alteradas em {time.perf_counter() - started:.1f}s "
+          f"(senha: {args.password})")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,611 @@
+"""
+Teste de carga da API: usuários virtuais em paralelo percorrem as rotas de
+app.py (login, tarefas, busca, agenda, lote, exportação e importação, áreas da
+vida, estatísticas, sincronização, perfil com foto...) contra um servidor
+local, e o relatório traz por rota a vazão, as latências p50/p95/p99 e os
+comandos SQL por requisição (cabeçalho X-SQL-Statements, ativado no servidor
+com SQL_STATEMENT_COUNT_HEADER=true).
+
+Os usuários são os gerados por benchmarks/dataset.py, com o mesmo prefixo e a
+mesma senha. O resultado pode ser salvo em JSON (--output) e comparado com uma
+execução anterior (--compare); a comparação termina com código 1 se alguma
+rota piorou além da tolerância.
+
+Uso (na pasta backend):
+    python -m benchmarks.dataset --users 50 --tasks-per-user 2000
+    SQL_STATEMENT_COUNT_HEADER=true FLASK_ENV=production python run.py
+    python -m benchmarks.load --concurrency 16 --duration 30 --output base.json
+
+    # Sobe o servidor (run.py, com WORKERS processos) só para o teste
+    python -m benchmarks.load --start-server --workers 4 --compare base.json
+
+    # Proporção das rotas (nome da função da rota = peso)
+    python -m benchmarks.load --mix get_tasks=10 create_task=5 export_tasks=0
+"""
+import argparse
+import base64
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from urllib.parse import urlencode, urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Peso de cada operação no sorteio dos usuários virtuais. As operações levam o
+# nome da rota que exercitam; update_profile_photo é update_profile com foto.
+DEFAULT_MIX = {
+    'get_tasks': 20,
+    'get_tasks_next_page': 5,
+    'search_tasks': 6,
+    'create_task': 10,
+    'update_task': 10,
+    'delete_task': 3,
+    'batch_tasks': 2,
+    'get_agenda': 5,
+    'update_task_occurrence': 2,
+    'export_tasks': 1,
+    'import_tasks': 1,
+    'get_stats': 10,
+    'get_life_areas': 6,
+    'update_life_area': 3,
+    'get_life_area_history': 2,
+    'sync': 5,
+    'get_current_user': 5,
+    'update_profile': 2,
+    'update_profile_photo': 1,
+    'upload_profile_photo': 1,
+    'get_photo_job': 1,
+    'get_profile_photo': 1,
+    'login': 1,
+    'register': 0,
+    'health_check': 1
+}
+
+SEARCH_WORDS = ('relat', 'reuni', 'python', 'academia', 'orcamento', 'projeto', 'viagem', 'curso')
+
+def percentile(ordered, fraction):
+    """Percentil pelo posto mais próximo, sobre valores já ordenados"""
+    if not ordered:
+        return None
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def make_photo(size):
+    """JPEG sintético de size x size pixels"""
+    from PIL import Image
+
+    image = Image.linear_gradient('L').resize((size, size)).convert('RGB')
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return buffer.getvalue()
+
+def multipart_body(field, filename, content, content_type):
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            return {}
+
+class VirtualUser:
+    """
+    Um cliente da API com conexão própria (keep-alive quando o servidor
+    permite). Guarda o que as operações seguintes precisam: token, ids de
+    tarefas, ETags, o último job de foto.
+    """
+
+    def __init__(self, url, email, password, photo, rng):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.email = email
+        self.password = password
+        self.photo = photo
+        self.rng = rng
+        self.connection = None
+        self.token = None
+        self.recording = False
+        self.samples = defaultdict(list)  # operação -> [(segundos, status, comandos SQL)]
+        self.task_ids = []
+        self.created_ids = []
+        self.occurrences = []
+        self.etags = {}
+        self.next_cursor = None
+        self.sync_token = None
+        self.photo_job = None
+        self.photo_url = None
+
+    def request(self, operation, method, path, body=None, content_type='application/json', headers=None):
+        headers = dict(headers or {})
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        if body is not None:
+            headers['Content-Type'] = content_type
+
+        started = time.perf_counter()
+        for attempt in (1, 2):
+            try:
+                if self.connection is None:
+                    self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+                self.connection.request(method, path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Conexão encerrada pelo servidor entre requisições: tenta uma vez com outra
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    payload, response = b'', None
+        elapsed = time.perf_counter() - started
+
+        if response is None:
+            status, response_headers = 0, {}
+        else:
+            status, response_headers = response.status, dict(response.getheaders())
+            if response.will_close:
+                self.connection.close()
+                self.connection = None
+        if self.recording:
+            sql = response_headers.get('X-SQL-Statements')
+            self.samples[operation].append((elapsed, status, int(sql) if sql else None))
+        return Response(status, response_headers, payload)
+
+    def get(self, operation, path, params=None, revalidate=True):
+        """GET com If-None-Match, como um cliente que guarda as respostas"""
+        if params:
+            path = f'{path}?{urlencode(params)}'
+        headers = {}
+        if revalidate and path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        response = self.request(operation, 'GET', path, headers=headers)
+        if response.headers.get('ETag'):
+            self.etags[path] = response.headers['ETag']
+        return response
+
+    # Operações: cada uma exercita uma rota; sem os dados necessários (ex.:
+    # nenhuma tarefa conhecida), recorre a uma leitura
+
+    def login(self, operation='login'):
+        response = self.request(operation, 'POST', '/api/auth/login',
+                                {'email': self.email, 'password': self.password})
+        if response.status == 200:
+            self.token = response.json()['token']
+        return response
+
+    def register(self):
+        token = self.token
+        self.token = None
+        self.request('register', 'POST', '/api/auth/register', {
+            'email': f'load-{uuid.uuid4().hex}@bench.precrastine.com',
+            'password': self.password,
+            'name': 'Cadastro do teste de carga'
+        })
+        self.token = token
+
+    def health_check(self):
+        self.request('health_check', 'GET', '/api/health')
+
+    def get_current_user(self):
+        response = self.get('get_current_user', '/api/auth/me')
+        if response.status == 200:
+            self.remember_photo(response.json()['user'])
+
+    def get_tasks(self):
+        response = self.get('get_tasks', '/api/tasks', {'limit': 100})
+        if response.status == 200:
+            data = response.json()
+            self.task_ids = [task['id'] for task in data['tasks']] or self.task_ids
+            self.next_cursor = data.get('nextCursor')
+
+    def get_tasks_next_page(self):
+        if not self.next_cursor:
+            return self.get_tasks()
+        response = self.get('get_tasks_next_page', '/api/tasks', {'limit': 100, 'cursor': self.next_cursor})
+        if response.status == 200:
+            self.next_cursor = response.json().get('nextCursor')
+
+    def search_tasks(self):
+        self.get('search_tasks', '/api/tasks/search', {'q': self.rng.choice(SEARCH_WORDS)})
+
+    def create_task(self):
+        response = self.request('create_task', 'POST', '/api/tasks', {
+            'title': f'Tarefa de carga {self.rng.randrange(10 ** 6)}',
+            'description': 'Criada pelo teste de carga',
+            'priority': self.rng.choice(('low', 'medium', 'high')),
+            'category': 'trabalho',
+            'dueDate': (datetime.utcnow() + timedelta(days=self.rng.randrange(14))).isoformat()
+        })
+        if response.status == 201:
+            self.created_ids.append(response.json()['task']['id'])
+
+    def update_task(self):
+        task_ids = self.created_ids or self.task_ids
+        if not task_ids:
+            return self.get_tasks()
+        self.request('update_task', 'PUT', f'/api/tasks/{self.rng.choice(task_ids)}', {
+            'completed': self.rng.random() < 0.5,
+            'priority': self.rng.choice(('low', 'medium', 'high'))
+        })
+
+    def delete_task(self):
+        if not self.created_ids:
+            return self.create_task()
+        task_id = self.created_ids.pop(self.rng.randrange(len(self.created_ids)))
+        self.request('delete_task', 'DELETE', f'/api/tasks/{task_id}')
+
+    def batch_tasks(self):
+        operations = [{'op': 'create', 'data': {'title': f'Lote {index}', 'priority': 'low'}}
+                      for index in range(10)]
+        operations += [{'op': 'update', 'id': task_id, 'data': {'completed': True}}
+                       for task_id in self.rng.sample(self.task_ids, min(10, len(self.task_ids)))]
+        response = self.request('batch_tasks', 'POST', '/api/tasks/batch', {'operations': operations})
+        if response.status == 200:
+            self.created_ids.extend(result['task']['id'] for result in response.json().get('results', [])
+                                    if result.get('op') == 'create' and result.get('task'))
+
+    def get_agenda(self):
+        response = self.get('get_agenda', '/api/agenda')
+        if response.status == 200:
+            self.occurrences = [(item['id'], item['occurrenceDate'])
+                                for item in response.json()['items'] if item.get('occurrenceDate')]
+
+    def update_task_occurrence(self):
+        if not self.occurrences:
+            return self.get_agenda()
+        task_id, occurrence = self.rng.choice(self.occurrences)
+        self.request('update_task_occurrence', 'PUT', f'/api/tasks/{task_id}/occurrences/{occurrence}',
+                     {'completed': self.rng.random() < 0.5})
+
+    def export_tasks(self):
+        self.request('export_tasks', 'GET', '/api/tasks/export?format=ndjson')
+
+    def import_tasks(self):
+        lines = ''.join(json.dumps({'title': f'Importada {index}', 'priority': 'medium'}) + '\n'
+                        for index in range(100))
+        self.request('import_tasks', 'POST', '/api/tasks/import', lines.encode(),
+                     content_type='application/x-ndjson')
+
+    def get_stats(self):
+        self.get('get_stats', '/api/stats')
+
+    def get_life_areas(self):
+        self.get('get_life_areas', '/api/life-areas')
+
+    def update_life_area(self):
+        area_id = self.rng.choice(('health', 'career', 'relationships', 'finances'))
+        self.request('update_life_area', 'PUT', f'/api/life-areas/{area_id}',
+                     {'score': self.rng.randrange(1, 11)})
+
+    def get_life_area_history(self):
+        self.get('get_life_area_history', '/api/life-areas/history', {'bucket': 'week'})
+
+    def sync(self):
+        params = {'since': self.sync_token} if self.sync_token else None
+        response = self.get('sync', '/api/sync', params, revalidate=False)
+        if response.status == 200:
+            self.sync_token = response.json().get('token') or self.sync_token
+
+    def update_profile(self):
+        self.request('update_profile', 'PUT', '/api/users/profile',
+                     {'name': f'Benchmark {self.rng.randrange(10 ** 6)}'})
+
+    def update_profile_photo(self):
+        response = self.request('update_profile_photo', 'PUT', '/api/users/profile', {
+            'photo': 'data:image/jpeg;base64,' + base64.b64encode(self.photo).decode()
+        })
+        if response.status == 202:
+            self.photo_job = response.json()['photoJob']['id']
+
+    def upload_profile_photo(self):
+        body, content_type = multipart_body('photo', 'foto.jpg', self.photo, 'image/jpeg')
+        response = self.request('upload_profile_photo', 'POST', '/api/users/profile/photo', body,
+                                content_type=content_type)
+        if response.status == 202:
+            self.photo_job = response.json()['photoJob']['id']
+
+    def get_photo_job(self):
+        if not self.photo_job:
+            return self.get_current_user()
+        response = self.request('get_photo_job', 'GET', f'/api/users/profile/photo-jobs/{self.photo_job}')
+        if response.status == 200 and response.json().get('user'):
+            self.remember_photo(response.json()['user'])
+
+    def remember_photo(self, user):
+        # Fotos ainda em base64 não têm rota própria
+        if (user.get('photo') or '').startswith('/api/photos/'):
+            self.photo_url = user['photo']
+
+    def get_profile_photo(self):
+        if not self.photo_url:
+            return self.get_current_user()
+        self.request('get_profile_photo', 'GET', self.photo_url)
+
+def run_load(url, accounts, password, concurrency, duration, warmup, mix, photo, seed=None):
+    """
+    Executa o teste: cada thread é um usuário virtual que faz login e sorteia
+    operações pelo peso em `mix` até o fim do tempo. Amostras do aquecimento
+    são descartadas.
+
+    Returns:
+        tuple: (amostras por operação, segundos medidos)
+    """
+    operations = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in operations]
+    users = [
+        VirtualUser(url, accounts[index % len(accounts)], password, photo,
+                    random.Random(None if seed is None else seed + index))
+        for index in range(concurrency)
+    ]
+    for user in users:
+        # O login inicial é relatado à parte (login_setup)
+        user.recording = True
+        if user.login('login_setup').status != 200:
+            raise SystemExit(f'Falha no login de {user.email}; gere os usuários com benchmarks.dataset')
+        user.recording = False
+        user.get_tasks()
+
+    start = time.monotonic()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(user):
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            user.recording = now >= measure_from
+            getattr(user, user.rng.choices(operations, weights)[0])()
+        if user.connection:
+            user.connection.close()
+
+    threads = [threading.Thread(target=worker, args=(user,), daemon=True) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    samples = defaultdict(list)
+    for user in users:
+        for operation, values in user.samples.items():
+            samples[operation].extend(values)
+    return samples, duration
+
+def summarize(values, seconds):
+    latencies = sorted(elapsed * 1000 for elapsed, _, _ in values)
+    statuses = Counter(status for _, status, _ in values)
+    sql = [count for _, _, count in values if count is not None]
+    return {
+        'count': len(values),
+        'errors': sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+        'throughput': round(len(values) / seconds, 2) if seconds else None,
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+        'sql_mean': round(sum(sql) / len(sql), 2) if sql else None,
+        'sql_max': max(sql) if sql else None,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())}
+    }
+
+def build_report(samples, seconds, meta):
+    login = samples.pop('login_setup', None)
+    routes = {operation: summarize(values, seconds) for operation, values in sorted(samples.items())}
+    everything = [value for values in samples.values() for value in values]
+    report = {'meta': meta, 'totals': summarize(everything, seconds), 'routes': routes}
+    if login:
+        # Logins em sequência, fora da janela medida: só as latências importam
+        report['login_setup'] = summarize(login, None)
+    return report
+
+def print_report(report):
+    header = (f"{'rota':<24} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'SQL/req':>8} {'erros':>6}")
+    print(header)
+    print('-' * len(header))
+    rows = list(report['routes'].items()) + [('total', report['totals'])]
+    for name, stats in rows:
+        def cell(key, digits=1):
+            value = stats[key]
+            return '-' if value is None else f'{value:.{digits}f}'
+        print(f"{name:<24} {stats['count']:>7} {cell('throughput'):>8} {cell('p50_ms'):>8} "
+              f"{cell('p95_ms'):>8} {cell('p99_ms'):>8} {cell('sql_mean'):>8} {stats['errors']:>6}")
+
+def compare_reports(baseline, current, tolerance):
+    """
+    Mostra a variação de cada rota em relação à execução de referência.
+
+    Returns:
+        list: Rotas que pioraram além da tolerância (latência p95 ou vazão, em
+            %) ou passaram a executar mais comandos SQL por requisição
+    """
+    regressions = []
+    print(f"\nComparação com {baseline['meta'].get('started_at', 'a referência')}:")
+    print(f"{'rota':<24} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>9} {'SQL/req':>12}")
+
+    def change(old, new):
+        if not old or new is None:
+            return None
+        return (new - old) / old * 100
+
+    routes = dict(current['routes'], total=current['totals'])
+    baseline_routes = dict(baseline['routes'], total=baseline['totals'])
+    for name, stats in routes.items():
+        old = baseline_routes.get(name)
+        if not old or not old['count'] or not stats['count']:
+            continue
+        deltas = {key: change(old[key], stats[key]) for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput')}
+        cells = ['-' if delta is None else f'{delta:+.1f}%' for delta in deltas.values()]
+        sql = '-'
+        if old['sql_mean'] is not None and stats['sql_mean'] is not None:
+            sql = f"{old['sql_mean']:.1f}→{stats['sql_mean']:.1f}"
+        worse = (
+            (deltas['p95_ms'] or 0) > tolerance
+            or (name == 'total' and (deltas['throughput'] or 0) < -tolerance)
+            or (sql != '-' and stats['sql_mean'] > old['sql_mean'] + 0.5)
+        )
+        if worse:
+            regressions.append(name)
+        print(f"{name:<24} {cells[0]:>9} {cells[1]:>9} {cells[2]:>9} {cells[3]:>9} {sql:>12}"
+              f"{'  ⚠️' if worse else ''}")
+    return regressions
+
+def health(url):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=5)
+    try:
+        connection.request('GET', '/api/health')
+        response = connection.getresponse()
+        return json.loads(response.read()) if response.status == 200 else None
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        connection.close()
+
+def start_server(url, workers, log_path=None, timeout=120):
+    """Executa run.py em produção, com X-SQL-Statements ativo, e espera o health check"""
+    parts = urlsplit(url)
+    env = dict(
+        os.environ,
+        HOST=parts.hostname,
+        PORT=str(parts.port or 80),
+        FLASK_ENV='production',
+        WORKERS=str(workers),
+        SQL_STATEMENT_COUNT_HEADER='true'
+    )
+    output = open(log_path, 'ab') if log_path else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, 'run.py'], cwd=BACKEND_DIR, env=env,
+        stdout=output, stderr=subprocess.STDOUT, start_new_session=True
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'O servidor terminou ao iniciar (código {process.returncode})')
+        if health(url):
+            return process
+        time.sleep(0.5)
+    stop_server(process)
+    raise SystemExit('O servidor não respondeu ao health check a tempo')
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=60)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+def parse_mix(items):
+    mix = dict(DEFAULT_MIX)
+    for item in items or ():
+        name, _, weight = item.partition('=')
+        if name not in DEFAULT_MIX or not weight.isdigit():
+            raise SystemExit(f"Peso inválido: {item} (operações: {', '.join(DEFAULT_MIX)})")
+        mix[name] = int(weight)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, default=8, help='usuários virtuais simultâneos')
+    parser.add_argument('--duration', type=float, default=30, help='segundos medidos')
+    parser.add_argument('--warmup', type=float, default=5, help='segundos iniciais descartados')
+    parser.add_argument('--users', type=int, default=None,
+                        help='contas do dataset usadas (padrão: uma por usuário virtual)')
+    parser.add_argument('--prefix', default='bench')
+    parser.add_argument('--password', default='bench123')
+    parser.add_argument('--mix', nargs='*', metavar='OPERAÇÃO=PESO')
+    parser.add_argument('--photo-size', type=int, default=1200, help='lado da foto enviada, em pixels')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--start-server', action='store_true', help='executa run.py durante o teste')
+    parser.add_argument('--workers', type=int, default=0, help='WORKERS de run.py com --start-server')
+    parser.add_argument('--server-log', default=None, help='arquivo para a saída do servidor')
+    parser.add_argument('--output', default=None, help='salva o relatório em JSON')
+    parser.add_argument('--compare', default=None, help='relatório JSON de referência')
+    parser.add_argument('--tolerance', type=float, default=10, help='piora aceita na comparação, em %%')
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from benchmarks.dataset import bench_email
+
+    mix = parse_mix(args.mix)
+    accounts = [bench_email(args.prefix, index) for index in range(args.users or args.concurrency)]
+    server = start_server(args.url, args.workers, args.server_log) if args.start_server else None
+    try:
+        server_health = health(args.url)
+        if not server_health:
+            raise SystemExit(f'Servidor indisponível em {args.url}')
+        started_at = datetime.utcnow().isoformat()
+        print(f"{args.concurrency} usuários virtuais, {args.duration:.0f}s (+{args.warmup:.0f}s de "
+              f"aquecimento) contra {args.url}")
+        samples, seconds = run_load(
+            args.url, accounts, args.password, args.concurrency, args.duration, args.warmup,
+            mix, make_photo(args.photo_size), seed=args.seed
+        )
+    finally:
+        if server:
+            stop_server(server)
+
+    report = build_report(samples, seconds, {
+        'started_at': started_at,
+        'url': args.url,
+        'concurrency': args.concurrency,
+        'duration': args.duration,
+        'warmup': args.warmup,
+        'accounts': len(accounts),
+        'workers': args.workers if args.start_server else None,
+        'mix': mix,
+        'photo_size': args.photo_size,
+        'server': server_health,
+        'python': platform.python_version(),
+        'platform': platform.platform()
+    })
+    print_report(report)
+    if all(stats['sql_mean'] is None for stats in report['routes'].values()):
+        print('(sem X-SQL-Statements: inicie o servidor com SQL_STATEMENT_COUNT_HEADER=true)')
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f'\nRelatório salvo em {args.output}')
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare_reports(baseline, report, args.tolerance)
+        if regressions:
+            print(f"\n⚠️  Pioraram além de {args.tolerance:.0f}%: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
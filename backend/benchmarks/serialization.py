@@ -0,0 +1,106 @@
+"""
+Compara a serialização das listagens de tarefas: objetos do ORM com to_dict()
+e json da biblioteca padrão contra colunas em tuplas (serializers.py) e o
+provedor JSON rápido.
+
+Uso (na pasta backend):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --sizes 10000 100000 --repeat 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+def best_of(repeat, func):
+    """Menor e mediana dos tempos de `repeat` execuções, em milissegundos"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), statistics.median(timings)
+
+def seed_tasks(db, Task, user_id, count, batch_size=10000):
+    """Insere `count` tarefas sintéticas com executemany"""
+    now = datetime.utcnow()
+    for offset in range(0, count, batch_size):
+        db.session.execute(db.insert(Task), [
+            {
+                'id': str(uuid.uuid4()),
+                'title': f'Tarefa {index}',
+                'description': 'Descrição de exemplo para o benchmark',
+                'completed': index % 3 == 0,
+                'priority': ('low', 'medium', 'high')[index % 3],
+                'category': 'trabalho',
+                'due_date': now + timedelta(days=index % 30) if index % 2 else None,
+                'created_at': now - timedelta(seconds=index),
+                'updated_at': now,
+                'user_id': user_id
+            }
+            for index in range(offset, min(offset + batch_size, count))
+        ])
+    db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='precrastine-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['SHARD_DATABASE_URLS'] = ''
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    
+    from app import create_app, db, migrate_all_databases
+    from models import Task, User
+    from serializers import TASK_LIST_COLUMNS, FastJSONProvider, orjson, task_serializer
+    
+    app = create_app('production')
+    fast_json = FastJSONProvider(app)
+    print(f"orjson: {'disponível' if orjson else 'não instalado (usando json padrão)'}")
+    print(f"{'tarefas':>8} {'caminho':<32} {'consulta+dict (ms)':>20} {'json (ms)':>12} {'total (ms)':>12}")
+    
+    with app.app_context():
+        migrate_all_databases()
+        user = User(email='bench@precrastine.com', name='Benchmark', password_hash='-')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+        seeded = 0
+        
+        for size in sorted(args.sizes):
+            seed_tasks(db, Task, user_id, size - seeded)
+            seeded = size
+            order = (Task.created_at.desc(), Task.id.desc())
+            
+            def orm_rows():
+                # Sessão limpa a cada rodada, como em uma requisição nova
+                db.session.expunge_all()
+                return [task.to_dict() for task in
+                        Task.query.filter(Task.user_id == user_id).order_by(*order).all()]
+            
+            def projection_rows():
+                return task_serializer.many(db.session.execute(
+                    db.select(*TASK_LIST_COLUMNS).filter(Task.user_id == user_id).order_by(*order)
+                ))
+            
+            for label, build, dumps in (
+                ('ORM + to_dict + json', orm_rows, json.dumps),
+                ('tuplas + RowSerializer + json', projection_rows, json.dumps),
+                ('tuplas + RowSerializer + rápido', projection_rows, fast_json.dumps),
+            ):
+                rows = build()
+                build_best, _ = best_of(args.repeat, build)
+                dump_best, _ = best_of(args.repeat, lambda: dumps({'tasks': rows}))
+                print(f"{size:>8} {label:<32} {build_best:>20.1f} {dump_best:>12.1f} "
+                      f"{build_best + dump_best:>12.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Mede a inicialização a frio, cada rodada em um processo Python novo, como um
+worker recém-criado: importação de app.py, init_db() em um banco já migrado e
+a primeira requisição. Mede também a primeira execução com o banco vazio
+(criação do esquema) e confere que o Pillow não é carregado ao iniciar.
+
+Termina com código 1 se a mediana do processo inteiro passar de --budget-ms.
+
+Uso (na pasta backend):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --runs 10 --budget-ms 800 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASES = ('import_ms', 'init_db_ms', 'first_request_ms', 'process_ms')
+
+def child():
+    """Rodada medida, executada no processo filho; imprime os tempos em JSON"""
+    started = time.perf_counter()
+    sys.path.insert(0, BACKEND_DIR)
+    import app as module
+    imported = time.perf_counter()
+    with module.app.app_context():
+        module.init_db()
+    initialized = time.perf_counter()
+    module.app.test_client().get('/api/health')
+    answered = time.perf_counter()
+    print(json.dumps({
+        'import_ms': (imported - started) * 1000,
+        'init_db_ms': (initialized - imported) * 1000,
+        'first_request_ms': (answered - initialized) * 1000,
+        'pillow_loaded': 'PIL' in sys.modules
+    }))
+
+def run_child(env, extra_args=()):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *extra_args, '-m', 'benchmarks.startup', '--child'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process_ms'] = (time.perf_counter() - started) * 1000
+    return timings, result.stderr
+
+def print_importtime(stderr, top):
+    """Módulos com maior tempo próprio de importação (-X importtime)"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((int(own), int(cumulative), name.strip()))
+    print(f"\n{'módulo':<48} {'próprio (ms)':>13} {'acumulado (ms)':>15}")
+    for own, cumulative, name in sorted(modules, reverse=True)[:top]:
+        print(f"{name:<48} {own / 1000:>13.1f} {cumulative / 1000:>15.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500,
+                        help='limite para a mediana do processo inteiro')
+    parser.add_argument('--importtime', action='store_true',
+                        help='lista os módulos mais lentos de importar')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child()
+
+    workdir = tempfile.mkdtemp(prefix='precrastine-startup-')
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        SHARD_DATABASE_URLS='',
+        UPLOAD_FOLDER=os.path.join(workdir, 'uploads'),
+        SEED_DEMO_DATA='false'
+    )
+
+    # Primeira execução: cria o esquema e registra a versão
+    first, _ = run_child(env)
+    runs = [run_child(env)[0] for _ in range(args.runs)]
+
+    print(f"{'fase':<22} {'1ª execução':>12} {'mediana':>10} {'mínimo':>10}")
+    for phase in PHASES:
+        values = [run[phase] for run in runs]
+        print(f"{phase:<22} {first[phase]:>12.1f} {statistics.median(values):>10.1f} {min(values):>10.1f}")
+
+    pillow = any(run['pillow_loaded'] for run in [first] + runs)
+    print(f"\nPillow carregado na inicialização: {'sim ⚠️' if pillow else 'não'}")
+    if os.path.exists(env['UPLOAD_FOLDER']):
+        print("⚠️  A pasta de uploads foi criada na inicialização")
+
+    if args.importtime:
+        _, stderr = run_child(env, ('-X', 'importtime'))
+        print_importtime(stderr, top=15)
+
+    median = statistics.median(run['process_ms'] for run in runs)
+    if median > args.budget_ms:
+        print(f"\n❌ Inicialização de {median:.0f} ms acima do limite de {args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print(f"\n✅ Inicialização de {median:.0f} ms (limite: {args.budget_ms:.0f} ms)")
+
+if __name__ == '__main__':
+    main()
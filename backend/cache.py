@@ -0,0 +1,94 @@
+"""
+Cache em memória do processo, usado para evitar consultas repetidas por
+dados que mudam pouco (ex.: a identidade do usuário autenticado).
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+def estimate_size(value):
+    """Tamanho aproximado, em bytes, de um valor e dos itens de tuplas e dicionários"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        items = list(value.keys()) + list(value.values())
+    elif isinstance(value, (tuple, list)):
+        items = value
+    else:
+        return size
+    return size + sum(sys.getsizeof(item) for item in items)
+
+class LRUCache:
+    """
+    Cache LRU com validade (TTL) e limite de memória, seguro entre threads.
+    Ao exceder `max_entries` ou `max_bytes`, as entradas menos usadas saem.
+
+    Args:
+        max_entries (int): Quantidade máxima de entradas
+        ttl (float): Validade de cada entrada, em segundos
+        max_bytes (int): Memória máxima estimada por estimate_size
+    """
+
+    def __init__(self, max_entries, ttl, max_bytes):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # chave -> (expira_em, tamanho, valor)
+        self._bytes = 0
+        # Incrementado a cada invalidação (ver generation)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retorna o valor guardado, ou None se ausente ou expirado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def generation(self):
+        """
+        Marca a ser lida antes de buscar o valor na origem e passada a set: se
+        houver uma invalidação no meio, o valor lido pode já estar desatualizado
+        e não é guardado.
+        """
+        with self._lock:
+            return self._generation
+
+    def set(self, key, value, generation=None):
+        size = estimate_size(key) + estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
@@ -1,5 +1,32 @@
 import os
+import sqlite3
 from datetime import timedelta
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_registered_pragmas = set()
+
+def register_sqlite_pragmas(pragmas):
+    """
+    Aplica os PRAGMAs a cada nova conexão SQLite aberta pelo SQLAlchemy.
+    Conexões com outros bancos são ignoradas.
+    
+    Args:
+        pragmas (dict): Nome e valor de cada PRAGMA, na ordem de aplicação
+    """
+    key = tuple(pragmas.items())
+    if key in _registered_pragmas:
+        return
+    _registered_pragmas.add(key)
+    
+    @event.listens_for(Engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'precrastine-se-secret-key-2024'
@@ -9,12 +36,94 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'uploads'
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    TASKS_PAGE_SIZE = int(os.environ.get('TASKS_PAGE_SIZE', 100))
+    TASKS_MAX_PAGE_SIZE = int(os.environ.get('TASKS_MAX_PAGE_SIZE', 500))
+    TASKS_SEARCH_PAGE_SIZE = int(os.environ.get('TASKS_SEARCH_PAGE_SIZE', 20))
+    TASKS_SEARCH_MAX_PAGE_SIZE = int(os.environ.get('TASKS_SEARCH_MAX_PAGE_SIZE', 100))
+    TASKS_BATCH_MAX_SIZE = int(os.environ.get('TASKS_BATCH_MAX_SIZE', 1000))
+    TASKS_EXPORT_BATCH_SIZE = int(os.environ.get('TASKS_EXPORT_BATCH_SIZE', 1000))
+    TASKS_IMPORT_CHUNK_SIZE = int(os.environ.get('TASKS_IMPORT_CHUNK_SIZE', 1000))
+    # A importação lê o corpo em fluxo, então tem limite próprio (acima de MAX_CONTENT_LENGTH)
+    TASKS_IMPORT_MAX_CONTENT_LENGTH = int(os.environ.get('TASKS_IMPORT_MAX_CONTENT_LENGTH', 1024 * 1024 * 1024))
+    SYNC_TOMBSTONE_RETENTION = timedelta(days=int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS', 30)))
+    SYNC_CLOCK_SKEW = timedelta(seconds=5)
+    PHOTO_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+    PHOTO_WORKERS = int(os.environ.get('PHOTO_WORKERS', 2))
+    PHOTO_MAX_PENDING_JOBS = int(os.environ.get('PHOTO_MAX_PENDING_JOBS', 16))
+    PHOTO_MAX_PIXELS = int(os.environ.get('PHOTO_MAX_PIXELS', 40_000_000))
+    PHOTO_VARIANT_SIZES = (64, 200, 400)
+    LIFE_AREA_HISTORY_DEFAULT_DAYS = int(os.environ.get('LIFE_AREA_HISTORY_DEFAULT_DAYS', 90))
+    # Intervalo padrão e máximo da agenda, em dias
+    AGENDA_DEFAULT_DAYS = int(os.environ.get('AGENDA_DEFAULT_DAYS', 7))
+    AGENDA_MAX_DAYS = int(os.environ.get('AGENDA_MAX_DAYS', 366))
+    # Cache da identidade do usuário autenticado (por processo)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 10000))
+    USER_CACHE_MAX_BYTES = int(os.environ.get('USER_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+    # Hash de senhas: método do Werkzeug, hashes simultâneos e espera máxima por
+    # uma vaga; hashes com parâmetros antigos são refeitos no login
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'pbkdf2:sha256:600000'
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+    # Usa o orjson nas respostas JSON quando estiver instalado
+    JSON_FAST_ENCODER = os.environ.get('JSON_FAST_ENCODER', 'true').lower() in ('true', '1', 'yes')
+    # Eventos em tempo real (GET /api/events)
+    EVENTS_HEARTBEAT_SECONDS = float(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
+    EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 3000))
+    EVENTS_SUBSCRIBER_BUFFER = int(os.environ.get('EVENTS_SUBSCRIBER_BUFFER', 100))
+    EVENTS_REPLAY_SIZE = int(os.environ.get('EVENTS_REPLAY_SIZE', 100))
+    EVENTS_REPLAY_USERS = int(os.environ.get('EVENTS_REPLAY_USERS', 10000))
+    # Instrumentação: Server-Timing (db, serialization, total) em cada resposta,
+    # X-SQL-Statements com os comandos SQL executados, log de consultas lentas e
+    # token opcional de GET /api/metrics
+    SERVER_TIMING_HEADER = os.environ.get('SERVER_TIMING_HEADER', 'true').lower() in ('true', '1', 'yes')
+    SQL_STATEMENT_COUNT_HEADER = os.environ.get('SQL_STATEMENT_COUNT_HEADER', 'false').lower() in ('true', '1', 'yes')
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+    # Cria o usuário demo (demo@precrastine.com / demo123) ao iniciar
+    SEED_DEMO_DATA = os.environ.get('SEED_DEMO_DATA', 'false').lower() in ('true', '1', 'yes')
+    # Group commit: criação, alteração e exclusão de tarefas passam por uma
+    # thread de escrita por banco, que grava as alterações de várias
+    # requisições em um só commit a cada GROUP_COMMIT_WINDOW_MS
+    GROUP_COMMIT_ENABLED = os.environ.get('GROUP_COMMIT_ENABLED', 'false').lower() in ('true', '1', 'yes')
+    GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS', 2))
+    GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH', 256))
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    SQLITE_PRAGMAS = {}
+    # Bancos extras para tarefas e áreas da vida, separados por vírgula
+    SHARD_DATABASE_URIS = [uri for uri in os.environ.get('SHARD_DATABASE_URLS', '').split(',') if uri]
+    # Espera, com o usuário bloqueado, por requisições em andamento no shard antigo
+    SHARD_MOVE_GRACE_SECONDS = float(os.environ.get('SHARD_MOVE_GRACE_SECONDS', 2))
+
+    @classmethod
+    def init_app(cls, app):
+        if cls.SQLITE_PRAGMAS:
+            register_sqlite_pragmas(cls.SQLITE_PRAGMAS)
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 class ProductionConfig(Config):
     DEBUG = False
+    
+    # Perfil de armazenamento: com WAL, leituras não esperam pelas escritas e
+    # synchronous=NORMAL só sincroniza o disco nos checkpoints
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'foreign_keys': 'ON',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'temp_store': 'MEMORY'
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': 30,
+        'pool_recycle': 3600
+    }
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,179 @@
+"""
+Barramento de eventos em memória do processo, usado pelo fluxo SSE
+(GET /api/events) para avisar os outros dispositivos do usuário sobre
+alterações, no lugar de consultas periódicas.
+
+Cada usuário tem um histórico curto dos últimos eventos, para que uma conexão
+retomada com Last-Event-ID receba o que perdeu, e cada conexão tem uma fila
+limitada. Quando não é possível entregar tudo (fila cheia, histórico já
+descartado ou reinício do servidor), a conexão recebe um evento `reset` e o
+cliente deve sincronizar de novo (GET /api/sync).
+"""
+import itertools
+import threading
+import uuid
+from collections import OrderedDict, deque, namedtuple
+
+Event = namedtuple('Event', 'id number type data')
+
+class Subscription:
+    """
+    Conexão de um usuário ao barramento.
+
+    Args:
+        user_id (str): Dono da conexão
+        buffer_size (int): Eventos pendentes mantidos até a entrega
+    """
+
+    def __init__(self, user_id, buffer_size):
+        self.user_id = user_id
+        self.buffer_size = buffer_size
+        self.lost_events = False
+        self.closed = False
+        self._pending = deque()
+        self._ready = threading.Condition()
+
+    def push(self, events):
+        with self._ready:
+            for event in events:
+                if len(self._pending) >= self.buffer_size:
+                    # Cliente lento: descarta a fila e pede nova sincronização
+                    self._pending.clear()
+                    self.lost_events = True
+                self._pending.append(event)
+            self._ready.notify()
+
+    def wait(self, timeout):
+        """
+        Retorna os eventos pendentes, esperando até `timeout` segundos por
+        algum. Lista vazia indica que o tempo acabou.
+        """
+        with self._ready:
+            if not self._pending and not self.lost_events and not self.closed:
+                self._ready.wait(timeout)
+            events = list(self._pending)
+            self._pending.clear()
+            return events
+
+    def close(self):
+        """Encerra a conexão: wait retorna na hora e o fluxo termina"""
+        with self._ready:
+            self.closed = True
+            self._ready.notify()
+
+    def take_reset(self):
+        """Indica, uma única vez, que eventos foram perdidos desde a última leitura"""
+        with self._ready:
+            lost, self.lost_events = self.lost_events, False
+            return lost
+
+class EventBus:
+    """
+    Publicação e assinatura de eventos por usuário, segura entre threads.
+
+    Args:
+        buffer_size (int): Fila máxima de cada conexão
+        replay_size (int): Eventos guardados por usuário para Last-Event-ID
+        replay_users (int): Usuários com histórico guardado (os menos recentes saem)
+    """
+
+    def __init__(self, buffer_size, replay_size, replay_users):
+        self.buffer_size = buffer_size
+        self.replay_size = replay_size
+        self.replay_users = replay_users
+        # Ids de outra execução do servidor não são reconhecidos (ver subscribe)
+        self._prefix = uuid.uuid4().hex[:8]
+        self._counter = itertools.count(1)
+        self._history = OrderedDict()  # user_id -> deque de Event
+        # Maior número de evento já descartado do histórico, por usuário e no
+        # geral (históricos inteiros descartados)
+        self._dropped = {}
+        self._dropped_users = 0
+        self._subscribers = {}  # user_id -> set de Subscription
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event_type, data):
+        """
+        Envia um evento às conexões do usuário.
+
+        Args:
+            user_id (str): Destinatário
+            event_type (str): Nome do evento (ex.: task.updated)
+            data (str): Conteúdo já serializado em JSON
+        """
+        with self._lock:
+            number = next(self._counter)
+            event = Event(f'{self._prefix}-{number}', number, event_type, data)
+            history = self._history.get(user_id)
+            if history is None:
+                history = self._history[user_id] = deque(maxlen=self.replay_size)
+            self._history.move_to_end(user_id)
+            if len(history) == history.maxlen:
+                self._dropped[user_id] = history[0].number
+            history.append(event)
+            while len(self._history) > self.replay_users:
+                evicted_user, evicted = self._history.popitem(last=False)
+                self._dropped.pop(evicted_user, None)
+                self._dropped_users = max(self._dropped_users, evicted[-1].number)
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.push([event])
+        return event
+
+    def subscribe(self, user_id, last_event_id=None):
+        """
+        Abre uma conexão. Com `last_event_id`, os eventos posteriores a ele que
+        ainda estão no histórico são entregues primeiro.
+        """
+        subscription = Subscription(user_id, self.buffer_size)
+        with self._lock:
+            if self._closed:
+                subscription.close()
+                return subscription
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+            if last_event_id:
+                missed = self._events_after(user_id, last_event_id)
+                if missed is None:
+                    subscription.lost_events = True
+                elif missed:
+                    subscription.push(missed)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def close(self):
+        """
+        Encerra todas as conexões, ao parar o processo; os clientes se
+        reconectam (com Last-Event-ID) a outro processo.
+        """
+        with self._lock:
+            self._closed = True
+            subscriptions = [subscription for subscribers in self._subscribers.values()
+                             for subscription in subscribers]
+        for subscription in subscriptions:
+            subscription.close()
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _events_after(self, user_id, last_event_id):
+        """Eventos posteriores a last_event_id, ou None se não há como saber quais foram perdidos"""
+        prefix, _, number = last_event_id.partition('-')
+        if prefix != self._prefix or not number.isdigit():
+            return None
+        number = int(number)
+        history = self._history.get(user_id)
+        if history is None:
+            # Sem histórico: só é seguro se nenhum histórico descartado for mais novo
+            return None if number < self._dropped_users else []
+        if number < self._dropped.get(user_id, 0):
+            return None
+        return [event for event in history if event.number > number]
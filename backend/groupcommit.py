@@ -0,0 +1,120 @@
+"""
+Group commit: uma thread de escrita por banco junta as alterações de várias
+requisições em uma única transação.
+
+No SQLite cada commit espera o disco (fsync); uma rajada de alterações
+pequenas, como marcar tarefas como concluídas, passa mais tempo nos commits
+do que nos comandos. As requisições entregam suas alterações ao
+GroupCommitWriter e esperam: a thread executa o que chegou dentro de uma
+janela de alguns milissegundos, grava tudo com um só commit e só então libera
+cada requisição com o seu resultado.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+class GroupCommitWriter:
+    """
+    Thread única de escrita de um banco.
+
+    As alterações são funções sem argumentos que modificam a sessão da thread
+    e retornam o resultado da requisição. Se uma delas falha, o lote é
+    desfeito e cada alteração é refeita na própria transação, para que o erro
+    chegue só à requisição que o causou.
+
+    Args:
+        commit (callable): Grava a transação aberta pelas alterações do lote
+        rollback (callable): Descarta a transação após um erro
+        window (float): Espera por mais alterações depois da primeira, em segundos
+        max_batch (int): Alterações por transação
+        context (callable): Cria o gerenciador de contexto em que a thread roda
+            (ex.: contexto da aplicação com o shard escolhido)
+        on_batch (callable): Chamado com (alterações, segundos) após cada commit
+        name (str): Nome da thread
+    """
+
+    def __init__(self, commit, rollback, window, max_batch, context=None, on_batch=None,
+                 name='group-commit'):
+        self.window = window
+        self.max_batch = max_batch
+        self._commit = commit
+        self._rollback = rollback
+        self._context = context
+        self._on_batch = on_batch
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, mutation):
+        """Enfileira a alteração; o Future recebe o resultado depois do commit do lote"""
+        future = Future()
+        self._queue.put((mutation, future))
+        return future
+
+    def execute(self, mutation):
+        """Enfileira a alteração e espera o commit do lote (erros são relançados)"""
+        return self.submit(mutation).result()
+
+    def close(self):
+        """Grava o que já está na fila e encerra a thread"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        if self._context is None:
+            return self._loop()
+        with self._context():
+            return self._loop()
+
+    def _loop(self):
+        while True:
+            batch, closing = self._collect()
+            if batch:
+                self._flush(batch)
+            if closing:
+                return
+
+    def _collect(self):
+        """Espera a primeira alteração e junta as que chegarem dentro da janela"""
+        item = self._queue.get()
+        if item is None:
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        try:
+            results = [mutation() for mutation, _ in batch]
+            self._commit()
+        except Exception as error:
+            self._safe_rollback()
+            if len(batch) == 1:
+                batch[0][1].set_exception(error)
+                return
+            for item in batch:
+                self._flush([item])
+            return
+        elapsed = time.perf_counter() - started
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        if self._on_batch is not None:
+            self._on_batch(len(batch), elapsed)
+
+    def _safe_rollback(self):
+        try:
+            self._rollback()
+        except Exception:
+            # A conexão pode ter sido perdida; a próxima transação abre outra
+            pass
@@ -0,0 +1,157 @@
+"""
+Métricas do processo no formato texto do Prometheus (GET /api/metrics).
+
+Contadores e histogramas ficam em memória, com rótulos como método e rota.
+No modo pre-fork (WORKERS > 0) cada worker tem as suas: o Prometheus vê os
+valores do worker que atendeu a coleta.
+"""
+import threading
+
+# Limites dos histogramas: segundos para durações, quantidade para consultas
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+IMAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def format_labels(names, values, extra=()):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class CounterMetric:
+    """
+    Contador com rótulos.
+
+    Args:
+        name (str): Nome da métrica (terminado em _total)
+        documentation (str): Texto do # HELP
+        labelnames (tuple): Nomes dos rótulos, na ordem dos valores passados a inc
+    """
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}'
+
+class HistogramMetric:
+    """
+    Histograma com rótulos: contagem por faixa, soma e total de observações.
+
+    Args:
+        name (str): Nome da métrica
+        documentation (str): Texto do # HELP
+        buckets (tuple): Limites superiores das faixas, em ordem crescente
+        labelnames (tuple): Nomes dos rótulos, na ordem dos valores passados a observe
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # rótulos -> [contagem por faixa..., acima da última, soma]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                le = bound if bound == '+Inf' else format_value(float(bound))
+                yield f'{self.name}_bucket{format_labels(self.labelnames, labels, [("le", le)])} {cumulative}'
+            yield f'{self.name}_sum{format_labels(self.labelnames, labels)} {format_value(values[-1])}'
+            yield f'{self.name}_count{format_labels(self.labelnames, labels)} {cumulative}'
+
+class Metrics:
+    """Métricas da aplicação, criadas por create_app em app.extensions['metrics']"""
+
+    def __init__(self):
+        self.requests = CounterMetric(
+            'precrastine_http_requests_total', 'Requisições atendidas',
+            ('method', 'route', 'status')
+        )
+        self.request_duration = HistogramMetric(
+            'precrastine_http_request_duration_seconds',
+            'Tempo de cada requisição até o envio dos cabeçalhos',
+            DURATION_BUCKETS, ('method', 'route')
+        )
+        self.request_queries = HistogramMetric(
+            'precrastine_http_request_db_queries', 'Comandos SQL por requisição',
+            QUERY_COUNT_BUCKETS, ('method', 'route')
+        )
+        self.query_duration = HistogramMetric(
+            'precrastine_db_query_duration_seconds', 'Tempo de cada comando SQL',
+            QUERY_DURATION_BUCKETS
+        )
+        self.slow_queries = CounterMetric(
+            'precrastine_db_slow_queries_total', 'Comandos SQL acima de SLOW_QUERY_MS'
+        )
+        self.image_duration = HistogramMetric(
+            'precrastine_image_processing_seconds',
+            'Tempo de processamento de cada foto no pool de imagens',
+            IMAGE_BUCKETS, ('operation',)
+        )
+        self.photo_jobs = HistogramMetric(
+            'precrastine_photo_job_duration_seconds',
+            'Tempo de cada job de foto, da fila até a gravação do resultado',
+            IMAGE_BUCKETS, ('status',)
+        )
+        self.group_commit_batch = HistogramMetric(
+            'precrastine_group_commit_batch_size', 'Alterações gravadas em cada commit do group commit',
+            BATCH_SIZE_BUCKETS, ('shard',)
+        )
+        self.group_commit_duration = HistogramMetric(
+            'precrastine_group_commit_duration_seconds',
+            'Tempo de cada lote do group commit, da execução das alterações ao commit',
+            QUERY_DURATION_BUCKETS, ('shard',)
+        )
+
+    def families(self):
+        return [value for value in vars(self).values() if isinstance(value, (CounterMetric, HistogramMetric))]
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus (versão 0.0.4)"""
+        lines = []
+        for family in self.families():
+            lines.append(f'# HELP {family.name} {family.documentation}')
+            lines.append(f'# TYPE {family.name} {family.kind}')
+            lines.extend(family.samples())
+        return '\n'.join(lines) + '\n'
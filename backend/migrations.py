@@ -0,0 +1,186 @@
+"""
+Migração do esquema em bancos existentes, sem perda de dados.
+
+Bancos criados pelas versões anteriores do app.py usam os nomes de tabela
+padrão do Flask-SQLAlchemy (user, task, life_area...) e não têm os índices
+declarados em models.py. migrate_schema renomeia essas tabelas, cria as que
+faltam, acrescenta colunas novas e cria os índices que não existem. Também
+insere os modelos das áreas da Roda da Vida e cria o índice de busca das
+tarefas (search.py) em cada banco. Ao final registra SCHEMA_VERSION na tabela
+schema_version, para que as próximas inicializações pulem essa verificação.
+"""
+from sqlalchemy import inspect, select, Column, Integer, MetaData, Table
+
+from search import ensure_task_search_index
+from utils import life_area_template_rows
+
+# Versão do esquema de models.py, incluindo o índice de busca e os modelos das
+# áreas. Aumente a cada alteração: na inicialização, só os bancos com versão
+# menor passam por migrate_schema; os demais são usados sem inspeção.
+# Versão 2: contadores de user_stats criados para todos os usuários (ver
+# migrate_all_databases em app.py).
+# Versão 3: tabela task_occurrence_tombstones.
+SCHEMA_VERSION = 3
+
+# Uma linha com a versão aplicada, em cada banco (principal e shards)
+schema_version_table = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, nullable=False)
+)
+
+# Nome antigo -> nome atual das tabelas
+LEGACY_TABLE_NAMES = {
+    'user': 'users',
+    'task': 'tasks',
+    'task_tombstone': 'task_tombstones',
+    'user_version': 'user_versions',
+    'photo_job': 'photo_jobs',
+    'user_shard': 'user_shards'
+}
+
+# Tabelas antigas com uma linha por usuário e área, substituídas pelos modelos
+# (life_area_templates) e pelas pontuações alteradas (life_area_overrides)
+LEGACY_LIFE_AREA_TABLES = ('life_areas', 'life_area')
+
+# Colunas novas preenchidas a partir de outra coluna da mesma linha
+COLUMN_BACKFILLS = {
+    ('users', 'updated_at'): 'created_at'
+}
+
+def column_ddl(column, dialect):
+    """Definição usada no ALTER TABLE ADD COLUMN"""
+    ddl = f'"{column.name}" {column.type.compile(dialect=dialect)}'
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if isinstance(default, bool):
+        default = int(default)
+    if default is not None:
+        ddl += f" DEFAULT {default!r}"
+        if not column.nullable:
+            ddl += " NOT NULL"
+    return ddl
+
+def seed_life_areas(conn, metadata, existing):
+    """
+    Insere os modelos de áreas que faltam e converte as tabelas antigas de
+    áreas por usuário, mantendo apenas as pontuações diferentes do modelo
+    """
+    changes = []
+    if 'life_area_templates' not in metadata.tables:
+        return changes
+    templates = metadata.tables['life_area_templates']
+    overrides = metadata.tables['life_area_overrides']
+    
+    present = {row.id for row in conn.execute(select(templates.c.id))}
+    missing = [row for row in life_area_template_rows() if row['id'] not in present]
+    if missing:
+        conn.execute(templates.insert(), missing)
+        changes.append(f"{len(missing)} modelo(s) de área inserido(s)")
+    
+    for legacy_name in LEGACY_LIFE_AREA_TABLES:
+        if legacy_name not in existing:
+            continue
+        legacy = Table(legacy_name, MetaData(), autoload_with=conn)
+        copied = conn.execute(
+            overrides.insert().from_select(
+                ['user_id', 'area_id', 'score', 'last_updated'],
+                select(legacy.c.user_id, legacy.c.id, legacy.c.score, legacy.c.last_updated)
+                .join(templates, templates.c.id == legacy.c.id)
+                .where(legacy.c.score != templates.c.default_score)
+            )
+        ).rowcount
+        conn.exec_driver_sql(f'DROP TABLE "{legacy_name}"')
+        changes.append(f"tabela {legacy_name} convertida em {copied} pontuação(ões) alterada(s)")
+    return changes
+
+def migrate_schema(engine, metadata):
+    """
+    Aplica ao banco as tabelas, colunas e índices de `metadata` que ainda não
+    existem. Pode ser executada várias vezes; sem pendências, nada é alterado.
+    
+    Args:
+        engine: Engine do banco a migrar
+        metadata (MetaData): Esquema desejado
+    
+    Returns:
+        list: Descrição de cada alteração aplicada
+    """
+    changes = []
+    with engine.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+        renamed = set()
+        for old_name, new_name in LEGACY_TABLE_NAMES.items():
+            if old_name in existing and new_name not in existing and new_name in metadata.tables:
+                # O SQLite atualiza as chaves estrangeiras das demais tabelas
+                conn.exec_driver_sql(f'ALTER TABLE "{old_name}" RENAME TO "{new_name}"')
+                renamed.add(new_name)
+                changes.append(f"tabela {old_name} renomeada para {new_name}")
+        
+        missing_tables = [table for table in metadata.sorted_tables
+                          if table.name not in existing | renamed]
+        metadata.create_all(conn, tables=missing_tables)
+        changes.extend(f"tabela {table.name} criada" for table in missing_tables)
+        
+        inspector = inspect(conn)
+        created_indexes = False
+        for table in metadata.sorted_tables:
+            if table in missing_tables:
+                continue
+            
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                conn.exec_driver_sql(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN {column_ddl(column, conn.dialect)}'
+                )
+                source = COLUMN_BACKFILLS.get((table.name, column.name))
+                if source:
+                    conn.exec_driver_sql(
+                        f'UPDATE "{table.name}" SET "{column.name}" = "{source}" '
+                        f'WHERE "{column.name}" IS NULL'
+                    )
+                changes.append(f"coluna {table.name}.{column.name} adicionada")
+            
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            declared = {index.name for index in table.indexes}
+            if table.name in renamed:
+                # Índices das versões antigas, substituídos pelos declarados
+                for name in sorted(indexes - declared):
+                    conn.exec_driver_sql(f'DROP INDEX "{name}"')
+                    changes.append(f"índice {name} removido")
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+                    created_indexes = True
+                    changes.append(f"índice {index.name} criado")
+        
+        changes.extend(seed_life_areas(conn, metadata, existing))
+        if 'tasks' in metadata.tables:
+            changes.extend(ensure_task_search_index(conn))
+        
+        if created_indexes:
+            # Estatísticas para o planejador escolher entre os índices novos
+            conn.exec_driver_sql('ANALYZE')
+        record_schema_version(conn)
+    return changes
+
+def read_schema_version(conn):
+    """Versão registrada no banco (None em bancos anteriores ao controle de versão)"""
+    if not inspect(conn).has_table(schema_version_table.name):
+        return None
+    return conn.execute(select(schema_version_table.c.version)).scalar()
+
+def record_schema_version(conn):
+    """Registra SCHEMA_VERSION, sem rebaixar a de um banco já migrado por versão mais nova"""
+    current = read_schema_version(conn)
+    if current is not None and current >= SCHEMA_VERSION:
+        return
+    schema_version_table.create(conn, checkfirst=True)
+    conn.execute(schema_version_table.delete())
+    conn.execute(schema_version_table.insert().values(version=SCHEMA_VERSION))
+
+def schema_is_current(engine):
+    """Indica se o banco já está na versão de models.py (uma consulta, sem inspecionar tabelas)"""
+    with engine.connect() as conn:
+        version = read_schema_version(conn)
+    return version is not None and version >= SCHEMA_VERSION
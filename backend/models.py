@@ -1,9 +1,42 @@
+from flask import current_app, g
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_sqlalchemy.session import Session as FlaskSQLAlchemySession
+from sqlalchemy import inspect as sa_inspect, MetaData
 from datetime import datetime
+from collections import namedtuple
 import uuid
 
-db = SQLAlchemy()
+from recurrence import recurrence_to_dict
+from utils import photo_url, photo_variant_urls
+
+# Tabelas com dados do usuário, distribuídas entre os shards (ver app.py)
+SHARDED_TABLE_NAMES = {
+    'tasks', 'task_occurrences', 'task_tombstones', 'task_occurrence_tombstones',
+    'user_versions', 'user_stats', 'life_area_overrides', 'life_area_score_events', 'life_area_score_rollups'
+}
+# Tabelas de referência, copiadas em todos os shards para as junções locais
+REPLICATED_TABLE_NAMES = {'life_area_templates'}
+
+class ShardRoutingSession(FlaskSQLAlchemySession):
+    """Sessão que envia as tabelas de dados do usuário para o shard dele"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # Cada shard adicional é um bind (shard1, shard2...); o shard 0 é o padrão
+        engines = self._db.engines
+        if bind is None and len(engines) > 1:
+            table = None
+            if mapper is not None:
+                table = sa_inspect(mapper).local_table
+            elif clause is not None:
+                table = getattr(clause, 'table', clause)
+            if getattr(table, 'name', None) in SHARDED_TABLE_NAMES | REPLICATED_TABLE_NAMES:
+                shard = g.get('user_shard')
+                if shard is None:
+                    raise RuntimeError('Shard do usuário não definido para esta consulta')
+                return engines[None] if shard == 0 else engines[f'shard{shard}']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(session_options={'class_': ShardRoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -18,27 +51,67 @@ class User(db.Model):
     
     # Relacionamentos
     tasks = db.relationship('Task', backref='user', lazy=True, cascade='all, delete-orphan')
-    life_areas = db.relationship('LifeArea', backref='user', lazy=True, cascade='all, delete-orphan')
+    life_area_overrides = db.relationship('LifeAreaOverride', backref='user', lazy=True, cascade='all, delete-orphan')
 
+    # O hash roda no PasswordHasher da aplicação (ver passwords.py)
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = current_app.extensions['password_hasher'].hash(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return current_app.extensions['password_hasher'].verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return current_app.extensions['password_hasher'].needs_rehash(self.password_hash)
 
     def to_dict(self):
         return {
             'id': self.id,
             'email': self.email,
             'name': self.name,
-            'photo': self.photo,
+            'photo': photo_url(self.photo),
+            'photoVariants': photo_variant_urls(self.photo),
             'createdAt': self.created_at.isoformat(),
-            'updatedAt': self.updated_at.isoformat()
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
         }
 
     def __repr__(self):
         return f'<User {self.email}>'
 
+class UserIdentity(namedtuple('UserIdentity', [
+    'id', 'email', 'name', 'photo', 'has_inline_photo', 'created_at', 'updated_at', 'version'
+], defaults=(None,))):
+    """
+    Projeção leve de User para o cache de identidade: fotos ainda guardadas em
+    base64 no banco ficam de fora (photo=None, has_inline_photo=True).
+    `version` é a versão dos dados do usuário (user_versions) já lida quando a
+    linha foi carregada, ou None se desconhecida.
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def columns():
+        inline_photo = User.photo.like('data:%')
+        return (
+            User.id,
+            User.email,
+            User.name,
+            db.case((inline_photo, None), else_=User.photo),
+            db.func.coalesce(inline_photo, False),
+            User.created_at,
+            User.updated_at
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'email': self.email,
+            'name': self.name,
+            'photo': photo_url(self.photo),
+            'photoVariants': photo_variant_urls(self.photo),
+            'createdAt': self.created_at.isoformat(),
+            'updatedAt': self.updated_at.isoformat() if self.updated_at else None
+        }
+
 class Task(db.Model):
     __tablename__ = 'tasks'
     
@@ -52,6 +125,18 @@ class Task(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    # Regra RRULE (ver recurrence.py); a primeira ocorrência é due_date, ou created_at
+    recurrence = db.Column(db.String(100), nullable=True)
+
+    # Índices compostos das consultas por usuário: paginação por cursor sobre
+    # (created_at, id), com ou sem o filtro de conclusão, sincronização e agenda
+    __table_args__ = (
+        db.Index('ix_tasks_user_created_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_tasks_user_completed_created', 'user_id', 'completed', 'created_at', 'id'),
+        db.Index('ix_tasks_user_updated', 'user_id', 'updated_at'),
+        db.Index('ix_tasks_user_due', 'user_id', 'due_date'),
+        db.Index('ix_tasks_user_recurrence', 'user_id', 'recurrence'),
+    )
 
     def to_dict(self):
         return {
@@ -64,33 +149,248 @@ class Task(db.Model):
             'dueDate': self.due_date.isoformat() if self.due_date else None,
             'createdAt': self.created_at.isoformat(),
             'updatedAt': self.updated_at.isoformat(),
-            'userId': self.user_id
+            'userId': self.user_id,
+            'recurrence': recurrence_to_dict(self.recurrence)
         }
 
     def __repr__(self):
         return f'<Task {self.title}>'
 
-class LifeArea(db.Model):
-    __tablename__ = 'life_areas'
+class TaskOccurrence(db.Model):
+    """
+    Ocorrência de uma tarefa recorrente alterada pelo usuário: concluída,
+    pulada ou remarcada. As demais ocorrências são calculadas pela regra.
+    """
+    __tablename__ = 'task_occurrences'
+
+    task_id = db.Column(db.String(36), db.ForeignKey('tasks.id'), primary_key=True)
+    # Data prevista pela regra, que identifica a ocorrência
+    occurrence_date = db.Column(db.DateTime, primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    completed = db.Column(db.Boolean, default=False, nullable=False)
+    skipped = db.Column(db.Boolean, default=False, nullable=False)
+    # Nova data, quando remarcada
+    due_date = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Ocorrências remarcadas para dentro do intervalo consultado na agenda
+    __table_args__ = (
+        db.Index('ix_task_occurrences_user_due', 'user_id', 'due_date'),
+    )
+
+    def to_dict(self):
+        return {
+            'taskId': self.task_id,
+            'occurrenceDate': self.occurrence_date.isoformat(),
+            'completed': self.completed,
+            'skipped': self.skipped,
+            'dueDate': self.due_date.isoformat() if self.due_date else None
+        }
+
+    def __repr__(self):
+        return f'<TaskOccurrence {self.task_id} {self.occurrence_date}>'
+
+class TaskTombstone(db.Model):
+    """Registro de tarefas excluídas, usado pela sincronização incremental"""
+    __tablename__ = 'task_tombstones'
+    
+    task_id = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_task_tombstones_user_deleted', 'user_id', 'deleted_at'),
+    )
+
+    def __repr__(self):
+        return f'<TaskTombstone {self.task_id}>'
+
+class TaskOccurrenceTombstone(db.Model):
+    """
+    Ocorrências que deixaram de ser gravadas (desfeitas, da regra anterior ou
+    de tarefa excluída), usado pela sincronização incremental. Uma ocorrência
+    fica em task_occurrences ou aqui, nunca nas duas.
+    """
+    __tablename__ = 'task_occurrence_tombstones'
+    
+    task_id = db.Column(db.String(36), primary_key=True)
+    occurrence_date = db.Column(db.DateTime, primary_key=True)
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_task_occurrence_tombstones_user_deleted', 'user_id', 'deleted_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'taskId': self.task_id,
+            'occurrenceDate': self.occurrence_date.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<TaskOccurrenceTombstone {self.task_id} {self.occurrence_date}>'
+
+class UserVersion(db.Model):
+    """Versão dos dados do usuário, incrementada a cada escrita (base dos ETags)"""
+    __tablename__ = 'user_versions'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserVersion {self.user_id} v{self.version}>'
+
+class UserStats(db.Model):
+    """Contadores agregados por usuário, mantidos pelas rotas de escrita"""
+    __tablename__ = 'user_stats'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    total_tasks = db.Column(db.Integer, nullable=False, default=0)
+    completed_tasks = db.Column(db.Integer, nullable=False, default=0)
+    high_priority_open = db.Column(db.Integer, nullable=False, default=0)
+    life_score_sum = db.Column(db.Integer, nullable=False, default=0)
+    life_area_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserStats {self.user_id}>'
+
+class PhotoJob(db.Model):
+    """Processamento de foto de perfil executado fora da requisição"""
+    __tablename__ = 'photo_jobs'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, done, failed
+    error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'createdAt': self.created_at.isoformat(),
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<PhotoJob {self.id} {self.status}>'
+
+class UserShard(db.Model):
+    """Diretório global: em qual shard ficam os dados de cada usuário"""
+    __tablename__ = 'user_shards'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    shard = db.Column(db.Integer, nullable=False, default=0, index=True)
+    locked = db.Column(db.Boolean, nullable=False, default=False)  # em migração
+
+    def __repr__(self):
+        return f'<UserShard {self.user_id} -> {self.shard}>'
+
+class LifeAreaTemplate(db.Model):
+    """Áreas da Roda da Vida comuns a todos os usuários, com a pontuação inicial"""
+    __tablename__ = 'life_area_templates'
     
     id = db.Column(db.String(36), primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    score = db.Column(db.Integer, default=5)
     color = db.Column(db.String(7), nullable=False)
     icon = db.Column(db.String(50), nullable=False)
-    last_updated = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False, index=True)
+    default_score = db.Column(db.Integer, nullable=False, default=5)
+    position = db.Column(db.Integer, nullable=False, default=0)
 
-    def to_dict(self):
+    def to_dict(self, user_id, score=None, last_updated=None):
+        """Área do usuário: o modelo com a pontuação alterada, se houver"""
         return {
             'id': self.id,
             'name': self.name,
-            'score': self.score,
+            'score': score if score is not None else self.default_score,
             'color': self.color,
             'icon': self.icon,
-            'lastUpdated': self.last_updated.isoformat(),
-            'userId': self.user_id
+            'lastUpdated': last_updated.isoformat() if last_updated else None,
+            'userId': user_id
+        }
+
+    def __repr__(self):
+        return f'<LifeAreaTemplate {self.name}>'
+
+class LifeAreaOverride(db.Model):
+    """Pontuação de uma área alterada pelo usuário; as demais seguem o modelo"""
+    __tablename__ = 'life_area_overrides'
+    
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    area_id = db.Column(db.String(36), db.ForeignKey('life_area_templates.id'), primary_key=True)
+    score = db.Column(db.Integer, nullable=False)
+    last_updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_life_area_overrides_user_updated', 'user_id', 'last_updated'),
+    )
+
+    def __repr__(self):
+        return f'<LifeAreaOverride {self.user_id} {self.area_id}={self.score}>'
+
+class LifeAreaScoreEvent(db.Model):
+    """Histórico de pontuações (somente inserção), uma linha por alteração"""
+    __tablename__ = 'life_area_score_events'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    area_id = db.Column(db.String(36), db.ForeignKey('life_area_templates.id'), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_life_area_score_events_user_area_recorded', 'user_id', 'area_id', 'recorded_at'),
+    )
+
+    def __repr__(self):
+        return f'<LifeAreaScoreEvent {self.user_id} {self.area_id}={self.score}>'
+
+class LifeAreaScoreRollup(db.Model):
+    """Agregado do histórico por período (dia, semana ou mês), atualizado a cada alteração"""
+    __tablename__ = 'life_area_score_rollups'
+    
+    # A chave segue a consulta do gráfico: usuário, granularidade e intervalo
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    bucket = db.Column(db.String(5), primary_key=True)  # day, week, month
+    bucket_start = db.Column(db.DateTime, primary_key=True)
+    area_id = db.Column(db.String(36), db.ForeignKey('life_area_templates.id'), primary_key=True)
+    min_score = db.Column(db.Integer, nullable=False)
+    max_score = db.Column(db.Integer, nullable=False)
+    score_sum = db.Column(db.Integer, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+
+    def to_dict(self):
+        return {
+            'start': self.bucket_start.isoformat(),
+            'min': self.min_score,
+            'max': self.max_score,
+            'avg': round(self.score_sum / self.sample_count, 2),
+            'count': self.sample_count
         }
 
     def __repr__(self):
-        return f'<LifeArea {self.name}>'
\ No newline at end of file
+        return f'<LifeAreaScoreRollup {self.user_id} {self.area_id} {self.bucket} {self.bucket_start}>'
+
+def build_shard_metadata():
+    """
+    Tabelas dos shards adicionais: as mesmas do banco principal, mas sem chaves
+    estrangeiras, já que a tabela de usuários existe apenas no shard 0
+    """
+    metadata = MetaData()
+    for table in db.metadata.sorted_tables:
+        if table.name not in SHARDED_TABLE_NAMES | REPLICATED_TABLE_NAMES:
+            continue
+        shard_table = db.Table(table.name, metadata, *[
+            db.Column(column.name, column.type, primary_key=column.primary_key,
+                      nullable=column.nullable)
+            for column in table.columns
+        ])
+        for index in table.indexes:
+            db.Index(index.name, *[shard_table.c[column.name] for column in index.columns],
+                     unique=index.unique)
+    return metadata
+
+shard_metadata = build_shard_metadata()
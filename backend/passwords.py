@@ -0,0 +1,62 @@
+"""
+Hash de senhas fora das threads das requisições.
+
+O PBKDF2 (e o scrypt) consome dezenas de milissegundos de CPU por senha; uma
+rajada de logins ocupando todas as threads trava também as rotas de tarefas.
+O PasswordHasher limita quantos hashes rodam ao mesmo tempo e quanto tempo uma
+requisição espera por uma vaga.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class PasswordHasherBusy(Exception):
+    """Todas as vagas de hash seguiram ocupadas durante o tempo de espera"""
+
+class PasswordHasher:
+    """
+    Executor de hashes de senha com concorrência limitada.
+
+    Args:
+        method (str): Método do Werkzeug (ex.: pbkdf2:sha256:600000, scrypt)
+        salt_length (int): Tamanho do salt
+        workers (int): Hashes simultâneos
+        queue_timeout (float): Espera máxima por uma vaga, em segundos
+    """
+
+    def __init__(self, method, salt_length, workers, queue_timeout):
+        self.method = method
+        self.salt_length = salt_length
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._current_prefix = None
+
+    def _run(self, func, *args):
+        # As vagas acompanham os workers: a espera acontece aqui, com limite,
+        # e não na fila interna do executor
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHasherBusy()
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Indica se o hash foi gerado com parâmetros diferentes dos atuais"""
+        if self._current_prefix is None:
+            # O Werkzeug completa métodos abreviados (pbkdf2 -> pbkdf2:sha256:600000);
+            # um hash de referência mostra a forma usada de fato
+            method, salt, _ = self.hash('').split('$', 2)
+            self._current_prefix = (method, len(salt))
+        method, salt, _ = password_hash.split('$', 2)
+        return (method, len(salt)) != self._current_prefix
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
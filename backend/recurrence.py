@@ -0,0 +1,153 @@
+"""
+Regras de recorrência das tarefas.
+
+A regra fica em uma única coluna de Task, no formato RRULE (RFC 5545) restrito
+a FREQ, INTERVAL, COUNT e UNTIL; ex.: FREQ=WEEKLY;INTERVAL=2;COUNT=10. As
+ocorrências não são gravadas: iter_occurrences as calcula sob demanda, apenas
+dentro do intervalo pedido. Só as ocorrências alteradas pelo usuário
+(concluídas, puladas ou remarcadas) viram linhas em task_occurrences.
+"""
+import calendar
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+FREQUENCIES = ('daily', 'weekly', 'monthly')
+MAX_INTERVAL = 366
+
+UNTIL_FORMAT = '%Y%m%dT%H%M%S'
+
+class RecurrenceRule(namedtuple('RecurrenceRule', 'freq interval count until')):
+    """
+    Regra de recorrência.
+
+    Args:
+        freq (str): daily, weekly ou monthly
+        interval (int): A cada quantos dias, semanas ou meses
+        count (int): Quantidade total de ocorrências (None: sem limite)
+        until (datetime): Última data possível (None: sem limite)
+    """
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, value):
+        """
+        Aceita a regra no formato da API ({"freq": "weekly", "interval": 2,
+        "count": 10, "until": "2026-12-31T00:00:00"}) ou como texto RRULE.
+
+        Raises:
+            ValueError: Regra inválida
+        """
+        if isinstance(value, str):
+            try:
+                parts = dict(part.split('=', 1) for part in value.strip().split(';') if part)
+            except ValueError:
+                raise ValueError('Regra de recorrência inválida')
+            value = {key.lower(): item for key, item in parts.items()}
+            if value.get('until'):
+                try:
+                    value['until'] = datetime.strptime(value['until'], UNTIL_FORMAT)
+                except ValueError:
+                    raise ValueError('Data final da recorrência inválida')
+        if not isinstance(value, dict):
+            raise ValueError('Regra de recorrência inválida')
+
+        freq = str(value.get('freq', '')).lower()
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Frequência deve ser uma de: {', '.join(FREQUENCIES)}")
+        try:
+            interval = int(value['interval']) if value.get('interval') is not None else 1
+            count = int(value['count']) if value.get('count') is not None else None
+        except (TypeError, ValueError):
+            raise ValueError('Intervalo e quantidade da recorrência devem ser inteiros')
+        if not 1 <= interval <= MAX_INTERVAL:
+            raise ValueError(f'Intervalo da recorrência deve estar entre 1 e {MAX_INTERVAL}')
+        if count is not None and count < 1:
+            raise ValueError('Quantidade de ocorrências deve ser positiva')
+
+        until = value.get('until')
+        if isinstance(until, str):
+            try:
+                until = datetime.fromisoformat(until.replace('Z', '+00:00'))
+            except ValueError:
+                raise ValueError('Data final da recorrência inválida')
+        if until is not None:
+            # As datas gravadas não têm fuso (UTC)
+            until = until.replace(tzinfo=None, microsecond=0)
+        return cls(freq, interval, count, until)
+
+    def to_rrule(self):
+        parts = [f'FREQ={self.freq.upper()}', f'INTERVAL={self.interval}']
+        if self.count is not None:
+            parts.append(f'COUNT={self.count}')
+        if self.until is not None:
+            parts.append(f'UNTIL={self.until.strftime(UNTIL_FORMAT)}')
+        return ';'.join(parts)
+
+    def to_dict(self):
+        return {
+            'freq': self.freq,
+            'interval': self.interval,
+            'count': self.count,
+            'until': self.until.isoformat() if self.until else None
+        }
+
+def recurrence_to_dict(rrule):
+    """Converte a coluna Task.recurrence para o formato da API"""
+    return RecurrenceRule.parse(rrule).to_dict() if rrule else None
+
+def recurrence_from_data(value):
+    """Converte a regra enviada pelo cliente para a coluna (vazio remove a regra)"""
+    return RecurrenceRule.parse(value).to_rrule() if value else None
+
+def add_months(moment, months):
+    """Soma meses mantendo o dia, limitado ao último dia do mês (31/01 + 1 = 28/02)"""
+    month_index = moment.month - 1 + months
+    year, month = moment.year + month_index // 12, month_index % 12 + 1
+    day = min(moment.day, calendar.monthrange(year, month)[1])
+    return moment.replace(year=year, month=month, day=day)
+
+def iter_occurrences(rule, start, window_from=None, window_to=None):
+    """
+    Gera, em ordem, as datas das ocorrências da regra iniciada em `start` que
+    caem em [window_from, window_to]. As anteriores a window_from são puladas
+    por conta, sem serem geradas uma a uma.
+
+    Args:
+        rule (RecurrenceRule): Regra da tarefa
+        start (datetime): Primeira ocorrência
+        window_from (datetime): Início do intervalo (None: desde start)
+        window_to (datetime): Fim do intervalo (None: enquanto a regra permitir)
+
+    Yields:
+        datetime: Data de cada ocorrência
+    """
+    if rule.freq == 'monthly':
+        def nth(index):
+            return add_months(start, index * rule.interval)
+        first = 0
+        if window_from is not None and window_from > start:
+            months = (window_from.year - start.year) * 12 + window_from.month - start.month
+            # Pode ficar uma ocorrência antes da janela; o laço a descarta
+            first = max(0, months // rule.interval - 1)
+    else:
+        step = timedelta(days=rule.interval * (7 if rule.freq == 'weekly' else 1))
+        def nth(index):
+            return start + step * index
+        first = 0
+        if window_from is not None and window_from > start:
+            first = -((start - window_from) // step)
+
+    index = first
+    while rule.count is None or index < rule.count:
+        occurrence = nth(index)
+        if rule.until is not None and occurrence > rule.until:
+            return
+        if window_to is not None and occurrence > window_to:
+            return
+        if window_from is None or occurrence >= window_from:
+            yield occurrence
+        index += 1
+
+def is_occurrence(rule, start, moment):
+    """Indica se `moment` é uma das datas geradas pela regra"""
+    return next(iter_occurrences(rule, start, moment, moment), None) == moment
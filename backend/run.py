@@ -1,10 +1,319 @@
 #!/usr/bin/env python3
 """
 Script para executar o servidor Precrastine-se
+
+Com WORKERS=0 (padrão) ou em desenvolvimento, usa o servidor do Flask em um
+único processo. Com WORKERS=N, o processo mestre abre o socket, prepara o banco
+uma única vez e cria N processos (pre-fork) que atendem no mesmo socket:
+
+    WORKERS=4 python run.py
+
+Sinais aceitos pelo mestre:
+    SIGHUP           recarrega: sobe novos workers (com o código atual) e, quando
+                     estiverem prontos, encerra os antigos sem derrubar requisições
+    SIGTERM/SIGINT   encerra os workers com calma e sai
 """
 
 import os
-from app import app, db, init_db
+import sys
+import time
+import errno
+import random
+import signal
+import socket
+import select
+import threading
+from werkzeug.serving import make_server
+from werkzeug.wsgi import ClosingIterator
+
+def worker_settings():
+    """Configurações do modo pre-fork, lidas do ambiente como HOST e PORT"""
+    return {
+        # Requisições atendidas por um worker antes de ser substituído (0: sem limite)
+        'max_requests': int(os.environ.get('WORKER_MAX_REQUESTS', 10000)),
+        # Variação aleatória do limite, para os workers não reiniciarem juntos
+        'max_requests_jitter': int(os.environ.get('WORKER_MAX_REQUESTS_JITTER', 1000)),
+        # Espera pelas requisições em andamento ao encerrar um worker, em segundos
+        'graceful_timeout': float(os.environ.get('WORKER_GRACEFUL_TIMEOUT', 30)),
+        # Tempo máximo para um worker novo ficar pronto
+        'boot_timeout': float(os.environ.get('WORKER_BOOT_TIMEOUT', 60))
+    }
+
+def print_banner(host, port, debug, workers=0):
+    print("=" * 60)
+    print("🚀 PRECRASTINE-SE BACKEND")
+    print("=" * 60)
+    print(f"📊 API disponível em: http://{host}:{port}/api")
+    print(f"🔍 Health check: http://{host}:{port}/api/health")
+    if os.environ.get('SEED_DEMO_DATA', 'false').lower() in ('true', '1', 'yes'):
+        print(f"👤 Usuário demo: demo@precrastine.com / demo123")
+    print(f"🛠️  Modo: {'Desenvolvimento' if debug else 'Produção'}")
+    if workers:
+        print(f"⚙️  Workers: {workers} (pid do mestre: {os.getpid()})")
+    print("=" * 60)
+
+class RequestCounter:
+    """
+    Middleware WSGI que conta as requisições atendidas e as em andamento.
+    Uma resposta em fluxo só termina quando o servidor fecha seu iterador.
+    """
+    
+    def __init__(self, app, max_requests, on_limit):
+        self.app = app
+        self.max_requests = max_requests
+        self.on_limit = on_limit
+        self.handled = 0
+        self.active = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.active += 1
+            self.handled += 1
+            reached = self.max_requests and self.handled == self.max_requests
+        if reached:
+            self.on_limit()
+        try:
+            app_iter = self.app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        return ClosingIterator(app_iter, [self._finished])
+    
+    def _finished(self):
+        with self._lock:
+            self.active -= 1
+
+def worker_main(listener, host, port, ready_fd, settings):
+    """
+    Corpo de um worker: importa e aquece a aplicação, avisa o mestre que está
+    pronto e atende no socket compartilhado até receber SIGTERM, atingir o
+    limite de requisições ou perder o mestre.
+    """
+    from app import app, db, shutdown_photo_executor
+    
+    master_pid = os.getppid()
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    
+    # Aquecimento: conexões com todos os bancos e uma requisição completa,
+    # antes de aceitar tráfego
+    with app.app_context():
+        for engine in db.engines.values():
+            with engine.connect() as conn:
+                conn.exec_driver_sql('SELECT 1')
+    app.test_client().get('/api/health')
+    
+    stopping = threading.Event()
+    max_requests = settings['max_requests']
+    if max_requests:
+        max_requests += random.randint(0, settings['max_requests_jitter'])
+    counter = RequestCounter(app, max_requests, lambda: stopping.set())
+    server = make_server(host, port, counter, threaded=True, fd=listener.fileno())
+    # Vários processos aguardam no mesmo socket: quem não conseguir o accept
+    # volta a esperar, em vez de ficar bloqueado
+    server.socket.setblocking(False)
+    
+    def stop(signum=None, frame=None):
+        stopping.set()
+    signal.signal(signal.SIGTERM, stop)
+    
+    def watch():
+        # serve_forever só termina por shutdown() chamado de outra thread
+        while not stopping.wait(1):
+            if os.getppid() != master_pid:
+                break
+        server.shutdown()
+    threading.Thread(target=watch, daemon=True).start()
+    
+    if ready_fd is not None:
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+    server.serve_forever(poll_interval=0.5)
+    
+    # Para de aceitar conexões, encerra os fluxos SSE (que não terminam
+    # sozinhos) e espera as requisições em andamento
+    server.socket.close()
+    app.extensions['event_bus'].close()
+    deadline = time.monotonic() + settings['graceful_timeout']
+    while counter.active and time.monotonic() < deadline:
+        time.sleep(0.1)
+    # Depois, no mesmo prazo, os jobs de foto deste worker: o pool de
+    # processos morre com ele
+    with app.app_context():
+        shutdown_photo_executor(deadline - time.monotonic())
+
+class Master:
+    """
+    Processo mestre: mantém WORKERS processos atendendo no mesmo socket,
+    substitui os que saem e faz a recarga gradual com SIGHUP.
+    """
+    
+    def __init__(self, host, port, workers, settings):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.settings = settings
+        self.listener = None
+        self.children = {}  # pid -> geração
+        self.generation = 0
+        self.stopping = False
+        self.reload_requested = False
+    
+    def run(self):
+        self.listener = socket.create_server(
+            (self.host, self.port), family=socket.AF_INET6 if ':' in self.host else socket.AF_INET,
+            backlog=2048
+        )
+        if not self.prepare_database(cold_start=True):
+            sys.exit(1)
+        
+        signal.signal(signal.SIGTERM, self.handle_stop)
+        signal.signal(signal.SIGINT, self.handle_stop)
+        signal.signal(signal.SIGHUP, self.handle_reload)
+        
+        self.generation += 1
+        for _ in range(self.workers):
+            self.spawn_worker()
+        
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload()
+            self.reap_workers()
+            current = [pid for pid, generation in self.children.items() if generation == self.generation]
+            for _ in range(self.workers - len(current)):
+                self.spawn_worker()
+            time.sleep(0.5)
+        
+        self.stop_workers(list(self.children))
+        self.listener.close()
+    
+    def handle_stop(self, signum, frame):
+        self.stopping = True
+    
+    def handle_reload(self, signum, frame):
+        self.reload_requested = True
+    
+    def prepare_database(self, cold_start):
+        """
+        Executa init_db() uma única vez, antes dos workers. Roda em um processo
+        filho para que o mestre não carregue a aplicação: assim cada recarga
+        usa o código atual. Na recarga (cold_start=False) os workers antigos
+        ainda atendem, e os jobs de foto pendentes deles são preservados.
+        """
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                from app import app, init_db
+                with app.app_context():
+                    init_db(cold_start=cold_start)
+                code = 0
+            except Exception as e:
+                print(f"❌ Erro ao preparar o banco de dados: {e}", file=sys.stderr)
+            finally:
+                sys.stdout.flush()
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        return os.waitstatus_to_exitcode(status) == 0
+    
+    def spawn_worker(self, ready=False):
+        """Cria um worker; com ready=True, devolve também o descritor do aviso de pronto"""
+        read_fd, write_fd = os.pipe() if ready else (None, None)
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                if read_fd is not None:
+                    os.close(read_fd)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                worker_main(self.listener, self.host, self.port, write_fd, self.settings)
+                code = 0
+            except Exception as e:
+                print(f"❌ Worker {os.getpid()} falhou: {e}", file=sys.stderr)
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.children[pid] = self.generation
+        if write_fd is not None:
+            os.close(write_fd)
+        return pid, read_fd
+    
+    def reap_workers(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if self.children.pop(pid, None) == self.generation and not self.stopping:
+                print(f"♻️  Worker {pid} saiu (código {os.waitstatus_to_exitcode(status)}); substituindo")
+    
+    def reload(self):
+        """Sobe uma nova geração de workers e só então encerra a anterior"""
+        print("🔄 Recarregando workers")
+        if not self.prepare_database(cold_start=False):
+            print("❌ Recarga cancelada: falha ao preparar o banco de dados", file=sys.stderr)
+            return
+        old = [pid for pid, generation in self.children.items() if generation == self.generation]
+        self.generation += 1
+        started = [self.spawn_worker(ready=True) for _ in range(self.workers)]
+        
+        deadline = time.monotonic() + self.settings['boot_timeout']
+        ready = True
+        for pid, read_fd in started:
+            ready = ready and self.wait_ready(read_fd, deadline)
+            os.close(read_fd)
+        if not ready:
+            print("❌ Recarga cancelada: novos workers não ficaram prontos", file=sys.stderr)
+            self.stop_workers([pid for pid, _ in started])
+            self.generation -= 1
+            return
+        self.stop_workers(old)
+    
+    def wait_ready(self, read_fd, deadline):
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                readable, _, _ = select.select([read_fd], [], [], remaining)
+            except InterruptedError:
+                continue
+            # Um worker que morre antes de ficar pronto fecha o pipe sem escrever
+            return bool(readable) and os.read(read_fd, 1) == b'1'
+    
+    def stop_workers(self, pids):
+        """SIGTERM e espera o encerramento; após o tempo limite, SIGKILL"""
+        for pid in pids:
+            self.signal_worker(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.settings['graceful_timeout'] + 5
+        pending = set(pids)
+        while pending and time.monotonic() < deadline:
+            for pid in list(pending):
+                try:
+                    finished, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    finished = pid
+                if finished:
+                    pending.discard(pid)
+                    self.children.pop(pid, None)
+            time.sleep(0.1)
+        for pid in pending:
+            self.signal_worker(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self.children.pop(pid, None)
+    
+    @staticmethod
+    def signal_worker(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
 
 def main():
     """Função principal para iniciar o servidor"""
@@ -14,23 +323,25 @@ def main():
         from dotenv import load_dotenv
         load_dotenv()
     
-    # Inicializa o banco de dados
-    with app.app_context():
-        init_db()
-    
     # Configurações do servidor
     host = os.environ.get('HOST', '0.0.0.0')
     port = int(os.environ.get('PORT', 5000))
     debug = os.environ.get('FLASK_ENV') == 'development'
+    # Processos pre-fork (0: servidor do Flask em um único processo)
+    workers = int(os.environ.get('WORKERS', 0))
     
-    print("=" * 60)
-    print("🚀 PRECRASTINE-SE BACKEND")
-    print("=" * 60)
-    print(f"📊 API disponível em: http://{host}:{port}/api")
-    print(f"🔍 Health check: http://{host}:{port}/api/health")
-    print(f"👤 Usuário demo: demo@precrastine.com / demo123")
-    print(f"🛠️  Modo: {'Desenvolvimento' if debug else 'Produção'}")
-    print("=" * 60)
+    if workers > 0 and not debug and hasattr(os, 'fork'):
+        print_banner(host, port, debug, workers)
+        Master(host, port, workers, worker_settings()).run()
+        return
+    
+    from app import app, init_db
+    
+    # Inicializa o banco de dados
+    with app.app_context():
+        init_db()
+    
+    print_banner(host, port, debug)
     
     # Inicia o servidor
     app.run(
@@ -41,4 +352,4 @@ def main():
     )
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
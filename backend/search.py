@@ -0,0 +1,93 @@
+"""
+Busca textual nas tarefas com o FTS5 do SQLite.
+
+O índice tasks_fts usa a própria tabela tasks como conteúdo (external content):
+guarda apenas os termos de título, descrição e dono, e é mantido por gatilhos
+no banco, de modo que toda escrita em tasks (rotas, lote, importação, mudança
+de shard) o atualiza. O dono entra no índice para que a busca percorra só as
+tarefas do usuário, e não as de todos os usuários do banco.
+"""
+import re
+
+from sqlalchemy import column, literal_column, table, text
+
+TASK_SEARCH_TABLE = 'tasks_fts'
+
+# Pesos do BM25 por coluna (title, description, user_id); o dono só filtra
+TASK_SEARCH_RANK = 'bm25(10.0, 1.0, 0.0)'
+
+TASK_SEARCH_DDL = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TASK_SEARCH_TABLE} USING fts5(
+        title, description, user_id,
+        content='tasks', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+        INSERT INTO {TASK_SEARCH_TABLE}(rowid, title, description, user_id)
+        VALUES (new.rowid, new.title, new.description, new.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+        INSERT INTO {TASK_SEARCH_TABLE}({TASK_SEARCH_TABLE}, rowid, title, description, user_id)
+        VALUES ('delete', old.rowid, old.title, old.description, old.user_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_update
+    AFTER UPDATE OF title, description, user_id ON tasks BEGIN
+        INSERT INTO {TASK_SEARCH_TABLE}({TASK_SEARCH_TABLE}, rowid, title, description, user_id)
+        VALUES ('delete', old.rowid, old.title, old.description, old.user_id);
+        INSERT INTO {TASK_SEARCH_TABLE}(rowid, title, description, user_id)
+        VALUES (new.rowid, new.title, new.description, new.user_id);
+    END""",
+)
+
+# Colunas do índice usadas nas consultas e junção com tasks
+task_search = table(TASK_SEARCH_TABLE, column('rowid'), column('rank'))
+task_search_join = task_search.c.rowid == literal_column('tasks.rowid')
+
+def supports_task_search(dialect):
+    return dialect.name == 'sqlite'
+
+def ensure_task_search_index(conn):
+    """
+    Cria o índice e os gatilhos, se ainda não existem, e indexa as tarefas já
+    gravadas. Apenas no SQLite; nos demais bancos a busca usa LIKE.
+
+    Returns:
+        list: Descrição de cada alteração aplicada
+    """
+    if not supports_task_search(conn.dialect):
+        return []
+    exists = conn.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TASK_SEARCH_TABLE,)
+    ).first()
+    for statement in TASK_SEARCH_DDL:
+        conn.exec_driver_sql(statement)
+    if exists:
+        return []
+    conn.exec_driver_sql(
+        f"INSERT INTO {TASK_SEARCH_TABLE}({TASK_SEARCH_TABLE}, rank) VALUES ('rank', ?)",
+        (TASK_SEARCH_RANK,)
+    )
+    conn.exec_driver_sql(f"INSERT INTO {TASK_SEARCH_TABLE}({TASK_SEARCH_TABLE}) VALUES ('rebuild')")
+    return [f"índice de busca {TASK_SEARCH_TABLE} criado"]
+
+def rebuild_task_search_index(conn):
+    """Reconstrói o índice a partir de tasks (ex.: após um VACUUM, que pode renumerar os rowids)"""
+    conn.exec_driver_sql(f"INSERT INTO {TASK_SEARCH_TABLE}({TASK_SEARCH_TABLE}) VALUES ('rebuild')")
+
+def search_terms(query):
+    """Palavras da busca, sem a sintaxe do FTS5 (aspas, operadores, parênteses)"""
+    return re.findall(r'\w+', query)
+
+def task_search_match(terms, user_id):
+    """
+    Expressão MATCH: todas as palavras, cada uma como prefixo, no título ou na
+    descrição, restrita às tarefas do usuário.
+    """
+    words = ' AND '.join(f'"{term}"*' for term in terms)
+    return f'user_id : "{user_id}" AND {{title description}} : ({words})'
+
+def task_search_clause(terms, user_id):
+    """Condição do SELECT de tarefas unido a task_search por task_search_join"""
+    return text(f'{TASK_SEARCH_TABLE} MATCH :task_search_match').bindparams(
+        task_search_match=task_search_match(terms, user_id)
+    )
@@ -0,0 +1,121 @@
+"""
+Serialização rápida das listagens.
+
+As rotas de lista selecionam apenas as colunas da resposta e montam cada item
+a partir da tupla retornada pelo banco, sem criar objetos do ORM nem passar pelo
+identity map. As chaves e conversões de cada coluna são definidas uma única vez.
+"""
+import time
+
+from flask import g, has_app_context
+from flask.json.provider import DefaultJSONProvider
+
+from models import Task, LifeAreaTemplate, LifeAreaOverride
+from recurrence import recurrence_to_dict
+
+try:
+    import orjson
+except ImportError:  # opcional: sem ele, usa o json da biblioteca padrão
+    orjson = None
+
+def isoformat(value):
+    return value.isoformat()
+
+def isoformat_or_none(value):
+    return value.isoformat() if value is not None else None
+
+class RowSerializer:
+    """
+    Converte linhas (tuplas) em dicionários com chaves fixas.
+
+    Args:
+        keys (tuple): Chave de cada coluna, na ordem do SELECT
+        converters (dict): Função aplicada ao valor de algumas chaves
+    """
+
+    def __init__(self, keys, converters=None):
+        converters = converters or {}
+        self.keys = tuple(keys)
+        self._converters = tuple(
+            (index, converters[key]) for index, key in enumerate(self.keys) if key in converters
+        )
+
+    def __call__(self, row):
+        if not self._converters:
+            return dict(zip(self.keys, row))
+        values = list(row)
+        for index, convert in self._converters:
+            values[index] = convert(values[index])
+        return dict(zip(self.keys, values))
+
+    def many(self, rows):
+        return [self(row) for row in rows]
+
+# Mesmo formato de Task.to_dict
+TASK_LIST_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.completed, Task.priority, Task.category,
+    Task.due_date, Task.created_at, Task.updated_at, Task.user_id, Task.recurrence
+)
+task_serializer = RowSerializer(
+    ('id', 'title', 'description', 'completed', 'priority', 'category',
+     'dueDate', 'createdAt', 'updatedAt', 'userId', 'recurrence'),
+    {'dueDate': isoformat_or_none, 'createdAt': isoformat, 'updatedAt': isoformat,
+     'recurrence': recurrence_to_dict}
+)
+
+# Mesmo formato de LifeAreaTemplate.to_dict, já com a pontuação do usuário
+LIFE_AREA_LIST_COLUMNS = (
+    LifeAreaTemplate.id, LifeAreaTemplate.name, LifeAreaTemplate.default_score,
+    LifeAreaTemplate.color, LifeAreaTemplate.icon,
+    LifeAreaOverride.score, LifeAreaOverride.last_updated
+)
+life_area_serializer = RowSerializer(
+    ('id', 'name', 'score', 'color', 'icon', 'lastUpdated', 'userId'),
+    {'lastUpdated': isoformat_or_none}
+)
+
+def serialize_life_area_rows(rows, user_id, default_updated=None):
+    """Aplica a pontuação alterada, quando houver, sobre a do modelo"""
+    return life_area_serializer.many(
+        (area_id, name, score if score is not None else default_score, color, icon,
+         last_updated or default_updated, user_id)
+        for area_id, name, default_score, color, icon, score, last_updated in rows
+    )
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Provedor JSON do Flask que usa o orjson quando instalado. Tipos que o
+    orjson não trata, e datas, seguem pelo mesmo `default` do provedor padrão.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+def timed_json_provider(provider_class):
+    """
+    Subclasse de `provider_class` que soma em g.serialization_time o tempo
+    gasto em dumps (cabeçalho Server-Timing)
+    """
+    class TimedJSONProvider(provider_class):
+        def dumps(self, obj, **kwargs):
+            started = time.perf_counter()
+            try:
+                return super().dumps(obj, **kwargs)
+            finally:
+                if has_app_context():
+                    g.serialization_time = g.get('serialization_time', 0.0) + time.perf_counter() - started
+
+    TimedJSONProvider.__name__ = TimedJSONProvider.__qualname__ = f'Timed{provider_class.__name__}'
+    return TimedJSONProvider
@@ -0,0 +1,79 @@
+"""
+Fixtures dos testes: cada teste recebe uma aplicação nova, com o banco SQLite
+em uma pasta temporária.
+
+Uso (na pasta backend):
+    pip install -r requirements-dev.txt
+    python -m pytest -q
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# app.py cria a aplicação padrão ao ser importado; ela não deve abrir o banco
+# da pasta do projeto
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+os.environ.setdefault('SHARD_DATABASE_URLS', '')
+
+from app import create_app, db, init_db  # noqa: E402
+
+
+def make_app(tmp_path, **overrides):
+    """Aplicação com banco próprio em `tmp_path`, já migrado"""
+    app = create_app('development', dict({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'main.db'}",
+        'SHARD_DATABASE_URIS': [],
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'SEED_DEMO_DATA': False,
+        'JWT_SECRET_KEY': 'chave-dos-testes-com-pelo-menos-32-bytes',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000'
+    }, **overrides))
+    with app.app_context():
+        init_db()
+    return app
+
+
+def close_app(app):
+    """Encerra as threads de escrita e fecha as conexões da aplicação"""
+    for writer in app.extensions['group_commit_writers'].values():
+        writer.close()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = make_app(tmp_path)
+    yield app
+    close_app(app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(client):
+    """Cabeçalho de autenticação de um usuário novo"""
+    return register(client, 'ana@example.com')
+
+
+def register(client, email, name='Ana', password='senha123'):
+    response = client.post('/api/auth/register', json={
+        'email': email, 'name': name, 'password': password
+    })
+    assert response.status_code == 201, response.get_json()
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def create_task(client, headers, **data):
+    data.setdefault('title', 'Tarefa')
+    response = client.post('/api/tasks', json=data, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['task']
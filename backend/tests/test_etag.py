@@ -0,0 +1,67 @@
+"""Requisições condicionais (ETag / If-None-Match)"""
+from app import bump_user_version, db
+from conftest import create_task
+from models import User
+
+
+def get(client, path, headers, etag=None):
+    if etag:
+        headers = dict(headers, **{'If-None-Match': etag})
+    return client.get(path, headers=headers)
+
+
+def test_unchanged_data_answers_304(client, auth):
+    create_task(client, auth)
+    first = get(client, '/api/tasks', auth)
+
+    second = get(client, '/api/tasks', auth, first.headers['ETag'])
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_each_write_invalidates_the_etag(client, auth):
+    task = create_task(client, auth)
+    writes = [
+        lambda: client.put(f"/api/tasks/{task['id']}", json={'completed': True}, headers=auth),
+        lambda: client.post('/api/tasks/batch', json={'operations': [
+            {'op': 'create', 'data': {'title': 'Lote'}}
+        ]}, headers=auth),
+        lambda: client.put('/api/life-areas/health', json={'score': 8}, headers=auth),
+        lambda: client.delete(f"/api/tasks/{task['id']}", headers=auth)
+    ]
+    etag = get(client, '/api/tasks', auth).headers['ETag']
+
+    for write in writes:
+        assert write().status_code == 200
+        response = get(client, '/api/tasks', auth, etag)
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        etag = response.headers['ETag']
+
+
+def test_missing_task_does_not_change_the_etag(client, auth):
+    etag = get(client, '/api/tasks', auth).headers['ETag']
+
+    assert client.put('/api/tasks/inexistente', json={'completed': True}, headers=auth).status_code == 404
+    assert get(client, '/api/tasks', auth, etag).status_code == 304
+
+
+def test_auth_me_ignores_identity_cached_before_another_worker_write(app, client, auth):
+    me = get(client, '/api/auth/me', auth)
+    assert me.get_json()['user']['name'] == 'Ana'
+
+    # Alteração feita por outro processo: o cache deste não é invalidado
+    with app.app_context():
+        user = db.session.get(User, me.get_json()['user']['id'])
+        user.name = 'Ana Maria'
+        bump_user_version(user.id)
+        db.session.commit()
+
+    response = get(client, '/api/auth/me', auth, me.headers['ETag'])
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != me.headers['ETag']
+    assert response.get_json()['user']['name'] == 'Ana Maria'
+    assert get(client, '/api/auth/me', auth, response.headers['ETag']).status_code == 304
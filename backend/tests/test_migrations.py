@@ -0,0 +1,148 @@
+"""Migração de bancos criados pelas versões anteriores do app.py"""
+import sqlite3
+from datetime import datetime
+
+import pytest
+from sqlalchemy import inspect
+from werkzeug.security import generate_password_hash
+
+from app import db, migrate_all_databases
+from conftest import close_app, make_app
+from migrations import SCHEMA_VERSION, read_schema_version
+from models import User
+
+# Esquema gerado pelo primeiro app.py (nomes de tabela padrão do Flask-SQLAlchemy)
+LEGACY_SCHEMA = """
+CREATE TABLE user (
+    id VARCHAR(36) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    photo TEXT,
+    created_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (email)
+);
+CREATE TABLE task (
+    id VARCHAR(36) NOT NULL,
+    title VARCHAR(200) NOT NULL,
+    description TEXT,
+    completed BOOLEAN,
+    priority VARCHAR(10),
+    category VARCHAR(50),
+    due_date DATETIME,
+    created_at DATETIME,
+    updated_at DATETIME,
+    user_id VARCHAR(36) NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES user (id)
+);
+CREATE TABLE life_area (
+    id VARCHAR(36) NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    score INTEGER,
+    color VARCHAR(7) NOT NULL,
+    icon VARCHAR(50) NOT NULL,
+    last_updated DATETIME,
+    user_id VARCHAR(36) NOT NULL,
+    PRIMARY KEY (id),
+    FOREIGN KEY(user_id) REFERENCES user (id)
+);
+"""
+
+USER_ID = '11111111-1111-1111-1111-111111111111'
+
+
+@pytest.fixture
+def legacy_app(tmp_path):
+    conn = sqlite3.connect(tmp_path / 'main.db')
+    conn.executescript(LEGACY_SCHEMA)
+    conn.execute('INSERT INTO user VALUES (?, ?, ?, ?, NULL, ?)', (
+        USER_ID, 'velho@example.com', 'Velho', generate_password_hash('senha123'),
+        '2024-01-01 10:00:00.000000'
+    ))
+    conn.executemany('INSERT INTO task VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+        (f'task-{index}', f'Tarefa antiga {index}', '', completed, priority, 'pessoal', None,
+         f'2024-01-0{index + 1} 10:00:00.000000', f'2024-01-0{index + 1} 10:00:00.000000', USER_ID)
+        for index, (completed, priority) in enumerate([(1, 'high'), (0, 'high'), (0, 'low')])
+    ])
+    conn.executemany('INSERT INTO life_area VALUES (?, ?, ?, ?, ?, ?, ?)', [
+        ('health', 'Saúde', 9, '#10B981', 'Heart', '2024-01-02 10:00:00.000000', USER_ID),
+        ('career', 'Carreira', 5, '#3B82F6', 'Briefcase', '2024-01-02 10:00:00.000000', USER_ID)
+    ])
+    conn.commit()
+    conn.close()
+
+    app = make_app(tmp_path)
+    yield app
+    close_app(app)
+
+
+def login(client):
+    response = client.post('/api/auth/login', json={'email': 'velho@example.com', 'password': 'senha123'})
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def test_tables_are_renamed_and_versioned(legacy_app):
+    with legacy_app.app_context():
+        tables = set(inspect(db.engine).get_table_names())
+        with db.engine.connect() as conn:
+            version = read_schema_version(conn)
+
+    assert {'users', 'tasks', 'life_area_templates', 'life_area_overrides', 'user_stats'} <= tables
+    assert not {'user', 'task', 'life_area'} & tables
+    assert version == SCHEMA_VERSION
+
+
+def test_legacy_data_is_kept(legacy_app):
+    client = legacy_app.test_client()
+    headers = login(client)
+
+    tasks = client.get('/api/tasks', headers=headers).get_json()['tasks']
+    areas = {
+        area['id']: area['score']
+        for area in client.get('/api/life-areas', headers=headers).get_json()['lifeAreas']
+    }
+
+    assert [task['title'] for task in tasks] == ['Tarefa antiga 2', 'Tarefa antiga 1', 'Tarefa antiga 0']
+    assert areas['health'] == 9
+    assert areas['career'] == 5
+
+
+def test_new_user_column_is_backfilled(legacy_app):
+    with legacy_app.app_context():
+        user = db.session.get(User, USER_ID)
+
+        # Coluna nova preenchida a partir de created_at
+        assert user.updated_at == user.created_at == datetime(2024, 1, 1, 10, 0)
+
+
+def test_stats_are_backfilled(legacy_app):
+    client = legacy_app.test_client()
+
+    stats = client.get('/api/stats', headers=login(client)).get_json()['stats']
+
+    assert stats['totalTasks'] == 3
+    assert stats['completedTasks'] == 1
+    assert stats['highPriorityTasks'] == 1
+
+
+def test_migrated_search_index_covers_old_tasks(legacy_app):
+    client = legacy_app.test_client()
+
+    response = client.get('/api/tasks/search', query_string={'q': 'antiga'}, headers=login(client))
+
+    assert len(response.get_json()['tasks']) == 3
+
+
+def test_second_start_changes_nothing(legacy_app, tmp_path):
+    with legacy_app.app_context():
+        db.engine.dispose()
+
+    app = make_app(tmp_path)
+    try:
+        with app.app_context():
+            assert migrate_all_databases(force=True) == []
+    finally:
+        close_app(app)
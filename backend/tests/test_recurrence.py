@@ -0,0 +1,95 @@
+"""Expansão das regras de recorrência (COUNT/UNTIL) e agenda"""
+from datetime import datetime, timedelta
+
+from conftest import create_task
+from recurrence import RecurrenceRule, is_occurrence, iter_occurrences
+
+START = datetime(2026, 1, 5, 9, 0)
+
+
+def occurrences(rrule, window_from=None, window_to=None, start=START):
+    return list(iter_occurrences(RecurrenceRule.parse(rrule), start, window_from, window_to))
+
+
+def test_count_limits_the_whole_series():
+    assert occurrences('FREQ=DAILY;COUNT=3') == [START + timedelta(days=day) for day in range(3)]
+
+
+def test_count_is_kept_when_the_window_starts_mid_series():
+    window_from = START + timedelta(days=3, hours=1)
+
+    result = occurrences('FREQ=DAILY;INTERVAL=2;COUNT=4', window_from, START + timedelta(days=30))
+
+    # 05, 07, 09 e 11/01; a janela começa depois da segunda
+    assert result == [datetime(2026, 1, 9, 9, 0), datetime(2026, 1, 11, 9, 0)]
+
+
+def test_until_is_inclusive():
+    result = occurrences('FREQ=WEEKLY;UNTIL=20260119T090000')
+
+    assert result == [datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 12, 9, 0), datetime(2026, 1, 19, 9, 0)]
+
+
+def test_window_cuts_an_unbounded_rule():
+    result = occurrences('FREQ=WEEKLY;INTERVAL=1', datetime(2026, 3, 1), datetime(2026, 3, 20))
+
+    assert result == [datetime(2026, 3, 2, 9, 0), datetime(2026, 3, 9, 9, 0), datetime(2026, 3, 16, 9, 0)]
+
+
+def test_monthly_keeps_the_day_or_the_last_day_of_the_month():
+    result = occurrences('FREQ=MONTHLY;COUNT=4', start=datetime(2026, 1, 31))
+
+    assert result == [datetime(2026, 1, 31), datetime(2026, 2, 28), datetime(2026, 3, 31), datetime(2026, 4, 30)]
+
+
+def test_is_occurrence_respects_count():
+    rule = RecurrenceRule.parse('FREQ=DAILY;COUNT=3')
+
+    assert is_occurrence(rule, START, START + timedelta(days=2))
+    assert not is_occurrence(rule, START, START + timedelta(days=3))
+    assert not is_occurrence(rule, START, START + timedelta(days=1, hours=1))
+
+
+def test_agenda_expands_only_inside_the_window(client, auth):
+    create_task(client, auth, title='Academia', dueDate=START.isoformat(),
+                recurrence={'freq': 'daily', 'interval': 1, 'count': 10})
+    create_task(client, auth, title='Reunião', dueDate=START.isoformat(),
+                recurrence={'freq': 'weekly', 'until': '2026-01-12T09:00:00'})
+
+    response = client.get('/api/agenda', query_string={
+        'from': '2026-01-10T00:00:00Z', 'to': '2026-01-20T00:00:00Z'
+    }, headers=auth)
+
+    assert response.status_code == 200, response.get_json()
+    items = response.get_json()['items']
+    assert [item['dueDate'] for item in items if item['title'] == 'Academia'] == [
+        f'2026-01-{day}T09:00:00' for day in range(10, 15)
+    ]
+    assert [item['dueDate'] for item in items if item['title'] == 'Reunião'] == ['2026-01-12T09:00:00']
+
+
+def test_agenda_applies_occurrence_changes(client, auth):
+    task = create_task(client, auth, title='Academia', dueDate=START.isoformat(),
+                       recurrence='FREQ=DAILY;COUNT=3')
+    client.put(f"/api/tasks/{task['id']}/occurrences/2026-01-06T09:00:00",
+               json={'skipped': True}, headers=auth)
+    client.put(f"/api/tasks/{task['id']}/occurrences/2026-01-07T09:00:00",
+               json={'dueDate': '2026-01-08T10:00:00'}, headers=auth)
+
+    items = client.get('/api/agenda', query_string={
+        'from': '2026-01-05T00:00:00', 'to': '2026-01-09T00:00:00'
+    }, headers=auth).get_json()['items']
+
+    assert [(item['occurrenceDate'], item['dueDate']) for item in items] == [
+        ('2026-01-05T09:00:00', '2026-01-05T09:00:00'),
+        ('2026-01-07T09:00:00', '2026-01-08T10:00:00')
+    ]
+
+
+def test_occurrence_outside_the_rule_is_rejected(client, auth):
+    task = create_task(client, auth, dueDate=START.isoformat(), recurrence='FREQ=DAILY;COUNT=3')
+
+    response = client.put(f"/api/tasks/{task['id']}/occurrences/2026-01-08T09:00:00",
+                          json={'completed': True}, headers=auth)
+
+    assert response.status_code == 404
@@ -0,0 +1,61 @@
+"""Índice de busca (FTS5) mantido pelos gatilhos de tasks"""
+import pytest
+
+from app import db
+from conftest import create_task, register
+from models import Task
+from search import supports_task_search
+
+
+@pytest.fixture(autouse=True)
+def require_fts5(app):
+    with app.app_context():
+        if not supports_task_search(db.session.get_bind(mapper=Task).dialect):
+            pytest.skip('SQLite sem FTS5')
+
+
+def search(client, headers, q):
+    response = client.get('/api/tasks/search', query_string={'q': q}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return [task['id'] for task in response.get_json()['tasks']]
+
+
+def test_new_task_is_found_by_prefix(client, auth):
+    task = create_task(client, auth, title='Comprar leite', description='Mercado da esquina')
+
+    assert search(client, auth, 'leit') == [task['id']]
+    assert search(client, auth, 'merc esq') == [task['id']]
+
+
+def test_update_replaces_indexed_text(client, auth):
+    task = create_task(client, auth, title='Comprar leite')
+
+    client.put(f"/api/tasks/{task['id']}", json={'title': 'Pagar conta'}, headers=auth)
+
+    assert search(client, auth, 'leite') == []
+    assert search(client, auth, 'conta') == [task['id']]
+
+
+def test_batch_update_replaces_indexed_text(client, auth):
+    task = create_task(client, auth, title='Comprar leite')
+
+    client.post('/api/tasks/batch', json={'operations': [
+        {'op': 'update', 'id': task['id'], 'data': {'description': 'Padaria'}}
+    ]}, headers=auth)
+
+    assert search(client, auth, 'padaria') == [task['id']]
+
+
+def test_deleted_task_leaves_the_index(client, auth):
+    task = create_task(client, auth, title='Comprar leite')
+    other = create_task(client, auth, title='Leite condensado')
+
+    client.delete(f"/api/tasks/{task['id']}", headers=auth)
+
+    assert search(client, auth, 'leite') == [other['id']]
+
+
+def test_results_are_limited_to_the_owner(client, auth):
+    create_task(client, register(client, 'bia@example.com', name='Bia'), title='Comprar leite')
+
+    assert search(client, auth, 'leite') == []
@@ -0,0 +1,87 @@
+"""Contadores de user_stats mantidos pelas rotas de escrita"""
+import random
+import threading
+
+import pytest
+
+from app import db
+from conftest import close_app, create_task, make_app, register
+from models import UserStats
+
+
+def expected_stats(client, headers):
+    """Contadores calculados a partir das próprias tarefas"""
+    tasks = client.get('/api/tasks', query_string={'limit': 500}, headers=headers).get_json()['tasks']
+    return {
+        'totalTasks': len(tasks),
+        'completedTasks': sum(task['completed'] for task in tasks),
+        'highPriorityTasks': sum(task['priority'] == 'high' and not task['completed'] for task in tasks)
+    }
+
+
+def current_stats(client, headers):
+    stats = client.get('/api/stats', headers=headers).get_json()['stats']
+    return {key: stats[key] for key in ('totalTasks', 'completedTasks', 'highPriorityTasks')}
+
+
+def test_stats_follow_each_write(client, auth):
+    task = create_task(client, auth, priority='high')
+    create_task(client, auth)
+    assert current_stats(client, auth) == {'totalTasks': 2, 'completedTasks': 0, 'highPriorityTasks': 1}
+
+    client.put(f"/api/tasks/{task['id']}", json={'completed': True}, headers=auth)
+    assert current_stats(client, auth) == {'totalTasks': 2, 'completedTasks': 1, 'highPriorityTasks': 0}
+
+    client.delete(f"/api/tasks/{task['id']}", headers=auth)
+    assert current_stats(client, auth) == {'totalTasks': 1, 'completedTasks': 0, 'highPriorityTasks': 0}
+
+
+@pytest.mark.parametrize('group_commit', [False, True])
+def test_stats_consistent_under_concurrent_updates(tmp_path, group_commit):
+    app = make_app(tmp_path, GROUP_COMMIT_ENABLED=group_commit)
+    try:
+        client = app.test_client()
+        headers = register(client, 'bia@example.com')
+        ids = [create_task(client, headers, title=f'Tarefa {index}')['id'] for index in range(3)]
+        errors = []
+
+        def worker(seed):
+            worker_client = app.test_client()
+            rng = random.Random(seed)
+            for _ in range(25):
+                task_id = rng.choice(ids)
+                if seed % 2:
+                    response = worker_client.put(f'/api/tasks/{task_id}', json={
+                        'completed': rng.random() < 0.5,
+                        'priority': rng.choice(['high', 'low'])
+                    }, headers=headers)
+                else:
+                    response = worker_client.post('/api/tasks/batch', json={'operations': [
+                        {'op': 'update', 'id': task_id, 'data': {'completed': rng.random() < 0.5}}
+                    ]}, headers=headers)
+                if response.status_code != 200:
+                    errors.append(response.get_json())
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert current_stats(client, headers) == expected_stats(client, headers)
+    finally:
+        close_app(app)
+
+
+def test_recompute_stats_repairs_drift(app, client, auth):
+    create_task(client, auth, priority='high')
+    runner = app.test_cli_runner()
+    with app.app_context():
+        db.session.execute(db.update(UserStats).values(total_tasks=99, high_priority_open=-3))
+        db.session.commit()
+
+    result = runner.invoke(args=['recompute-stats'])
+
+    assert result.exit_code == 0, result.output
+    assert current_stats(client, auth) == expected_stats(client, auth)
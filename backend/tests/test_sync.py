@@ -0,0 +1,96 @@
+"""Sincronização incremental (GET /api/sync) e formato das datas"""
+from conftest import create_task
+
+START = '2026-01-05T09:00:00'
+
+
+def sync(client, headers, token):
+    response = client.get('/api/sync', query_string={'since': token}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def start_token(client, headers):
+    body = client.get('/api/sync', headers=headers).get_json()
+    assert body['full'] is True
+    return body['token']
+
+
+def occurrence_url(task, date):
+    return f"/api/tasks/{task['id']}/occurrences/{date}"
+
+
+def test_changed_and_deleted_tasks(client, auth):
+    kept = create_task(client, auth, title='Fica')
+    removed = create_task(client, auth, title='Sai')
+    token = start_token(client, auth)
+
+    client.put(f"/api/tasks/{kept['id']}", json={'completed': True}, headers=auth)
+    client.delete(f"/api/tasks/{removed['id']}", headers=auth)
+    body = sync(client, auth, token)
+
+    assert body['full'] is False
+    assert [task['id'] for task in body['tasks']] == [kept['id']]
+    assert body['deletedTaskIds'] == [removed['id']]
+
+
+def test_occurrence_changes_and_reverts(client, auth):
+    task = create_task(client, auth, dueDate=START, recurrence='FREQ=DAILY;COUNT=5')
+    token = start_token(client, auth)
+    key = {'taskId': task['id'], 'occurrenceDate': '2026-01-06T09:00:00'}
+
+    client.put(occurrence_url(task, '2026-01-06T09:00:00'), json={'completed': True}, headers=auth)
+    body = sync(client, auth, token)
+    assert [dict(key, completed=True, skipped=False, dueDate=None)] == body['occurrences']
+    assert body['deletedOccurrences'] == []
+
+    # Sem alterações, a ocorrência deixa de ser gravada
+    client.put(occurrence_url(task, '2026-01-06T09:00:00'), json={'completed': False}, headers=auth)
+    body = sync(client, auth, token)
+    assert body['occurrences'] == []
+    assert body['deletedOccurrences'] == [key]
+
+    client.put(occurrence_url(task, '2026-01-06T09:00:00'), json={'skipped': True}, headers=auth)
+    body = sync(client, auth, token)
+    assert [occurrence['skipped'] for occurrence in body['occurrences']] == [True]
+    assert body['deletedOccurrences'] == []
+
+
+def test_rescheduling_or_deleting_the_task_removes_its_occurrences(client, auth):
+    task = create_task(client, auth, dueDate=START, recurrence='FREQ=DAILY;COUNT=5')
+    other = create_task(client, auth, dueDate=START, recurrence='FREQ=DAILY;COUNT=5')
+    client.put(occurrence_url(task, '2026-01-06T09:00:00'), json={'completed': True}, headers=auth)
+    client.put(occurrence_url(other, '2026-01-07T09:00:00'), json={'skipped': True}, headers=auth)
+    token = start_token(client, auth)
+
+    client.put(f"/api/tasks/{task['id']}", json={'dueDate': '2026-02-01T09:00:00'}, headers=auth)
+    client.delete(f"/api/tasks/{other['id']}", headers=auth)
+    body = sync(client, auth, token)
+
+    assert sorted(body['deletedOccurrences'], key=lambda item: item['taskId']) == sorted([
+        {'taskId': task['id'], 'occurrenceDate': '2026-01-06T09:00:00'},
+        {'taskId': other['id'], 'occurrenceDate': '2026-01-07T09:00:00'}
+    ], key=lambda item: item['taskId'])
+
+
+def test_invalid_token(client, auth):
+    response = client.get('/api/sync', query_string={'since': '???'}, headers=auth)
+
+    assert response.status_code == 400
+
+
+def test_write_responses_use_the_stored_date_format(client, auth):
+    created = create_task(client, auth, dueDate='2026-03-01T10:00:00-03:00')
+    updated = client.put(f"/api/tasks/{created['id']}", json={'dueDate': '2026-03-02T10:00:00Z'},
+                         headers=auth).get_json()['task']
+    batch = client.post('/api/tasks/batch', json={'operations': [
+        {'op': 'create', 'data': {'title': 'Lote', 'dueDate': '2026-03-03T10:00:00+01:00'}}
+    ]}, headers=auth).get_json()['results'][0]['task']
+    listed = {
+        task['id']: task['dueDate']
+        for task in client.get('/api/tasks', headers=auth).get_json()['tasks']
+    }
+
+    assert created['dueDate'] == '2026-03-01T13:00:00'
+    assert updated['dueDate'] == listed[created['id']] == '2026-03-02T10:00:00'
+    assert batch['dueDate'] == listed[batch['id']] == '2026-03-03T09:00:00'
@@ -0,0 +1,66 @@
+"""Paginação por cursor de GET /api/tasks"""
+from conftest import create_task
+
+
+def batch_create(client, headers, titles, **data):
+    """Cria as tarefas em um lote: todas ficam com o mesmo created_at"""
+    response = client.post('/api/tasks/batch', json={'operations': [
+        {'op': 'create', 'data': dict(data, title=title)} for title in titles
+    ]}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return [result['id'] for result in response.get_json()['results']]
+
+
+def fetch_all(client, headers, limit, **params):
+    """Percorre as páginas seguindo nextCursor; retorna as tarefas e o número de páginas"""
+    tasks, pages, cursor = [], 0, None
+    while True:
+        query = dict(params, limit=limit)
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/api/tasks', query_string=query, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        body = response.get_json()
+        assert len(body['tasks']) <= limit
+        tasks.extend(body['tasks'])
+        pages += 1
+        cursor = body['nextCursor']
+        if cursor is None:
+            return tasks, pages
+
+
+def test_cursor_visits_every_task_once_in_order(client, auth):
+    ids = [create_task(client, auth, title=f'Tarefa {index}')['id'] for index in range(4)]
+    # Mesmo created_at: o desempate é pelo id
+    ids += batch_create(client, auth, [f'Lote {index}' for index in range(7)])
+
+    tasks, pages = fetch_all(client, auth, limit=3)
+
+    assert pages == 4
+    assert sorted(task['id'] for task in tasks) == sorted(ids)
+    keys = [(task['createdAt'], task['id']) for task in tasks]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_cursor_keeps_filters_between_pages(client, auth):
+    done = batch_create(client, auth, [f'Feita {index}' for index in range(5)], completed=True)
+    batch_create(client, auth, [f'Aberta {index}' for index in range(4)])
+
+    tasks, _ = fetch_all(client, auth, limit=2, completed='true')
+
+    assert sorted(task['id'] for task in tasks) == sorted(done)
+
+
+def test_last_page_has_no_cursor(client, auth):
+    batch_create(client, auth, ['A', 'B'])
+
+    body = client.get('/api/tasks', query_string={'limit': 2}, headers=auth).get_json()
+
+    assert len(body['tasks']) == 2
+    assert body['nextCursor'] is None
+
+
+def test_invalid_cursor(client, auth):
+    response = client.get('/api/tasks', query_string={'cursor': 'invalido'}, headers=auth)
+
+    assert response.status_code == 400
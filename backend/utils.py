@@ -1,6 +1,15 @@
 import base64
+import codecs
 import io
-from PIL import Image
+import re
+import time
+from flask import current_app
+
+# O Pillow é importado dentro das funções de imagem, só no primeiro uso: a
+# maioria dos processos (workers, comandos, testes) nunca processa fotos
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'png', 'jpg', 'jpeg', 'gif'}
 
 def process_image(image_data, max_size=(200, 200), quality=85):
     """
@@ -8,12 +17,14 @@ def process_image(image_data, max_size=(200, 200), quality=85):
     
     Args:
         image_data (str): Dados da imagem em base64
-        max_size (tuple): Tamanho máximo (largura, altura)
+        max_size (tuple): Tamanho final (largura, altura)
         quality (int): Qualidade da compressão JPEG
     
     Returns:
-        str: Imagem processada em base64 ou None se erro
+        bytes: Imagem JPEG processada ou None se erro
     """
+    from PIL import Image
+    
     try:
         # Remove prefixo data:image se presente
         if image_data.startswith('data:image'):
@@ -23,8 +34,11 @@ def process_image(image_data, max_size=(200, 200), quality=85):
         image_bytes = base64.b64decode(image_data)
         image = Image.open(io.BytesIO(image_bytes))
         
-        # Redimensiona mantendo proporção
-        image.thumbnail(max_size, Image.Resampling.LANCZOS)
+        # JPEGs são decodificados direto em escala reduzida
+        image.draft('RGB', max_size)
+        
+        # Redimensiona para o tamanho final
+        image = image.resize(max_size, Image.Resampling.LANCZOS)
         
         # Converte para RGB se necessário
         if image.mode != 'RGB':
@@ -32,53 +46,145 @@ def process_image(image_data, max_size=(200, 200), quality=85):
         
         # Salva como JPEG em buffer
         buffer = io.BytesIO()
-        image.save(buffer, format='JPEG', quality=quality, optimize=True)
-        
-        # Converte para base64
-        processed_image = base64.b64encode(buffer.getvalue()).decode()
-        
-        return f"data:image/jpeg;base64,{processed_image}"
+        image.save(buffer, format='JPEG', quality=quality)
+        return buffer.getvalue()
         
     except Exception as e:
         print(f"Erro ao processar imagem: {e}")
         return None
 
-def create_default_life_areas(user_id):
+def process_image_file(path, sizes, quality=85):
+    """
+    Gera as variantes quadradas da foto a partir de um arquivo em disco,
+    decodificando-o uma única vez.
+    
+    Args:
+        path (str): Arquivo enviado pelo cliente
+        sizes (tuple): Lados das variantes, em pixels
+        quality (int): Qualidade da compressão JPEG
+    
+    Returns:
+        dict: Bytes JPEG de cada variante, indexados pelo tamanho
+    """
+    from PIL import Image, ImageOps
+    
+    with Image.open(path) as image:
+        # Em JPEGs, o draft faz o decodificador trabalhar em 1/2, 1/4 ou 1/8 da
+        # escala original, o suficiente para a maior variante
+        largest = max(sizes)
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        # Recorte quadrado central, feito uma única vez
+        side = min(image.size)
+        left = (image.width - side) // 2
+        top = (image.height - side) // 2
+        image = image.crop((left, top, left + side, top + side))
+        
+        variants = {}
+        for size in sorted(sizes, reverse=True):
+            # Cada variante parte da anterior, já reduzida
+            image = image.resize((size, size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            buffer = io.BytesIO()
+            image.save(buffer, format='JPEG', quality=quality, optimize=True)
+            variants[size] = buffer.getvalue()
+        return variants
+
+def read_image_header(path):
+    """
+    Lê apenas o cabeçalho da imagem, sem decodificá-la.
+    
+    Returns:
+        tuple: (largura, altura, formato do Pillow), ou None se o arquivo não
+            for uma imagem válida
+    """
+    from PIL import Image
+    
+    try:
+        with Image.open(path) as image:
+            return image.width, image.height, image.format
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+def timed_call(func, *args):
+    """Executa func(*args) e retorna (segundos, resultado); usado no pool de fotos"""
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+def photo_url(photo):
+    """URL pública da foto de perfil guardada em User.photo"""
+    if not photo:
+        return None
+    if photo.startswith('data:'):
+        # Foto ainda não migrada para arquivo (ver migrate-photos)
+        return photo
+    return f"/api/photos/{photo}"
+
+def photo_variant_urls(photo):
+    """URLs de cada tamanho, para fotos enviadas por upload multipart"""
+    match = re.fullmatch(r'([0-9a-f]{64})-200\.jpg', photo or '')
+    if not match:
+        return None
+    return {
+        str(size): f"/api/photos/{match.group(1)}-{size}.jpg"
+        for size in current_app.config['PHOTO_VARIANT_SIZES']
+    }
+
+# Modelos das áreas da Roda da Vida (tabela life_area_templates), na ordem de exibição
+DEFAULT_LIFE_AREAS = [
+    {'id': 'health', 'name': 'Saúde', 'color': '#10B981', 'icon': 'Heart'},
+    {'id': 'career', 'name': 'Carreira', 'color': '#3B82F6', 'icon': 'Briefcase'},
+    {'id': 'relationships', 'name': 'Relacionamentos', 'color': '#EC4899', 'icon': 'Users'},
+    {'id': 'finances', 'name': 'Finanças', 'color': '#F59E0B', 'icon': 'DollarSign'},
+    {'id': 'personal', 'name': 'Desenvolvimento Pessoal', 'color': '#8B5CF6', 'icon': 'BookOpen'},
+    {'id': 'leisure', 'name': 'Lazer', 'color': '#06B6D4', 'icon': 'Gamepad2'},
+    {'id': 'family', 'name': 'Família', 'color': '#EF4444', 'icon': 'Home'},
+    {'id': 'spirituality', 'name': 'Espiritualidade', 'color': '#84CC16', 'icon': 'Sun'},
+]
+
+def life_area_template_rows(default_score=5):
     """
-    Cria áreas da vida padrão para um novo usuário
+    Linhas da tabela life_area_templates geradas a partir de DEFAULT_LIFE_AREAS
     
     Args:
-        user_id (str): ID do usuário
+        default_score (int): Pontuação inicial de cada área
     
     Returns:
-        list: Lista de objetos LifeArea criados
+        list: Dicionários prontos para inserção
     """
-    from models import LifeArea, db
-    
-    default_areas = [
-        {'id': 'health', 'name': 'Saúde', 'color': '#10B981', 'icon': 'Heart'},
-        {'id': 'career', 'name': 'Carreira', 'color': '#3B82F6', 'icon': 'Briefcase'},
-        {'id': 'relationships', 'name': 'Relacionamentos', 'color': '#EC4899', 'icon': 'Users'},
-        {'id': 'finances', 'name': 'Finanças', 'color': '#F59E0B', 'icon': 'DollarSign'},
-        {'id': 'personal', 'name': 'Desenvolvimento Pessoal', 'color': '#8B5CF6', 'icon': 'BookOpen'},
-        {'id': 'leisure', 'name': 'Lazer', 'color': '#06B6D4', 'icon': 'Gamepad2'},
-        {'id': 'family', 'name': 'Família', 'color': '#EF4444', 'icon': 'Home'},
-        {'id': 'spirituality', 'name': 'Espiritualidade', 'color': '#84CC16', 'icon': 'Sun'},
+    return [
+        dict(area, default_score=default_score, position=position)
+        for position, area in enumerate(DEFAULT_LIFE_AREAS)
     ]
+
+def iter_stream_lines(stream, chunk_size=64 * 1024):
+    """
+    Lê um fluxo de bytes UTF-8 em blocos e devolve uma linha por vez (com o
+    '\n' final), sem carregar o corpo inteiro em memória
+    
+    Args:
+        stream: Objeto com read(size), ex.: o corpo da requisição
+        chunk_size (int): Tamanho de cada leitura, em bytes
     
-    created_areas = []
-    for area_data in default_areas:
-        area = LifeArea(
-            id=area_data['id'],
-            name=area_data['name'],
-            color=area_data['color'],
-            icon=area_data['icon'],
-            user_id=user_id
-        )
-        db.session.add(area)
-        created_areas.append(area)
-    
-    return created_areas
+    Yields:
+        str: Linhas do conteúdo
+    """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
 
 def validate_task_data(data):
     """